@@ -99,6 +99,7 @@ export default function Home() {
     setCurrentStage('research');
     setStageProgress({ research: 0, generation: 0, validation: 0 });
     setFoundPapers(0);
+    setBlogContent('');
     
     try {
       // Start blog generation
@@ -109,9 +110,13 @@ export default function Home() {
       const newSessionId = startResponse.session_id;
       setSessionId(newSessionId);
       
-      // Poll for status updates
-      console.log('🔄 Starting status polling...');
-      await pollGenerationStatus(newSessionId);
+      // Stream status updates, falling back to polling if streaming is unavailable
+      console.log('📡 Opening generation stream...');
+      const streamed = await streamGenerationStatus(newSessionId);
+      if (!streamed) {
+        console.log('🔄 Stream unavailable, starting status polling...');
+        await pollGenerationStatus(newSessionId);
+      }
       
     } catch (error: any) {
       console.error('❌ Blog generation error:', error);
@@ -119,6 +124,79 @@ export default function Home() {
     }
   };
   
+  // Resolves true once the stream reached a terminal event, false if the
+  // stream could not be used (caller falls back to polling)
+  const streamGenerationStatus = (sessionId: string) => new Promise<boolean>((resolve, reject) => {
+    if (typeof EventSource === 'undefined') {
+      resolve(false);
+      return;
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/stream/${sessionId}`);
+
+    const applyRunning = (data: any) => {
+      setCurrentStage(data.stage);
+      setStageProgress(data.progress);
+      if (data.found_papers) {
+        setFoundPapers(data.found_papers);
+      }
+    };
+
+    const applyTerminal = (data: any) => {
+      source.close();
+      if (data.status === 'error') {
+        setErrorType(data.error.error_type || 'api_error');
+        setCurrentPhase('error');
+      } else {
+        const result = data.result;
+        setBlogTitle(result.title);
+        setBlogContent(result.content);
+        setEstimatedReadTime(result.estimated_read_time);
+        setCitationCount(result.citation_count);
+        setCurrentPhase('success');
+      }
+      resolve(true);
+    };
+
+    source.addEventListener('status', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      if (data.status === 'running' || data.status === 'queued') {
+        applyRunning(data);
+      } else {
+        applyTerminal(data);
+      }
+    });
+    source.addEventListener('progress', (e) => {
+      applyRunning(JSON.parse((e as MessageEvent).data));
+    });
+    source.addEventListener('token', (e) => {
+      const { text } = JSON.parse((e as MessageEvent).data);
+      setBlogContent(prev => prev + text);
+    });
+    source.addEventListener('retry', (e) => {
+      // The stage restarts from scratch; drop any partially streamed body
+      const { stage } = JSON.parse((e as MessageEvent).data);
+      if (stage === 'generation') {
+        setBlogContent('');
+      }
+    });
+    source.addEventListener('completed', (e) => applyTerminal(JSON.parse((e as MessageEvent).data)));
+    source.addEventListener('error', (e) => {
+      const data = (e as MessageEvent).data;
+      if (data) {
+        applyTerminal(JSON.parse(data));
+        return;
+      }
+      // Transport error: fall back to polling
+      source.close();
+      resolve(false);
+    });
+    source.addEventListener('cancelled', () => {
+      source.close();
+      reject(new Error('Generation cancelled'));
+    });
+  });
+  
   const pollGenerationStatus = async (sessionId: string) => {
     const maxPolls = 120; // 10 minutes maximum
     let pollCount = 0;
@@ -146,7 +224,7 @@ export default function Home() {
           return;
         }
         
-        if (statusResponse.status === 'running') {
+        if (statusResponse.status === 'running' || statusResponse.status === 'queued') {
           // Update progress
           const { stage, progress, found_papers } = statusResponse;
           setCurrentStage(stage);
@@ -484,6 +562,14 @@ export default function Home() {
           </div>
         </div>
 
+        {/* Live preview of the blog body as it streams in */}
+        {blogContent && (
+          <div className="mt-8 bg-black/50 border border-blue-500/20 rounded-lg p-4 max-h-64 overflow-y-auto">
+            <div className="text-blue-400 text-sm font-medium mb-2">Live preview</div>
+            <pre className="text-gray-300 text-sm whitespace-pre-wrap font-sans">{blogContent}</pre>
+          </div>
+        )}
+
         <div className="mt-8 text-center text-gray-400">
           <div className="text-lg">Estimated Time: 2-3 minutes</div>
           <div className="text-sm mt-2">Session ID: {sessionId}</div>
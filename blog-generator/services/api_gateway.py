@@ -4,23 +4,70 @@ Connects the Next.js frontend with the Python blog generation service
 """
 
 import os
-import asyncio
 import json
-from typing import Dict, List, Any, Optional
+import time
+import uuid
+import asyncio
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # Import the existing blog generator functions
-from blog_generator import get_research_papers, generate_blog, save_blog
+import blog_generator
+from blog_generator import (
+    EventCallback,
+    RESEARCH_MODEL,
+    BLOG_MODEL,
+    LLM_BACKEND,
+    backend_configured,
+    get_research_papers_async,
+    generate_blog_async,
+    save_blog_async,
+    verify_references_async,
+    normalize_text,
+    research_cache_stats,
+    research_metadata,
+    similar_research,
+)
+from blog_index import blog_index
+from output_store import output_store
+from reference_verifier import reference_verifier
+from topic_index import TOPIC_REUSE_RESEARCH, TOPIC_REUSE_THRESHOLD, TOPIC_SIMILARITY_THRESHOLD, topic_index
+from job_queue import QueueFullError, create_job_queue
+from rate_limiter import rate_limiter
+from retries import JOB_DEADLINE_SECONDS
+from checkpoints import CheckpointStore, last_completed_stage
+from session_store import SESSION_STORE, create_session_store
+from usage import TOKEN_FIELDS, add_usage, summarize_usage, usage_ledger
+from telemetry import get_logger, mark_error, server_span, shutdown_tracing, tag_session, traced_job
+from metrics import (
+    counted_retries,
+    instrument_pipeline,
+    mark_process_dead,
+    render_metrics,
+    timed_job,
+    timed_stage,
+)
 
 # Load environment variables
 load_dotenv()
 
+log = get_logger("gateway")
+
+# Prometheus hooks: OpenAI call latency and cache lookups inside blog_generator,
+# stage latency around the pipeline steps this gateway calls
+instrument_pipeline(blog_generator)
+get_research_papers_async = timed_stage("research")(get_research_papers_async)
+generate_blog_async = timed_stage("generation")(generate_blog_async)
+verify_references_async = timed_stage("verification")(verify_references_async)
+save_blog_async = timed_stage("save")(save_blog_async)
+
 app = FastAPI(
     title="Blog Generator API",
     description="AI-powered research-based blog generation service",
@@ -42,6 +89,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Server span per request, tagged with the session_id path parameter if any"""
+    with server_span(
+        f"{request.method} {request.url.path}",
+        **{"http.request.method": request.method, "url.path": request.url.path},
+    ) as current:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            current.update_name(f"{request.method} {route.path}")
+            current.set_attribute("http.route", route.path)
+        session_id = request.scope.get("path_params", {}).get("session_id")
+        if session_id:
+            current.set_attribute("session_id", session_id)
+        current.set_attribute("http.response.status_code", response.status_code)
+        return response
+
 # ============================================================================
 # PYDANTIC MODELS - Request/Response schemas matching frontend
 # ============================================================================
@@ -54,6 +119,8 @@ class BlogGenerationRequest(BaseModel):
     include_faq: bool = Field(False, description="Include FAQ section")
     include_statistics: bool = Field(False, description="Include statistics section")
     include_examples: bool = Field(False, description="Include real-world examples")
+    reuse_existing: bool = Field(False, description="Serve a saved blog from an identical earlier request instead of generating")
+    reuse_similar_research: bool = Field(TOPIC_REUSE_RESEARCH, description="Write from cached research of a near-duplicate topic instead of researching")
 
 class ProgressUpdate(BaseModel):
     stage: str = Field(..., description="Current stage: research, generation, validation")
@@ -69,6 +136,9 @@ class BlogGenerationResponse(BaseModel):
     estimated_read_time: int = Field(..., description="Estimated reading time in minutes")
     citation_count: int = Field(..., description="Number of citations")
     created_at: str = Field(..., description="Creation timestamp")
+    usage: Optional[Dict[str, Any]] = Field(None, description="Per-stage tokens, latency and estimated cost")
+    reference_check: Optional[Dict[str, Any]] = Field(None, description="References per verification status")
+    similar_to: Optional[Dict[str, Any]] = Field(None, description="Topic whose cached research was reused, with its similarity")
 
 class ErrorResponse(BaseModel):
     error_type: str = Field(..., description="Error type: api_error, research_error, network_error")
@@ -77,6 +147,14 @@ class ErrorResponse(BaseModel):
     retry_count: int = Field(0, description="Current retry count")
     session_id: Optional[str] = Field(None, description="Session ID if available")
 
+# Batch limits: items per POST /generate/batch and default per-batch parallelism
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "4"))
+
+class BatchGenerationRequest(BaseModel):
+    items: List[BlogGenerationRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    max_parallel: int = Field(BATCH_MAX_PARALLEL, ge=1, le=32, description="Items of this batch run at once")
+
 class HealthStatus(BaseModel):
     openai_api: str = Field(..., description="OpenAI API status")
     database: str = Field(..., description="Database status") 
@@ -84,79 +162,232 @@ class HealthStatus(BaseModel):
     timestamp: str = Field(..., description="Health check timestamp")
 
 # ============================================================================
-# IN-MEMORY SESSION STORAGE
+# SESSION STORAGE
 # ============================================================================
 
-# Store active generation sessions
-active_sessions: Dict[str, Dict[str, Any]] = {}
+# Generation sessions (plain dicts) in the configured backend - see session_store.py
+session_store = create_session_store()
+
+# Batch records (item session ids + topics); progress is aggregated from the items
+batch_store = create_session_store(table="batches")
 
-def create_session_id() -> str:
+# Batch runners started by this process
+batch_tasks: Dict[str, asyncio.Task] = {}
+
+# Live event subscribers per session (one queue per open /stream connection)
+session_streams: Dict[str, List[asyncio.Queue]] = {}
+
+# Seconds between SSE keep-alive comments on an idle stream
+SSE_KEEPALIVE = 15
+
+# How often a stream re-reads the session store, to follow jobs run by other workers
+STREAM_POLL_INTERVAL = 0.5
+
+# Server processes (uvicorn --workers honours the same variable)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Seconds between sweeps for expired checkpoints (failed jobs nobody resumed)
+CHECKPOINT_PRUNE_INTERVAL = 3600
+
+def create_session_id(prefix: str = "session") -> str:
     """Generate unique session ID"""
-    return f"session_{int(datetime.now().timestamp() * 1000)}"
+    # Random suffix keeps ids unique when a burst lands in the same millisecond
+    return f"{prefix}_{int(datetime.now().timestamp() * 1000)}_{uuid.uuid4().hex[:8]}"
+
+def new_session() -> Dict[str, Any]:
+    """Initial state of a freshly queued generation session"""
+    return {
+        "status": "queued",
+        "created_at": time.time(),
+        "stage": "research",
+        "progress": {"research": 0, "generation": 0, "validation": 0},
+        "expected_chars": {},
+        "found_papers": 0,
+        "similar_to": None,
+        "retry_count": 0,
+        "partial_content": "",
+        "usage": {},
+        "error": None,
+        "result": None
+    }
+
+def usage_report(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-stage usage of a session plus job totals"""
+    stages = session.get("usage") or {}
+    return {"stages": stages, "total": summarize_usage(stages)}
+
+def publish_event(session_id: str, event: str, data: Dict[str, Any]) -> None:
+    """Push an event to every stream subscribed to the session"""
+    for queue in session_streams.get(session_id, []):
+        queue.put_nowait((event, data))
+
+class SessionCancelled(Exception):
+    """Raised inside a running job once its session has been deleted"""
+
+def persist_session(session_id: str, session: Dict[str, Any]) -> None:
+    """Write a running job's session back to the store; stops the job if it was cancelled"""
+    if not session_store.update(session_id, session):
+        raise SessionCancelled(f"Session {session_id} was cancelled")
+
+def publish_progress(session_id: str, session: Dict[str, Any]) -> None:
+    """Push the session's current stage/progress to its streams"""
+    if session["status"] in ("queued", "running"):
+        publish_event(session_id, "progress", {
+            "stage": session["stage"],
+            "progress": dict(session["progress"]),
+            "found_papers": session["found_papers"],
+        })
 
 # ============================================================================
 # BACKGROUND TASK FUNCTIONS
 # ============================================================================
 
-async def generate_blog_background(session_id: str, request: BlogGenerationRequest):
-    """Background task for blog generation with progress updates"""
+def make_progress_handler(session_id: str, session: Dict[str, Any]) -> EventCallback:
+    """Translate pipeline events into the session's per-stage progress"""
+    def on_event(event: str, payload: Dict[str, Any]) -> None:
+        stage = payload["stage"]
+        progress = session["progress"]
+        before = progress[stage]
+        if event == "body_delta":
+            session["partial_content"] += payload["text"]
+            publish_event(session_id, "token", {"text": payload["text"]})
+        elif event == "retry":
+            # The stage restarts from scratch; streamed text so far is discarded
+            session["retry_count"] += 1
+            progress[stage] = 0
+            if stage == "generation":
+                session["partial_content"] = ""
+            else:
+                session["found_papers"] = 0
+            publish_event(session_id, "retry", {
+                "stage": stage,
+                "attempt": payload["attempt"],
+                "delay": payload["delay"],
+                "retry_count": session["retry_count"],
+            })
+        elif event == "sent":
+            # ~4 characters per token; used to estimate streaming progress
+            session["expected_chars"][stage] = payload["max_tokens"] * 4
+            progress[stage] = max(progress[stage], 5)
+        elif event == "first_token":
+            progress[stage] = max(progress[stage], 15)
+        elif event == "delta":
+            expected = session["expected_chars"].get(stage) or 1
+            progress[stage] = max(progress[stage], 15 + int(80 * min(1.0, payload["chars"] / expected)))
+        elif event in ("item", "field"):
+            # Papers / references / title as soon as the streamed JSON closes them
+            if event == "item" and payload["field"] == "papers":
+                session["found_papers"] = payload["index"] + 1
+            publish_event(session_id, event, payload)
+        elif event == "usage":
+            record = {k: v for k, v in payload.items() if k != "stage"}
+            session["usage"][stage] = add_usage(session["usage"].get(stage), record)
+        elif event == "parsed":
+            progress[stage] = 100
+            if "papers" in payload:
+                session["found_papers"] = payload["papers"]
+            if payload.get("cached"):
+                session["usage"][stage] = dict(
+                    {field: 0 for field in TOKEN_FIELDS}, model=RESEARCH_MODEL, latency_ms=0,
+                    cost_usd=0.0, calls=0, cache_hit=True
+                )
+
+        if progress[stage] != before or event in ("parsed", "retry", "usage", "item"):
+            # Persisting also aborts the OpenAI stream if the session was cancelled
+            persist_session(session_id, session)
+            publish_progress(session_id, session)
+
+    return on_event
+
+# Counts "retry" events for /metrics
+make_progress_handler = counted_retries(make_progress_handler)
+
+async def generate_blog_background(session_id: str, payload: Dict[str, Any]):
+    """
+    Queue worker task for blog generation with progress updates. Stages that
+    already have a checkpoint (after POST /resume) are skipped.
+    """
+    request = BlogGenerationRequest(**payload)
+    session = session_store.get(session_id)
+    if session is None:
+        return  # Session was cancelled while queued
+
     try:
-        # Initialize session
-        active_sessions[session_id] = {
-            "status": "running",
-            "stage": "research",
-            "progress": {"research": 0, "generation": 0, "validation": 0},
-            "found_papers": 0,
-            "error": None,
-            "result": None
-        }
+        session["status"] = "running"
+        persist_session(session_id, session)
+        publish_progress(session_id, session)
+        on_event = make_progress_handler(session_id, session)
+        deadline = time.monotonic() + JOB_DEADLINE_SECONDS
+        # Checkpoint files are fsynced: every read/write runs in a worker thread
+        checkpoint = (await asyncio.to_thread(checkpoint_store.load, session_id)
+                      or await asyncio.to_thread(checkpoint_store.create, session_id, request.dict()))
+        stages = checkpoint["stages"]
+        # Usage of stages completed before a resume still counts towards this job
+        session["usage"] = dict(checkpoint.get("usage", {}))
+        # Stage wall times for the output sidecar (checkpointed stages have none)
+        timings: Dict[str, int] = {}
 
         # Research phase
-        session = active_sessions[session_id]
-        session["stage"] = "research"
-        
-        # Simulate incremental progress updates
-        for i in range(0, 101, 10):
-            if session_id not in active_sessions:
-                return  # Session was cancelled
-                
-            session["progress"]["research"] = i
-            if i == 30:
-                session["found_papers"] = 3
-            elif i == 60:
-                session["found_papers"] = request.paper_count
-            await asyncio.sleep(0.2)
-
-        # Get research papers
-        research_data = get_research_papers(request.topic)
-        session["found_papers"] = len(research_data.get("papers", []))
+        if "research" in stages:
+            research_data = stages["research"]
+            on_event("parsed", {"stage": "research", "papers": len(research_data["papers"])})
+        else:
+            started = time.monotonic()
+            async with job_queue.model_slot(RESEARCH_MODEL):
+                research_data = await get_research_papers_async(
+                    request.topic, on_event=on_event, deadline=deadline, paper_count=request.paper_count,
+                    reuse_similar=request.reuse_similar_research
+                )
+            timings["research_ms"] = int((time.monotonic() - started) * 1000)
+            checkpoint["usage"] = session["usage"]
+            await asyncio.to_thread(checkpoint_store.complete_stage, checkpoint, "research", research_data)
+        # Set when the research of a near-duplicate topic was reused
+        session["similar_to"] = research_data.get("similar_to")
 
         # Generation phase
         session["stage"] = "generation"
-        for i in range(0, 101, 15):
-            if session_id not in active_sessions:
-                return
-                
-            session["progress"]["generation"] = i
-            await asyncio.sleep(0.3)
-
-        # Generate blog content
-        blog_data = generate_blog(research_data)
+        persist_session(session_id, session)
+        publish_progress(session_id, session)
+        if "generation" in stages:
+            blog_data = stages["generation"]
+            on_event("parsed", {"stage": "generation", "word_count": blog_data["word_count"]})
+        else:
+            started = time.monotonic()
+            async with job_queue.model_slot(BLOG_MODEL):
+                blog_data = await generate_blog_async(
+                    research_data, on_event=on_event, deadline=deadline, options=request.dict()
+                )
+            timings["generation_ms"] = int((time.monotonic() - started) * 1000)
+            checkpoint["usage"] = session["usage"]
+            await asyncio.to_thread(checkpoint_store.complete_stage, checkpoint, "generation", blog_data)
 
-        # Validation phase
+        # Validation phase - check the references, then persist the blog
         session["stage"] = "validation"
-        for i in range(0, 101, 20):
-            if session_id not in active_sessions:
-                return
-                
-            session["progress"]["validation"] = i
-            await asyncio.sleep(0.15)
-
-        # Save blog
-        filepath = save_blog(blog_data, request.topic)
+        session["progress"]["validation"] = 25
+        persist_session(session_id, session)
+        publish_progress(session_id, session)
+        if "save" in stages:
+            filepath = Path(stages["save"]["filepath"])
+        else:
+            started = time.monotonic()
+            await verify_references_async([blog_data])
+            timings["verification_ms"] = int((time.monotonic() - started) * 1000)
+            session["progress"]["validation"] = 50
+            publish_progress(session_id, session)
+            filepath = await save_blog_async(blog_data, request.topic, {
+                "session_id": session_id,
+                "request_key": request_fingerprint(request),
+                "request": request.dict(),
+                "usage": usage_report(session),
+                "timings": timings,
+                **research_metadata(research_data),
+            })
+            await asyncio.to_thread(checkpoint_store.complete_stage, checkpoint, "save", {"filepath": str(filepath)})
+        session["progress"]["validation"] = 100
+        publish_progress(session_id, session)
 
-        # Calculate reading time
-        estimated_read_time = max(1, request.word_count // 200)
+        # Calculate reading time from what was actually written
+        estimated_read_time = max(1, round(blog_data["word_count"] / 200))
 
         # Update session with results
         session["status"] = "completed"
@@ -167,10 +398,26 @@ async def generate_blog_background(session_id: str, request: BlogGenerationReque
             word_count=blog_data["word_count"],
             estimated_read_time=estimated_read_time,
             citation_count=len(blog_data["references"]),
-            created_at=datetime.now().isoformat()
-        )
+            created_at=datetime.now().isoformat(),
+            usage=usage_report(session),
+            reference_check=blog_data.get("reference_check"),
+            similar_to=session["similar_to"]
+        ).dict()
+        session["partial_content"] = ""
+        persist_session(session_id, session)
+        publish_event(session_id, "completed", {"status": "completed", "result": session["result"]})
+        settle_flight(flight_key(request), session_id, session)
+        # Nothing left to resume; batch items are cleaned up by run_batch once
+        # the rest of their research group has picked up the research
+        if "batch_id" not in session:
+            await asyncio.to_thread(checkpoint_store.delete, session_id)
+
+    except SessionCancelled:
+        return
 
     except Exception as e:
+        mark_error(e)
+        log.error("❌ Generation failed during %s: %s", session.get("stage", "unknown"), e)
         # Handle errors
         error_type = "api_error"
         if "research" in str(e).lower() or "papers" in str(e).lower():
@@ -178,15 +425,356 @@ async def generate_blog_background(session_id: str, request: BlogGenerationReque
         elif "network" in str(e).lower() or "timeout" in str(e).lower():
             error_type = "network_error"
 
-        active_sessions[session_id] = {
+        error = ErrorResponse(
+            error_type=error_type,
+            message=str(e),
+            details=f"Error during {session.get('stage', 'unknown')} phase",
+            retry_count=session.get("retry_count", 0),
+            session_id=session_id
+        ).dict()
+        # update() never resurrects a session that was cancelled meanwhile
+        outcome = {
             "status": "error",
-            "error": ErrorResponse(
-                error_type=error_type,
-                message=str(e),
-                details=f"Error during {active_sessions.get(session_id, {}).get('stage', 'unknown')} phase",
-                session_id=session_id
-            )
+            "stage": session.get("stage"),
+            "error": error,
+            "usage": session.get("usage", {})
         }
+        if session_store.update(session_id, outcome):
+            publish_event(session_id, "error", {"status": "error", "error": error})
+            settle_flight(flight_key(request), session_id, outcome)
+
+# Bounded scheduler behind /generate; workers start with the app
+job_queue = create_job_queue(
+    timed_job(traced_job(generate_blog_background, session_store), session_store)
+)
+
+# Durable per-session stage outputs for POST /resume
+checkpoint_store = CheckpointStore()
+
+# ============================================================================
+# REQUEST COALESCING
+# ============================================================================
+
+# In-flight pipelines by request fingerprint: {"status", "leader", "followers", "request"}.
+# Identical concurrent /generate calls follow the leader's job instead of
+# starting their own.
+flight_store = create_session_store(table="flights")
+
+def request_fingerprint(request: BlogGenerationRequest) -> str:
+    """Normalized topic plus every generation parameter, hashed"""
+    params = request.dict(exclude={"reuse_existing"})
+    params["topic"] = normalize_text(request.topic)
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+def flight_key(request: BlogGenerationRequest) -> str:
+    return f"flight_{request_fingerprint(request)[:32]}"
+
+def join_flight(key: str, session_id: str, request: BlogGenerationRequest) -> Optional[str]:
+    """
+    Follow an identical in-flight pipeline; returns its leader, or None if
+    session_id now leads. Leadership is claimed with one atomic insert, so
+    concurrent workers never both lead the same flight.
+    """
+    record = {"status": "running", "leader": session_id, "followers": [], "request": request.dict()}
+    while not flight_store.add(key, record):
+        flight = flight_store.get(key)
+        if flight is None:
+            continue  # settled meanwhile
+        leader = session_store.get(flight["leader"])
+        if leader is not None and leader["status"] in ("queued", "running"):
+            flight["followers"].append(session_id)
+            flight_store.update(key, flight)
+            return flight["leader"]
+        # Leader gone without settling (e.g. its worker died); a no-op if another worker replaced it first
+        flight_store.delete_if_unchanged(key, flight)
+    return None
+
+def adopt_outcome(session_id: str, session: Dict[str, Any], leader: Dict[str, Any]) -> None:
+    """Copy a finished leader's result or error into a follower, under the follower's id"""
+    session["status"] = leader["status"]
+    session["stage"] = leader.get("stage")
+    session["partial_content"] = ""
+    if leader["status"] == "completed":
+        session["progress"] = dict(leader["progress"])
+        session["result"] = dict(leader["result"], session_id=session_id)
+    else:
+        session["error"] = dict(leader["error"], session_id=session_id)
+    session.pop("follows", None)
+
+def settle_flight(key: str, session_id: str, outcome: Dict[str, Any]) -> None:
+    """Hand a leader's final outcome to every follower still waiting on it"""
+    flight = flight_store.get(key)
+    if flight is None or flight["leader"] != session_id:
+        return
+    flight_store.delete(key)
+    for follower_id in flight["followers"]:
+        follower = session_store.get(follower_id)
+        if follower is None or follower.get("follows") != session_id:
+            continue
+        adopt_outcome(follower_id, follower, outcome)
+        if session_store.update(follower_id, follower):
+            publish_event(follower_id, follower["status"], session_status(follower_id, follower))
+
+def load_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Session as clients see it; a follower mirrors its leader until the leader finishes"""
+    session = session_store.get(session_id)
+    if session is None or "follows" not in session:
+        return session
+    leader = session_store.get(session["follows"])
+    if leader is None:
+        return session
+    if leader["status"] in ("completed", "error"):
+        # The leader's worker normally settles followers; this covers one that died first
+        adopt_outcome(session_id, session, leader)
+        session_store.update(session_id, session)
+        return session
+    view = dict(session)
+    for field in ("status", "stage", "progress", "found_papers", "retry_count", "partial_content"):
+        view[field] = leader[field]
+    return view
+
+async def promote_follower(session_id: str, session: Dict[str, Any]) -> None:
+    """Before a leader is cancelled, hand its flight (and checkpoint) to the first live follower"""
+    key = session.get("flight")
+    flight = flight_store.get(key) if key else None
+    if flight is None or flight["leader"] != session_id:
+        return
+    followers = [
+        (fid, follower) for fid, follower in ((fid, session_store.get(fid)) for fid in flight["followers"])
+        if follower is not None and follower.get("follows") == session_id
+    ]
+    if not followers:
+        flight_store.delete(key)
+        return
+
+    (new_leader, leader_session), rest = followers[0], followers[1:]
+    leader_session.pop("follows", None)
+    session_store.update(new_leader, leader_session)
+    for fid, follower in rest:
+        follower["follows"] = new_leader
+        session_store.update(fid, follower)
+    flight.update(leader=new_leader, followers=[fid for fid, _ in rest])
+    flight_store.update(key, flight)
+
+    def carry_checkpoint() -> None:
+        checkpoint = checkpoint_store.load(session_id)
+        if checkpoint is not None and checkpoint["stages"]:
+            carried = checkpoint_store.create(new_leader, flight["request"])
+            for stage, output in checkpoint["stages"].items():
+                checkpoint_store.complete_stage(carried, stage, output)
+
+    await asyncio.to_thread(carry_checkpoint)
+    try:
+        await job_queue.submit_async(new_leader, flight["request"])
+    except QueueFullError as e:
+        error = ErrorResponse(
+            error_type="api_error",
+            message=str(e),
+            details="Queue full while taking over a cancelled identical request",
+            session_id=new_leader
+        ).dict()
+        outcome = {"status": "error", "stage": "research", "error": error}
+        session_store.update(new_leader, outcome)
+        publish_event(new_leader, "error", {"status": "error", "error": error})
+        settle_flight(key, new_leader, outcome)
+
+# ============================================================================
+# BATCH GENERATION
+# ============================================================================
+
+def research_group(request: BlogGenerationRequest) -> Tuple[str, int, bool]:
+    """Items with the same group in a batch share one research call"""
+    return normalize_text(request.topic), request.paper_count, request.reuse_similar_research
+
+async def submit_when_admitted(session_id: str, payload: Dict[str, Any]) -> bool:
+    """Submit to the job queue, waiting out QueueFullError; False if the item was cancelled"""
+    while session_id in session_store:
+        try:
+            await job_queue.submit_async(session_id, payload)
+            return True
+        except QueueFullError as e:
+            await asyncio.sleep(e.retry_after)
+    return False
+
+async def wait_for_session(session_id: str, research_done: Optional[asyncio.Future] = None) -> None:
+    """
+    Poll until the session finishes (or is cancelled). research_done, if given,
+    is resolved with the research output as soon as the checkpoint has it.
+    """
+    while True:
+        session = session_store.get(session_id)
+        finished = session is None or session["status"] in ("completed", "error")
+        if research_done is not None and not research_done.done():
+            checkpoint = await asyncio.to_thread(checkpoint_store.load, session_id)
+            if checkpoint is not None and "research" in checkpoint["stages"]:
+                research_done.set_result(checkpoint["stages"]["research"])
+            elif finished:
+                research_done.set_result(None)  # followers research on their own
+        if finished:
+            return
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+async def run_batch(batch_id: str, items: List[Tuple[str, BlogGenerationRequest]], max_parallel: int) -> None:
+    """
+    Feed a batch's items to the job queue, at most max_parallel in flight.
+    The first item of each research group runs first; the others start
+    from a checkpoint holding its research, skipping the research stage.
+    """
+    slots = asyncio.Semaphore(max_parallel)
+    leaders: Dict[Tuple[str, int, bool], asyncio.Future] = {}
+    loop = asyncio.get_running_loop()
+
+    async def run_item(session_id: str, request: BlogGenerationRequest) -> None:
+        group = research_group(request)
+        research_done = None
+        if group in leaders:
+            # Waiting happens outside the semaphore so leaders always get a slot
+            research = await leaders[group]
+            if research is not None and session_id in session_store:
+                checkpoint = await asyncio.to_thread(checkpoint_store.create, session_id, request.dict())
+                await asyncio.to_thread(checkpoint_store.complete_stage, checkpoint, "research", research)
+        else:
+            research_done = leaders[group] = loop.create_future()
+
+        try:
+            async with slots:
+                if await submit_when_admitted(session_id, request.dict()):
+                    await wait_for_session(session_id, research_done)
+            session = session_store.get(session_id)
+            if session is not None and session["status"] == "completed":
+                await asyncio.to_thread(checkpoint_store.delete, session_id)
+        finally:
+            if research_done is not None and not research_done.done():
+                research_done.set_result(None)
+
+    try:
+        await asyncio.gather(*(run_item(sid, request) for sid, request in items))
+        batch = batch_store.get(batch_id)
+        if batch is not None:
+            batch["status"] = "completed"
+            batch_store.update(batch_id, batch)
+    finally:
+        batch_tasks.pop(batch_id, None)
+
+async def batch_status(batch_id: str, batch: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregated progress of a batch plus each item's status, result or error"""
+    counts = {"queued": 0, "running": 0, "completed": 0, "error": 0, "cancelled": 0}
+    items = []
+    total_progress = 0.0
+    for item in batch["items"]:
+        session_id = item["session_id"]
+        session = load_session(session_id)
+        entry = {"session_id": session_id, "topic": item["topic"]}
+        if session is None:
+            entry["status"] = "cancelled"
+            progress = 100
+        elif session["status"] in ("completed", "error"):
+            entry["status"] = session["status"]
+            progress = 100
+            if session["status"] == "completed":
+                result = session["result"]
+                entry["result"] = {
+                    "title": result["title"],
+                    "word_count": result["word_count"],
+                    "citation_count": result["citation_count"],
+                }
+            else:
+                entry["error"] = session["error"]
+        else:
+            entry["status"] = session["status"]
+            entry["stage"] = session["stage"]
+            entry["queue_position"] = await job_queue.position_async(session_id)
+            progress = sum(session["progress"].values()) // len(session["progress"])
+        entry["progress"] = progress
+        counts[entry["status"]] += 1
+        total_progress += progress
+        items.append(entry)
+
+    return {
+        "batch_id": batch_id,
+        "status": "running" if counts["queued"] or counts["running"] else "completed",
+        "total": len(items),
+        "counts": counts,
+        "progress": int(total_progress / len(items)) if items else 100,
+        "max_parallel": batch["max_parallel"],
+        "created_at": batch["created_at"],
+        "items": items,
+    }
+
+# ============================================================================
+# BLOG LIBRARY
+# ============================================================================
+
+async def read_blog(blog: Dict[str, Any]) -> Optional[str]:
+    """Markdown of an indexed blog, or None if its file is gone"""
+    try:
+        return await asyncio.to_thread((output_store.directory / blog["file"]).read_text, encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+async def serve_existing(session_id: str, request: BlogGenerationRequest) -> Optional[Dict[str, Any]]:
+    """Complete session_id from the newest blog an identical request produced, if any"""
+    if blog_index is None:
+        return None
+    blog = blog_index.find_by_request(request_fingerprint(request))
+    if blog is None:
+        return None
+    content = await read_blog(blog)
+    if content is None:
+        return None
+
+    session = new_session()
+    session["status"] = "completed"
+    session["stage"] = "validation"
+    session["progress"] = {"research": 100, "generation": 100, "validation": 100}
+    session["served_from"] = blog["id"]
+    session["result"] = BlogGenerationResponse(
+        session_id=session_id,
+        title=blog["title"],
+        content=content,
+        word_count=blog["word_count"],
+        estimated_read_time=max(1, round(blog["word_count"] / 200)),
+        citation_count=blog["reference_count"],
+        created_at=blog["created_at"],
+        usage=usage_report(session)
+    ).dict()
+    session_store.put(session_id, session)
+    return blog
+
+async def similar_blogs(topics: List[str], k: int = 3) -> List[List[Dict[str, Any]]]:
+    """Saved blogs on near-duplicate topics (see topic_index.py), best first, per topic"""
+    if topic_index is None or blog_index is None:
+        return [[] for _ in topics]
+    matches = await asyncio.to_thread(topic_index.similar_many, topics, "blog", "", k)
+    offers = []
+    for found in matches:
+        blogs = []
+        for match in found:
+            blog = blog_index.get(match["ref"])
+            if blog is not None:
+                blogs.append({"id": blog["id"], "title": blog["title"], "topic": blog["topic"],
+                              "similarity": match["score"]})
+        offers.append(blogs)
+    return offers
+
+async def similar_research_offers(requests: List[BlogGenerationRequest]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Cached research of a near-duplicate topic per request, or None. Only
+    requests with reuse_similar_research (and a match >= TOPIC_REUSE_THRESHOLD)
+    are written from it; for the others it is an offer to resubmit with it.
+    """
+    offers: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    by_count: Dict[int, List[int]] = {}
+    for index, request in enumerate(requests):
+        by_count.setdefault(request.paper_count, []).append(index)
+    for paper_count, indexes in by_count.items():
+        topics = [requests[index].topic for index in indexes]
+        matches = await asyncio.to_thread(similar_research, topics, paper_count)
+        for index, match in zip(indexes, matches):
+            if match is not None:
+                offers[index] = {"topic": match["topic"], "similarity": match["score"],
+                                 "reusable": match["score"] >= TOPIC_REUSE_THRESHOLD}
+    return offers
 
 # ============================================================================
 # API ENDPOINTS
@@ -196,7 +784,10 @@ async def generate_blog_background(session_id: str, request: BlogGenerationReque
 async def health_check():
     """System health check endpoint"""
     # Check OpenAI API
-    openai_status = "online" if os.getenv("OPENAI_API_KEY") else "offline"
+    if LLM_BACKEND == "mock":
+        openai_status = "mock"
+    else:
+        openai_status = "online" if backend_configured() else "offline"
     
     return HealthStatus(
         openai_api=openai_status,
@@ -206,48 +797,174 @@ async def health_check():
     )
 
 @app.post("/generate", response_model=dict)
-async def start_blog_generation(request: BlogGenerationRequest, background_tasks: BackgroundTasks):
+async def start_blog_generation(request: BlogGenerationRequest):
     """Start blog generation process"""
     try:
         # Validate OpenAI API key
-        if not os.getenv("OPENAI_API_KEY"):
+        if not backend_configured():
             raise HTTPException(
                 status_code=500, 
                 detail="OpenAI API key not configured"
             )
 
-        # Create session
+        # Create session; identical in-flight requests share one pipeline
         session_id = create_session_id()
-        
-        # Start background generation
-        background_tasks.add_task(generate_blog_background, session_id, request)
+        tag_session(session_id)
+        if request.reuse_existing:
+            existing = await serve_existing(session_id, request)
+            if existing is not None:
+                return {
+                    "session_id": session_id,
+                    "message": "Served an existing blog",
+                    "status": "completed",
+                    "queue_position": None,
+                    "blog_id": existing["id"]
+                }
+        # Blogs on near-duplicate topics are offered alongside the new job
+        offers = (await similar_blogs([request.topic]))[0]
+        research_offer = (await similar_research_offers([request]))[0]
+        session = new_session()
+        session["flight"] = key = flight_key(request)
+        leader_id = join_flight(key, session_id, request)
+        if leader_id is not None:
+            session["follows"] = leader_id
+            session_store.put(session_id, session)
+            return {
+                "session_id": session_id,
+                "message": "Joined an identical generation already in progress",
+                "status": "initiated",
+                "queue_position": await job_queue.position_async(leader_id),
+                "coalesced_with": leader_id,
+                "similar_blogs": offers,
+                "similar_research": research_offer
+            }
+
+        # Admit it to the job queue
+        session_store.put(session_id, session)
+        try:
+            position = await job_queue.submit_async(session_id, request.dict())
+        except QueueFullError as e:
+            session_store.delete(session_id)
+            flight_store.delete(key)
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
         
         return {
             "session_id": session_id,
-            "message": "Blog generation started",
-            "status": "initiated"
+            "message": "Blog generation queued",
+            "status": "initiated",
+            "queue_position": position,
+            "similar_blogs": offers,
+            "similar_research": research_offer
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/status/{session_id}", response_model=dict)
-async def get_generation_status(session_id: str):
-    """Get current generation status and progress"""
-    if session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = active_sessions[session_id]
-    
+@app.post("/generate/batch", response_model=dict)
+async def start_batch_generation(request: BatchGenerationRequest):
+    """
+    Start blog generation for many topics. Items run as ordinary sessions
+    (see /status, /stream, /result); GET /batch/{batch_id} aggregates them.
+    Items with reuse_existing are served from a saved blog when one matches.
+    """
+    if not backend_configured():
+        raise HTTPException(
+            status_code=500,
+            detail="OpenAI API key not configured"
+        )
+
+    batch_id = create_session_id("batch")
+    entries = []
+    items = []
+    served: Dict[str, str] = {}
+    for item in request.items:
+        session_id = create_session_id()
+        entries.append({"session_id": session_id, "topic": item.topic})
+        if item.reuse_existing:
+            existing = await serve_existing(session_id, item)
+            if existing is not None:
+                session = session_store.get(session_id)
+                session["batch_id"] = batch_id
+                session_store.update(session_id, session)
+                served[session_id] = existing["id"]
+                continue
+        session = new_session()
+        session["batch_id"] = batch_id
+        session_store.put(session_id, session)
+        items.append((session_id, item))
+
+    batch_store.put(batch_id, {
+        "status": "running",
+        "max_parallel": request.max_parallel,
+        "created_at": datetime.now().isoformat(),
+        "items": entries,
+    })
+    batch_tasks[batch_id] = asyncio.create_task(run_batch(batch_id, items, request.max_parallel))
+
+    return {
+        "batch_id": batch_id,
+        "message": f"Batch of {len(items)} blogs queued" + (f", {len(served)} served from existing blogs" if served else ""),
+        "status": "initiated",
+        "session_ids": [entry["session_id"] for entry in entries],
+        "served_existing": served,
+        "research_groups": len({research_group(item) for _, item in items}),
+        "similar_blogs": {
+            sid: offers
+            for (sid, _), offers in zip(items, await similar_blogs([item.topic for _, item in items]))
+            if offers
+        },
+        "similar_research": {
+            sid: offer
+            for (sid, _), offer in zip(items, await similar_research_offers([item for _, item in items]))
+            if offer is not None
+        }
+    }
+
+@app.get("/batch/{batch_id}", response_model=dict)
+async def get_batch_status(batch_id: str):
+    """Aggregated progress and per-item results/errors of a batch"""
+    batch = batch_store.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return await batch_status(batch_id, batch)
+
+@app.delete("/batch/{batch_id}")
+async def cancel_batch(batch_id: str):
+    """Cancel every unfinished item of a batch"""
+    batch = batch_store.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    cancelled = 0
+    for item in batch["items"]:
+        session_id = item["session_id"]
+        session = session_store.get(session_id)
+        if session is not None and session["status"] in ("queued", "running"):
+            session_store.delete(session_id)
+            await job_queue.discard_async(session_id)
+            await asyncio.to_thread(checkpoint_store.delete, session_id)
+            publish_event(session_id, "cancelled", {"session_id": session_id})
+            cancelled += 1
+    return {"message": "Batch cancelled", "batch_id": batch_id, "cancelled_items": cancelled}
+
+def session_status(session_id: str, session: Dict[str, Any], queue_position: Optional[int] = None) -> Dict[str, Any]:
+    """Status payload shared by /status and the /stream snapshot (see current_status)"""
     if session["status"] == "error":
         return {
             "status": "error",
-            "error": session["error"].dict()
+            "error": session["error"],
+            "usage": usage_report(session)
         }
     elif session["status"] == "completed":
         return {
             "status": "completed",
-            "result": session["result"].dict()
+            "result": session["result"]
         }
     else:
         # Running status
@@ -255,7 +972,9 @@ async def get_generation_status(session_id: str):
         progress = session["progress"]
         
         # Determine status message
-        if current_stage == "research":
+        if queue_position is not None:
+            message = f"⏳ Queued (position {queue_position})"
+        elif current_stage == "research":
             if session["found_papers"] > 0:
                 message = f"→ Found {session['found_papers']} relevant papers"
             else:
@@ -268,47 +987,293 @@ async def get_generation_status(session_id: str):
             message = "⏳ Processing..."
         
         return {
-            "status": "running",
+            "status": session["status"],
             "stage": current_stage,
             "progress": progress,
             "message": message,
             "found_papers": session.get("found_papers", 0),
+            "similar_to": session.get("similar_to"),
+            "retry_count": session.get("retry_count", 0),
+            "queue_position": queue_position,
+            "usage": usage_report(session),
             "session_id": session_id
         }
 
+async def current_status(session_id: str, session: Dict[str, Any]) -> Dict[str, Any]:
+    """session_status with the live queue position of an unfinished session"""
+    queue_position = None
+    if session["status"] in ("queued", "running"):
+        queue_position = await job_queue.position_async(session.get("follows", session_id))
+    return session_status(session_id, session, queue_position)
+
+@app.get("/status/{session_id}", response_model=dict)
+async def get_generation_status(session_id: str):
+    """Get current generation status and progress"""
+    session = load_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return await current_status(session_id, session)
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/stream/{session_id}")
+async def stream_generation(session_id: str, request: Request):
+    """
+    Server-Sent Events stream of a generation session: an initial "status"
+    snapshot, then "progress" and "token" (incremental body_md) events, plus
+    "item" (each paper/reference) and "field" (e.g. title) as soon as the
+    model's JSON closes them, ending with "completed", "error" or "cancelled"
+    """
+    if session_id not in session_store:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    session_streams.setdefault(session_id, []).append(queue)
+
+    async def event_source():
+        # What this stream has delivered so far, to diff against the store
+        sent = {"chars": 0, "retries": 0, "progress": None}
+
+        def remote_events(session: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+            """Events for changes made by whichever worker runs the job"""
+            events = []
+            if session["status"] in ("completed", "error"):
+                events.append((session["status"], session_status(session_id, session)))
+                return events
+            if session.get("retry_count", 0) > sent["retries"]:
+                sent["retries"] = session["retry_count"]
+                sent["chars"] = 0
+                events.append(("retry", {"stage": session["stage"], "retry_count": sent["retries"]}))
+            progress = {"stage": session["stage"], "progress": session["progress"],
+                        "found_papers": session["found_papers"]}
+            if progress != sent["progress"]:
+                sent["progress"] = progress
+                events.append(("progress", progress))
+            partial = session.get("partial_content", "")
+            if len(partial) > sent["chars"]:
+                events.append(("token", {"text": partial[sent["chars"]:]}))
+                sent["chars"] = len(partial)
+            return events
+
+        try:
+            session = load_session(session_id)
+            if session is None:
+                yield format_sse("cancelled", {"session_id": session_id})
+                return
+            snapshot = await current_status(session_id, session)
+            yield format_sse("status", snapshot)
+            if snapshot["status"] in ("completed", "error"):
+                return
+            sent["retries"] = session.get("retry_count", 0)
+            if session["partial_content"]:
+                yield format_sse("token", {"text": session["partial_content"]})
+                sent["chars"] = len(session["partial_content"])
+
+            idle = 0.0
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=STREAM_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    session = load_session(session_id)
+                    if session is None:
+                        yield format_sse("cancelled", {"session_id": session_id})
+                        return
+                    events = remote_events(session)
+                    for event, data in events:
+                        yield format_sse(event, data)
+                        if event in ("completed", "error"):
+                            return
+                    idle = 0.0 if events else idle + STREAM_POLL_INTERVAL
+                    if idle >= SSE_KEEPALIVE:
+                        idle = 0.0
+                        if await request.is_disconnected():
+                            return
+                        yield ": keep-alive\n\n"
+                    continue
+
+                # Local event from this process's worker
+                idle = 0.0
+                if event == "token":
+                    sent["chars"] += len(data["text"])
+                elif event == "retry":
+                    sent["retries"] = data["retry_count"]
+                    if data["stage"] == "generation":
+                        sent["chars"] = 0
+                elif event == "progress":
+                    sent["progress"] = data
+                yield format_sse(event, data)
+                if event in ("completed", "error", "cancelled"):
+                    return
+        finally:
+            streams = session_streams.get(session_id, [])
+            if queue in streams:
+                streams.remove(queue)
+            if not streams:
+                session_streams.pop(session_id, None)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/result/{session_id}", response_model=BlogGenerationResponse)
 async def get_blog_result(session_id: str):
     """Get completed blog generation result"""
-    if session_id not in active_sessions:
+    session = load_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]
-    
     if session["status"] == "completed":
         return session["result"]
     elif session["status"] == "error":
-        raise HTTPException(status_code=500, detail=session["error"].dict())
+        raise HTTPException(status_code=500, detail=session["error"])
     else:
         raise HTTPException(status_code=202, detail="Generation still in progress")
 
+@app.post("/resume/{session_id}", response_model=dict)
+async def resume_generation(session_id: str):
+    """Re-queue a failed or interrupted session from its last completed stage"""
+    checkpoint = await asyncio.to_thread(checkpoint_store.load, session_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="No checkpoint for session")
+
+    session = session_store.get(session_id)
+    if session is not None and session["status"] in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Session is already in progress")
+
+    request = BlogGenerationRequest(**checkpoint["request"])
+    session_store.put(session_id, new_session())
+    try:
+        position = await job_queue.submit_async(session_id, request.dict())
+    except QueueFullError as e:
+        session_store.delete(session_id)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    return {
+        "session_id": session_id,
+        "message": "Blog generation resumed",
+        "status": "initiated",
+        "resumed_after": last_completed_stage(checkpoint),
+        "queue_position": position
+    }
+
 @app.delete("/session/{session_id}")
 async def cancel_generation(session_id: str):
     """Cancel active generation session"""
-    if session_id in active_sessions:
-        del active_sessions[session_id]
+    session = session_store.get(session_id)
+    if session is not None:
+        await promote_follower(session_id, session)
+    if session_store.delete(session_id):
+        await job_queue.discard_async(session_id)
+        await asyncio.to_thread(checkpoint_store.delete, session_id)
+        publish_event(session_id, "cancelled", {"session_id": session_id})
         return {"message": "Session cancelled", "session_id": session_id}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
+@app.get("/queue")
+async def get_queue_stats():
+    """Job queue depth, worker pool, admission counters and OpenAI rate budgets"""
+    return {**await job_queue.stats_async(), "rate_limits": rate_limiter.stats()}
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Research cache hit/miss counters and size, plus the topic index and reference verification"""
+    stats = research_cache_stats()
+    if topic_index is not None:
+        stats["topic_index"] = topic_index.stats()
+    stats["references"] = reference_verifier.stats() if reference_verifier is not None else {"enabled": False}
+    return stats
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition"""
+    counts = {status: 0 for status in ("queued", "running", "completed", "error")}
+    counts.update(session_store.count_by_status())
+    body, content_type = render_metrics(await job_queue.stats_async(), counts)
+    return Response(content=body, media_type=content_type)
+
+@app.get("/usage")
+async def get_usage(days: int = 7):
+    """OpenAI tokens and estimated cost per day, model and stage"""
+    if not 1 <= days <= 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+    return usage_ledger.summary(days)
+
+@app.get("/blogs")
+async def list_blogs(
+    q: Optional[str] = None,
+    topic: Optional[str] = None,
+    doi: Optional[str] = None,
+    min_words: Optional[int] = None,
+    max_words: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "relevance"
+):
+    """
+    Saved blogs, newest first or best match first for a full-text query q
+    (sort=newest skips ranking). Pass next_cursor back as cursor for the
+    following page.
+    """
+    if blog_index is None:
+        raise HTTPException(status_code=404, detail="Blog index is disabled")
+    try:
+        return blog_index.search(
+            q=q, topic=topic, doi=doi, min_words=min_words, max_words=max_words,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            limit=limit, cursor=cursor, sort=sort
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/blogs/similar")
+async def get_similar_blogs(topic: str, k: int = 3):
+    """Saved blogs whose topic is a near-duplicate of topic, most similar first"""
+    if topic_index is None or blog_index is None:
+        raise HTTPException(status_code=404, detail="Topic index is disabled")
+    return {"topic": topic, "items": (await similar_blogs([topic], max(1, min(k, 20))))[0]}
+
+@app.get("/blogs/{blog_id}")
+async def get_blog(blog_id: str):
+    """A saved blog: index entry, markdown content and its metadata sidecar"""
+    blog = blog_index.get(blog_id) if blog_index is not None else None
+    if blog is None:
+        raise HTTPException(status_code=404, detail="Blog not found")
+    content = await read_blog(blog)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Blog file not found")
+    metadata = await asyncio.to_thread(output_store.load_metadata, output_store.directory / blog["file"]) or {}
+    return {
+        **blog,
+        "content": content,
+        "references": metadata.get("references", []),
+        "usage": metadata.get("usage"),
+        "timings": metadata.get("timings")
+    }
+
 @app.get("/sessions")
 async def list_active_sessions():
     """List all active sessions (for debugging)"""
+    sessions = {
+        sid: {"status": session["status"], "stage": session.get("stage")} 
+        for sid, session in session_store.items()
+    }
     return {
-        "active_sessions": len(active_sessions),
-        "sessions": {
-            sid: {"status": session["status"], "stage": session.get("stage")} 
-            for sid, session in active_sessions.items()
-        }
+        "active_sessions": len(sessions),
+        "store": session_store.stats(),
+        "sessions": sessions
     }
 
 # ============================================================================
@@ -331,29 +1296,75 @@ async def http_exception_handler(request, exc):
             "message": exc.detail,
             "details": f"HTTP {exc.status_code} error",
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 # ============================================================================
 # STARTUP MESSAGE
 # ============================================================================
 
+async def prune_checkpoints() -> None:
+    """Background sweep: completed jobs delete their checkpoint, this removes expired ones"""
+    while True:
+        await asyncio.sleep(CHECKPOINT_PRUNE_INTERVAL)
+        removed = await asyncio.to_thread(checkpoint_store.prune)
+        if removed:
+            log.info("💾 Removed %d expired checkpoints", removed)
+
 @app.on_event("startup")
 async def startup_event():
+    job_queue.start()
+    pruned = await asyncio.to_thread(checkpoint_store.prune)
+    app.state.checkpoint_pruner = asyncio.create_task(prune_checkpoints())
+    indexed = await asyncio.to_thread(blog_index.sync_directory, output_store.directory) if blog_index else 0
+    if topic_index is not None and blog_index is not None:
+        await asyncio.to_thread(lambda: topic_index.add_many("blog", blog_index.topics()))
     print("\n" + "=" * 50)
     print("🚀 BLOG GENERATOR API GATEWAY")
     print("=" * 50)
     print(f"📡 Server starting on http://localhost:8000")
     print(f"📖 API docs available at http://localhost:8000/docs")
-    print(f"🔑 OpenAI API: {'✓ Configured' if os.getenv('OPENAI_API_KEY') else '❌ Not configured'}")
+    if LLM_BACKEND == "mock":
+        print("🧪 LLM backend: mock (offline, deterministic)")
+    else:
+        print(f"🔑 OpenAI API: {'✓ Configured' if backend_configured() else '❌ Not configured'}")
+    print(f"🧵 Job queue: {job_queue.workers} workers, {job_queue.max_size} slots")
+    print(f"💾 Checkpoints: {checkpoint_store.directory} ({pruned} expired removed)")
+    if blog_index is not None:
+        print(f"📚 Blog index: {blog_index.stats()['blogs']} blogs ({indexed} newly indexed)")
+    if topic_index is not None:
+        print(f"🧭 Topic index: {len(topic_index)} topics (similarity >= {TOPIC_SIMILARITY_THRESHOLD})")
+    if WEB_CONCURRENCY > 1 and (SESSION_STORE != "sqlite" or (await job_queue.stats_async())["backend"] != "sqlite"):
+        print("⚠️  WEB_CONCURRENCY > 1 needs SESSION_STORE=sqlite and JOB_QUEUE_BACKEND=sqlite "
+              "so every worker sees every session")
     print("=" * 50 + "\n")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in list(batch_tasks.values()):
+        task.cancel()
+    app.state.checkpoint_pruner.cancel()
+    await job_queue.stop()
+    mark_process_dead()
+    shutdown_tracing()
+
 if __name__ == "__main__":
+    import shutil
     import uvicorn
+    from metrics import PROMETHEUS_MULTIPROC_DIR
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Samples from a previous run would be merged into this one's
+        shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    # WEB_CONCURRENCY=1: single process with auto-reload for development.
+    # WEB_CONCURRENCY>1: production mode, N worker processes sharing the sqlite
+    # session store and job queue.
     uvicorn.run(
         "api_gateway:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=WEB_CONCURRENCY == 1,
+        workers=WEB_CONCURRENCY,
         log_level="info"
     )
\ No newline at end of file
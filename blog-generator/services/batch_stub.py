@@ -0,0 +1,191 @@
+"""
+Local OpenAI Batch API Stub
+Serves the file and batch endpoints used by bulk mode so it can run
+without an account or network access. Completions are filled from each
+request's JSON schema.
+
+    uvicorn batch_stub:app --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 BULK_POLL_INTERVAL=1 \
+        python blog_generator.py --bulk topics.txt
+"""
+
+import os
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Retrieves a batch answers with "in_progress" before it completes
+STUB_BATCH_POLLS = int(os.getenv("STUB_BATCH_POLLS", "2"))
+
+# Fail every Nth request of a batch (0 disables) to exercise error handling
+STUB_FAIL_EVERY = int(os.getenv("STUB_FAIL_EVERY", "0"))
+
+app = FastAPI(title="OpenAI Batch API Stub")
+
+files: Dict[str, Dict[str, Any]] = {}
+batches: Dict[str, Dict[str, Any]] = {}
+
+
+class BatchCreateRequest(BaseModel):
+    input_file_id: str
+    endpoint: str
+    completion_window: str
+    metadata: Optional[Dict[str, str]] = None
+
+# ============================================================================
+# FAKE COMPLETIONS
+# ============================================================================
+
+
+def sample_from_schema(schema: Dict[str, Any], name: str = "value", index: int = 0) -> Any:
+    """Deterministic value satisfying a strict-mode JSON schema"""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][index % len(schema["enum"])]
+    if kind == "object":
+        return {key: sample_from_schema(sub, key, index) for key, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        count = schema.get("minItems", 1)
+        return [sample_from_schema(schema.get("items", {}), name, i) for i in range(count)]
+    if kind == "integer":
+        return max(schema.get("minimum", 0), index)
+    if kind == "number":
+        return float(schema.get("minimum", 0))
+    if kind == "boolean":
+        return True
+    if name == "doi":
+        return f"10.5555/stub.{index}"
+    return f"Stub {name} {index}"
+
+
+def fake_completion(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Chat completion object whose content matches the requested schema"""
+    schema = body["response_format"]["json_schema"]["schema"]
+    content = json.dumps(sample_from_schema(schema))
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content, "refusal": None},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+    }
+
+
+def store_file(content: str, filename: str, purpose: str) -> Dict[str, Any]:
+    file_id = f"file-{uuid.uuid4().hex[:12]}"
+    files[file_id] = {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(content.encode("utf-8")),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+        "content": content,
+    }
+    return files[file_id]
+
+
+def run_batch(batch: Dict[str, Any]) -> None:
+    """Answer every request of the input file and attach output/error files"""
+    output, errors = [], []
+    lines = [line for line in files[batch["input_file_id"]]["content"].splitlines() if line.strip()]
+    for number, line in enumerate(lines, start=1):
+        request = json.loads(line)
+        if STUB_FAIL_EVERY and number % STUB_FAIL_EVERY == 0:
+            errors.append({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 500, "request_id": "", "body": {
+                    "error": {"message": "Stub failure", "type": "server_error"}}},
+                "error": None,
+            })
+            continue
+        output.append({
+            "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "request_id": "", "body": fake_completion(request["body"])},
+            "error": None,
+        })
+
+    if output:
+        batch["output_file_id"] = store_file(
+            "".join(json.dumps(o) + "\n" for o in output), "output.jsonl", "batch_output")["id"]
+    if errors:
+        batch["error_file_id"] = store_file(
+            "".join(json.dumps(e) + "\n" for e in errors), "errors.jsonl", "batch_output")["id"]
+    batch["request_counts"] = {"total": len(lines), "completed": len(output), "failed": len(errors)}
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+
+def public(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in record.items() if not k.startswith("_") and k != "content"}
+
+
+@app.post("/v1/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+    content = (await file.read()).decode("utf-8")
+    return public(store_file(content, file.filename or "input.jsonl", purpose))
+
+
+@app.get("/v1/files/{file_id}/content", response_class=PlainTextResponse)
+async def file_content(file_id: str):
+    if file_id not in files:
+        raise HTTPException(status_code=404, detail="No such file")
+    return files[file_id]["content"]
+
+
+@app.post("/v1/batches")
+async def create_batch(request: BatchCreateRequest):
+    if request.input_file_id not in files:
+        raise HTTPException(status_code=404, detail="No such file")
+    batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+    total = sum(1 for line in files[request.input_file_id]["content"].splitlines() if line.strip())
+    batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": request.endpoint,
+        "input_file_id": request.input_file_id,
+        "completion_window": request.completion_window,
+        "status": "validating",
+        "created_at": int(time.time()),
+        "output_file_id": None,
+        "error_file_id": None,
+        "request_counts": {"total": total, "completed": 0, "failed": 0},
+        "metadata": request.metadata,
+        "_polls": 0,
+    }
+    return public(batches[batch_id])
+
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str):
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="No such batch")
+    if batch["status"] != "completed":
+        batch["_polls"] += 1
+        if batch["_polls"] > STUB_BATCH_POLLS:
+            run_batch(batch)
+        else:
+            batch["status"] = "in_progress"
+    return public(batch)
@@ -0,0 +1,351 @@
+"""
+Pipeline Micro-Benchmarks with Regression Tracking
+Times the CPU-side hot paths (title dedupe, DOI checks, parsing large model
+responses whole and streamed, prompt building, reference verification,
+save_blog, /status and /result serialization) and the full pipeline against
+the mock LLM backend at several concurrency levels. Results are written as
+JSON and compared with a stored baseline; anything slower than the
+threshold is flagged and the run exits non-zero. Timings only compare on
+the same machine, so no baseline is committed: record one from the
+reference commit first. A run without a baseline exits non-zero as well,
+so a CI job that never saved one cannot pass unnoticed.
+
+    git checkout main && python benchmarks.py --save-baseline  # -> bench/baseline.json
+    git checkout -    && python benchmarks.py                  # compared with it
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Offline and side-effect free: mock LLM, throwaway usage ledger and indexes, no research
+# cache, rate limits far above what the mock can use. Set before the imports.
+os.environ.setdefault("LLM_BACKEND", "mock")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
+os.environ.setdefault("BLOG_INDEX_PATH", ":memory:")
+os.environ.setdefault("TOPIC_INDEX_PATH", ":memory:")
+os.environ.setdefault("REFERENCE_STORE_PATH", ":memory:")
+os.environ.setdefault("REFERENCE_CACHE_PATH", ":memory:")
+os.environ.setdefault("RESEARCH_CACHE_ENABLED", "false")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("OPENAI_RATE_LIMITS", "gpt-4o-2024-08-06=1000000:1000000000,gpt-4o-mini=1000000:1000000000")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import blog_generator
+from blog_generator import (
+    DEFAULT_OPTIONS,
+    _blog_request,
+    _parse_blog,
+    _parse_research,
+    _research_request,
+    build_blog_prompt,
+    dedupe_by_title,
+    generate_blog_async,
+    get_research_papers_async,
+    save_blog,
+    validate_doi_format,
+)
+from blog_index import BlogIndex
+from mock_llm import AsyncMockOpenAI, MockBackend, fake_content
+from reference_verifier import LocalMetadataStore, ReferenceVerifier
+from stream_json import StreamingJSONParser
+from topic_index import TopicIndex
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BENCH_DIR = Path(__file__).resolve().parent / "bench"
+RESULTS_PATH = BENCH_DIR / "results.json"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+# Slower than baseline by more than this fraction counts as a regression
+REGRESSION_THRESHOLD = 0.20
+REPEAT = 5
+CONCURRENCY_LEVELS = (1, 4, 16)
+PIPELINE_ROUNDS = 3
+MOCK_LATENCY = 0.05  # seconds per mock call; keeps the pipeline runs CPU-bound
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+
+def large_research(paper_count: int = 10) -> str:
+    return fake_content(_research_request("AI in healthcare", paper_count))
+
+
+def large_blog(word_count: int = 3000) -> str:
+    research = json.loads(large_research())
+    return fake_content(_blog_request(research, {"word_count": word_count}))
+
+
+def duplicated_papers(count: int = 50) -> List[Dict[str, Any]]:
+    """Papers where every fifth title repeats an earlier one modulo case/spacing"""
+    papers = json.loads(large_research(count))["papers"]
+    for i in range(4, count, 5):
+        papers[i]["title"] = "  " + papers[i - 4]["title"].upper() + " "
+    return papers
+
+
+def blog_result(word_count: int = 3000) -> Dict[str, Any]:
+    """session["result"] as stored by the gateway for a finished job"""
+    blog = json.loads(large_blog(word_count))
+    stage = {"model": "gpt-4o-mini", "prompt_tokens": 1500, "completion_tokens": 4200, "cached_tokens": 0,
+             "total_tokens": 5700, "latency_ms": 41000, "cost_usd": 0.002745, "calls": 1}
+    return {
+        "session_id": "session_1700000000000_abcdef12",
+        "title": blog["title"],
+        "content": blog["body_md"],
+        "word_count": blog["word_count"],
+        "estimated_read_time": max(1, blog["word_count"] // 200),
+        "citation_count": len(blog["references"]),
+        "created_at": datetime.now().isoformat(),
+        "usage": {"stages": {"research": stage, "generation": stage}, "total": stage},
+    }
+
+
+def serialize(payload: Any, model=None) -> bytes:
+    """What FastAPI does with an endpoint's return value: validate, encode, render"""
+    if model is not None:
+        payload = model.model_validate(payload)
+    return JSONResponse(jsonable_encoder(payload)).body
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+
+def measure(func: Callable[[], Any], repeat: int = REPEAT) -> Dict[str, Any]:
+    """Best and median per-call time over `repeat` auto-sized timeit runs"""
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    runs = [total / loops for total in timer.repeat(repeat=repeat, number=loops)]
+    return {
+        "seconds": min(runs),
+        "median_seconds": statistics.median(runs),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+@contextmanager
+def fresh_indexes():
+    """Point save_blog at empty in-memory blog/topic indexes, so no run times one grown by earlier runs"""
+    saved = blog_generator.blog_index, blog_generator.topic_index
+    blog_generator.blog_index, blog_generator.topic_index = BlogIndex(":memory:"), TopicIndex(":memory:")
+    try:
+        yield
+    finally:
+        blog_generator.blog_index, blog_generator.topic_index = saved
+
+
+def micro_benchmarks(workdir: Path) -> Dict[str, Callable[[], Any]]:
+    from api_gateway import BlogGenerationResponse
+
+    research_content = large_research()
+    blog_content = large_blog()
+    papers = duplicated_papers()
+    dois = [paper["doi"] for paper in papers] + ["not-a-doi", " 10.1/x ", "10.12345/ok"]
+    research = json.loads(research_content)
+    blog = json.loads(blog_content)
+    result = blog_result()
+    running = {"status": "running", "stage": "generation", "progress": 60,
+               "message": "→ Writing content...", "found_papers": 10, "usage": result["usage"]}
+    output = workdir / "save"
+    output.mkdir()
+    # Half of the cited DOIs are known to the metadata store; the cache starts cold
+    batch_refs = [json.loads(large_blog(500 + i))["references"] for i in range(50)]
+    store = LocalMetadataStore(":memory:")
+    store.add_many(ref for refs in batch_refs for ref in refs[::2])
+    cold = ReferenceVerifier(store)
+
+    def stream_parse(content: str, request: Dict[str, Any], chunk: int = 12) -> Any:
+        """What _stream_completion does per response: feed ~3-token chunks, then close"""
+        parser = StreamingJSONParser(request["response_format"]["json_schema"]["schema"], text_paths=[("body_md",)])
+        for i in range(0, len(content), chunk):
+            parser.feed(content[i:i + chunk])
+        return parser.close()
+
+    def run_save() -> None:
+        cwd = os.getcwd()
+        os.chdir(output)
+        try:
+            with fresh_indexes():
+                save_blog(blog, "AI in healthcare")
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "dedupe_by_title[50]": lambda: dedupe_by_title(papers),
+        "validate_doi_format[53]": lambda: [validate_doi_format(doi) for doi in dois],
+        "parse_research[10 papers]": lambda: _parse_research(research_content),
+        "parse_blog[3000 words]": lambda: _parse_blog(blog_content),
+        "stream_parse_research[10 papers]": lambda: stream_parse(research_content, _research_request("AI in healthcare", 10)),
+        "stream_parse_blog[3000 words]": lambda: stream_parse(blog_content, _blog_request(research)),
+        "build_blog_prompt": lambda: build_blog_prompt(DEFAULT_OPTIONS),
+        "blog_request[10 papers]": lambda: _blog_request(research),
+        "save_blog[3000 words]": run_save,
+        "verify_references[1 blog]": lambda: asyncio.run(cold.verify_many(batch_refs[:1])),
+        "verify_references[50 blogs]": lambda: asyncio.run(cold.verify_many(batch_refs)),
+        "serialize_status[running]": lambda: serialize(running),
+        "serialize_status[completed]": lambda: serialize({"status": "completed", "result": result}),
+        "serialize_result": lambda: serialize(result, BlogGenerationResponse),
+    }
+
+
+async def run_pipeline(concurrency: int, round_number: int, workdir: Path) -> float:
+    """Wall time for `concurrency` simultaneous research -> generation -> save jobs"""
+    async def job(index: int) -> None:
+        topic = f"benchmark topic {concurrency}-{round_number}-{index}"
+        research = await get_research_papers_async(topic)
+        blog = await generate_blog_async(research)
+        save_blog(blog, topic)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with fresh_indexes():
+            started = time.perf_counter()
+            await asyncio.gather(*(job(i) for i in range(concurrency)))
+            return time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+
+
+def pipeline_benchmarks(levels: List[int], workdir: Path) -> Dict[str, Dict[str, Any]]:
+    blog_generator.async_client = AsyncMockOpenAI(
+        MockBackend(latency=MOCK_LATENCY, tokens_per_second=0, error_rate=0, rate_limit_rate=0)
+    )
+    results = {}
+    for level in levels:
+        walls = [asyncio.run(run_pipeline(level, r, workdir)) for r in range(PIPELINE_ROUNDS)]
+        best = min(walls)
+        results[f"pipeline[concurrency={level}]"] = {
+            "seconds": best,
+            "median_seconds": statistics.median(walls),
+            "jobs_per_s": round(level / best, 2),
+            "mock_latency": MOCK_LATENCY,
+            "repeat": PIPELINE_ROUNDS,
+        }
+    return results
+
+# ============================================================================
+# REGRESSION TRACKING
+# ============================================================================
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-benchmark ratio to the baseline; ratio > 1 + threshold is a regression"""
+    rows = []
+    for name, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None or not previous["seconds"]:
+            rows.append({"name": name, "seconds": current["seconds"], "baseline": None, "ratio": None,
+                         "regression": False})
+            continue
+        ratio = current["seconds"] / previous["seconds"]
+        rows.append({"name": name, "seconds": current["seconds"], "baseline": previous["seconds"],
+                     "ratio": round(ratio, 3), "regression": ratio > 1 + threshold})
+    return rows
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+def print_report(rows: List[Dict[str, Any]], threshold: float) -> None:
+    print("\n" + "=" * 72)
+    print(f"⏱️  BENCHMARKS (regression = slower than baseline by >{threshold:.0%})")
+    print("=" * 72)
+    print(f"{'benchmark':<32}{'current':>12}{'baseline':>12}{'ratio':>8}")
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}" if row["ratio"] is not None else "new"
+        flag = "  ❌ REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<32}{format_seconds(row['seconds']):>12}"
+              f"{format_seconds(row['baseline']):>12}{ratio:>8}{flag}")
+    print("=" * 72 + "\n")
+
+# ============================================================================
+# MAIN EXECUTION
+# ============================================================================
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="blog-bench-") as tmp:
+        workdir = Path(tmp)
+        for name, func in micro_benchmarks(workdir).items():
+            if args.only and args.only not in name:
+                continue
+            print(f"▶ {name}")
+            results["benchmarks"][name] = measure(func)
+        if not args.only or "pipeline" in args.only:
+            levels = [int(level) for level in args.concurrency.split(",")]
+            print(f"▶ pipeline at concurrency {levels}")
+            results["benchmarks"].update(pipeline_benchmarks(levels, workdir))
+    return results
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline hot paths and compare with a baseline")
+    parser.add_argument("--output", default=str(RESULTS_PATH), help="where to write this run's results")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--concurrency", default=",".join(map(str, CONCURRENCY_LEVELS)), help="pipeline levels")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    results = run(args)
+
+    output = Path(args.baseline if args.save_baseline else args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if not args.save_baseline and baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    rows = compare(results, baseline or {"benchmarks": {}}, args.threshold)
+    print_report(rows, args.threshold)
+    print(f"💾 Saved to: {output}")
+
+    if baseline is None and not args.save_baseline:
+        print(f"❌ No baseline at {baseline_path}: nothing was checked for regressions. "
+              "Run with --save-baseline on the reference commit first.")
+        sys.exit(2)
+    new = [row["name"] for row in rows if row["ratio"] is None]
+    if baseline is not None and new:
+        print(f"⚠️  Not in the baseline, unchecked: {', '.join(new)}")
+    regressions = [row["name"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
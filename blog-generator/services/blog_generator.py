@@ -6,118 +6,237 @@ Put your OpenAI API key in .env file: OPENAI_API_KEY=sk-proj-...
 import os
 import re
 import json
+import sys
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional, Tuple
 from dotenv import load_dotenv
-from openai import OpenAI
+import openai
+from openai import OpenAI, AsyncOpenAI
+
+from rate_limiter import CHARS_PER_TOKEN, rate_limiter, estimate_prompt_tokens, estimate_tokens
+from retries import retry_async, retry_sync
+from usage import usage_ledger, usage_record
+from output_store import output_store
+from blog_index import blog_index
+from topic_index import TOPIC_REUSE_RESEARCH, TOPIC_REUSE_THRESHOLD, TOPIC_SIMILARITY_THRESHOLD, topic_index
+from reference_verifier import reference_verifier
+from opentelemetry.trace import SpanKind
+
+from stream_json import StreamingJSONError, StreamingJSONParser
+from telemetry import get_logger, span, traced
 
 # Load environment variables
 load_dotenv()
 
+log = get_logger("generator")
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise ValueError("Please set OPENAI_API_KEY in .env file")
 
-client = OpenAI(api_key=API_KEY)
+# LLM backend: "openai", or "mock" for the deterministic offline stand-in in
+# mock_llm.py (benchmarks and load tests; no key or network needed)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+
+
+def create_clients(backend: str = LLM_BACKEND):
+    """
+    (client, async_client) for a backend. Any pair exposing the SDK's
+    chat.completions.with_raw_response.create(...) plugs into the pipeline.
+    """
+    if backend == "mock":
+        from mock_llm import AsyncMockOpenAI, MockBackend, MockOpenAI
+        shared = MockBackend()
+        return MockOpenAI(shared), AsyncMockOpenAI(shared)
+    if backend != "openai":
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r} (expected openai or mock)")
+    if not API_KEY:
+        raise ValueError("Please set OPENAI_API_KEY in .env file")
+    # SDK retries are disabled; retries.py owns backoff, Retry-After and deadlines
+    return OpenAI(api_key=API_KEY, max_retries=0), AsyncOpenAI(api_key=API_KEY, max_retries=0)
+
+
+def backend_configured() -> bool:
+    """True when generation can run: the mock backend, or OpenAI with a key"""
+    return LLM_BACKEND == "mock" or bool(API_KEY)
+
+
+# Shared async client for the API gateway - one connection pool per process
+client, async_client = create_clients()
+
+RESEARCH_MODEL = "gpt-4o-2024-08-06"
+BLOG_MODEL = "gpt-4o-mini"
+
+# Research cache - repeat topics skip the gpt-4o research call entirely
+RESEARCH_CACHE_ENABLED = os.getenv("RESEARCH_CACHE_ENABLED", "true").lower() == "true"
+RESEARCH_CACHE_PATH = os.getenv("RESEARCH_CACHE_PATH", "cache/research_cache.sqlite3")
+RESEARCH_CACHE_TTL = int(os.getenv("RESEARCH_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "5000"))
+# Cache hits only record their access time in memory; it is written out in
+# one transaction per this many hits (or seconds), and before every put
+RESEARCH_CACHE_TOUCH_BATCH = 64
+RESEARCH_CACHE_TOUCH_SECONDS = 60.0
+
+# Research context for the blog prompt: abstracts are cut to this many tokens
+CONTEXT_ABSTRACT_TOKENS = int(os.getenv("CONTEXT_ABSTRACT_TOKENS", "100"))
+CONTEXT_MAX_AUTHORS = 3
+
+# Bulk mode (OpenAI Batch API) - input/output JSONL files and polling cadence.
+# Point OPENAI_BASE_URL at batch_stub.py to run it locally.
+BULK_DIR = os.getenv("BULK_DIR", "bulk")
+BULK_POLL_INTERVAL = float(os.getenv("BULK_POLL_INTERVAL", "30"))  # seconds
+BULK_COMPLETION_WINDOW = "24h"
 
 # ============================================================================
-# SCHEMAS - Your existing schemas here
+# GENERATION OPTIONS
 # ============================================================================
 
-RESEARCH_SCHEMA = {
-    "name": "research_papers",
-    "strict": True,
-    "schema": {
-        "type": "object",
-        "properties": {
-            "topic": {"type": "string"},
-            "papers": {
-                "type": "array",
-                "minItems": 5,
-                "maxItems": 5,
-                "items": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "required": [
-                        "title",
-                        "authors",
-                        "abstract",
-                        "evidence_type",
-                        "journal",
-                        "doi",
-                        "citations",
-                    ],
-                    "properties": {
-                        "title": {"type": "string"},
-                        "authors": {"type": "array", "items": {"type": "string"}},
-                        "abstract": {"type": "string"},
-                        "doi": {"type": "string"},
-                        "citations": {"type": "integer", "minimum": 0},
-                        "journal": {"type": "string"},
-                        "evidence_type": {
-                            "type": "string",
-                            "enum": [
-                                "meta-analysis",
-                                "systematic review",
-                                "RCT",
-                                "quasi-experimental",
-                                "observational",
-                                "case report",
-                                "other",
-                            ],
+# Defaults reproduce the original fixed pipeline: 5 papers, ~1000 words, every section
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "paper_count": 5,
+    "word_count": 1000,
+    "tone": "conversational",
+    "include_faq": True,
+    "include_statistics": True,
+    "include_examples": True,
+}
+
+# Output token budgets (max_completion_tokens) derived from the options
+RESEARCH_TOKENS_PER_PAPER = 400
+BLOG_TOKENS_PER_WORD = 2.0  # ~1.4 tokens/word plus JSON escaping and length overshoot
+BLOG_TOKENS_PER_REFERENCE = 80
+BLOG_TOKENS_OVERHEAD = 100
+
+
+def resolve_options(options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fill in defaults; unknown keys (e.g. topic) are ignored"""
+    options = options or {}
+    return {key: options.get(key, default) for key, default in DEFAULT_OPTIONS.items()}
+
+
+def research_max_tokens(paper_count: int) -> int:
+    return RESEARCH_TOKENS_PER_PAPER * paper_count
+
+
+def blog_max_tokens(word_count: int, reference_count: int) -> int:
+    return int(word_count * BLOG_TOKENS_PER_WORD) + BLOG_TOKENS_PER_REFERENCE * reference_count + BLOG_TOKENS_OVERHEAD
+
+# ============================================================================
+# SCHEMAS
+# ============================================================================
+
+
+def build_research_schema(paper_count: int) -> Dict[str, Any]:
+    """Structured-output schema for exactly paper_count papers"""
+    return {
+        "name": "research_papers",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "topic": {"type": "string"},
+                "papers": {
+                    "type": "array",
+                    "minItems": paper_count,
+                    "maxItems": paper_count,
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "required": [
+                            "title",
+                            "authors",
+                            "abstract",
+                            "evidence_type",
+                            "journal",
+                            "doi",
+                            "citations",
+                        ],
+                        "properties": {
+                            "title": {"type": "string"},
+                            "authors": {"type": "array", "items": {"type": "string"}},
+                            "abstract": {"type": "string"},
+                            "doi": {"type": "string"},
+                            "citations": {"type": "integer", "minimum": 0},
+                            "journal": {"type": "string"},
+                            "evidence_type": {
+                                "type": "string",
+                                "enum": [
+                                    "meta-analysis",
+                                    "systematic review",
+                                    "RCT",
+                                    "quasi-experimental",
+                                    "observational",
+                                    "case report",
+                                    "other",
+                                ],
+                            },
                         },
                     },
                 },
             },
+            "required": ["topic", "papers"],
+            "additionalProperties": False,
         },
-        "required": ["topic", "papers"],
-        "additionalProperties": False,
-    },
-}
+    }
 
-BLOG_SCHEMA = {
-    "name": "blog_post_v1",
-    "strict": True,
-    "schema": {
-        "type": "object",
-        "properties": {
-            "title": {"type": "string"},
-            "word_count": {"type": "integer"},
-            "body_md": {"type": "string"},
-            "references": {
-                "type": "array",
-                "minItems": 5,
-                "maxItems": 5,
-                "items": {
-                    "type": "object",
-                    "additionalProperties": False,
-                    "properties": {
-                        "index": {"type": "integer", "minimum": 1, "maximum": 5},
-                        "title": {"type": "string"},
-                        "authors": {"type": "array", "items": {"type": "string"}},
-                        "journal": {"type": "string"},
-                        "year": {"type": "integer"},
-                        "doi": {"type": "string"},
+
+def build_blog_schema(reference_count: int) -> Dict[str, Any]:
+    """Structured-output schema with one reference per research paper"""
+    return {
+        "name": "blog_post_v1",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string"},
+                "word_count": {"type": "integer"},
+                "body_md": {"type": "string"},
+                "references": {
+                    "type": "array",
+                    "minItems": reference_count,
+                    "maxItems": reference_count,
+                    "items": {
+                        "type": "object",
+                        "additionalProperties": False,
+                        "properties": {
+                            "index": {"type": "integer", "minimum": 1, "maximum": reference_count},
+                            "title": {"type": "string"},
+                            "authors": {"type": "array", "items": {"type": "string"}},
+                            "journal": {"type": "string"},
+                            "year": {"type": "integer"},
+                            "doi": {"type": "string"},
+                        },
+                        "required": ["index", "title", "authors", "journal", "year", "doi"],
                     },
-                    "required": ["index", "title", "authors", "journal", "year", "doi"],
                 },
             },
+            "required": ["title", "word_count", "body_md", "references"],
+            "additionalProperties": False,
         },
-        "required": ["title", "word_count", "body_md", "references"],
-        "additionalProperties": False,
-    },
-}
+    }
+
+
+RESEARCH_SCHEMA = build_research_schema(DEFAULT_OPTIONS["paper_count"])
+BLOG_SCHEMA = build_blog_schema(DEFAULT_OPTIONS["paper_count"])
 
 # ============================================================================
-# PROMPTS - Your existing prompts here
+# PROMPTS
 # ============================================================================
 
-RESEARCH_PROMPT = """Role: meticulous research assistant.
-Goal: Return EXACTLY five *real* papers for the given topic, conforming to the provided JSON Schema.
+_NUMBER_WORDS = {3: "three", 4: "four", 5: "five", 6: "six", 7: "seven", 8: "eight", 9: "nine", 10: "ten"}
+
+
+def build_research_prompt(paper_count: int) -> str:
+    count = _NUMBER_WORDS.get(paper_count, str(paper_count))
+    return f"""Role: meticulous research assistant.
+Goal: Return EXACTLY {count} *real* papers for the given topic, conforming to the provided JSON Schema.
 
 Selection rubric (optimize for blog storytelling and evidence quality):
   1) Evidence hierarchy: meta-analyses > RCTs > others.
@@ -127,32 +246,75 @@ Selection rubric (optimize for blog storytelling and evidence quality):
   5) Fill ALL fields; be conservative with evidence_type when uncertain.
 Return ONLY the structured result."""
 
-BLOG_PROMPT = """You are a knowledgeable, friendly blog writer for a general online audience.
 
-Output ONLY valid JSON matching the schema. No extra text.
+TONE_PERSONAS = {
+    "conversational": "a knowledgeable, friendly blog writer for a general online audience",
+    "professional": "a knowledgeable blog writer for professionals and decision-makers",
+    "academic": "a rigorous science writer for an academically literate audience",
+}
 
-STYLE & TONE:
-- Conversational, second-person ("you"), approachable and clear.
+TONE_STYLES = {
+    "conversational": """- Conversational, second-person ("you"), approachable and clear.
 - Short paragraphs (2–3 sentences), subheadings every ~120–150 words.
 - Avoid jargon; define any necessary terms briefly and simply.
-- Target reading level: roughly 8th–10th grade.
+- Target reading level: roughly 8th–10th grade.""",
+    "professional": """- Professional, confident and precise; address practitioners and decision-makers.
+- Paragraphs of 3–4 sentences, subheadings every ~150–200 words.
+- Industry terms are fine; define uncommon ones in a clause.
+- Target reading level: college.""",
+    "academic": """- Formal and evidence-focused; hedge claims to match the strength of the evidence.
+- Structured argument with a subheading per key finding.
+- Use precise technical terms with brief definitions.
+- Target reading level: graduate.""",
+}
+
+
+def build_blog_prompt(options: Optional[Dict[str, Any]] = None, reference_count: Optional[int] = None) -> str:
+    """System prompt with only the sections the options ask for"""
+    opts = resolve_options(options)
+    references = reference_count or opts["paper_count"]
+
+    sections = [
+        "Start with a compelling HOOK—an intriguing scenario, question, or statistic in the first 40–60 words.",
+        "Insert a **Key Takeaways** section (3–5 bullet points).",
+    ]
+    if opts["include_examples"]:
+        sections.append(
+            f'Add a "Real-World Spotlights" section: {min(3, references)} brief, '
+            "story-like vignettes tied to your research papers."
+        )
+    if opts["include_statistics"]:
+        sections.append("Include a **By the Numbers** callout: memorable statistics from the research.")
+    if opts["include_faq"]:
+        sections.append("Add a **Frequently Asked Questions** (FAQ) section: 3 Q&A entries.")
+    sections += [
+        'Provide a "**What This Means for You**" section: 3 practical suggestions.',
+        "End with a **## References** list: numbered 1..n referencing the 'references' array.",
+        "Conclude with a one-sentence Call-to-Action.",
+    ]
+    structure = "\n".join(f"{i}. {section}" for i, section in enumerate(sections, start=1))
+
+    low, high = int(opts["word_count"] * 0.9), int(opts["word_count"] * 1.1)
+    return f"""You are {TONE_PERSONAS[opts["tone"]]}.
+
+Output ONLY valid JSON matching the schema. No extra text.
+
+STYLE & TONE:
+{TONE_STYLES[opts["tone"]]}
 
 STRUCTURE inside body_md (Markdown):
-1. Start with a compelling HOOK—an intriguing scenario, question, or statistic in the first 40–60 words.
-2. Insert a **Key Takeaways** section (3–5 bullet points).
-3. Add a "Real-World Spotlights" section: 3 brief, story-like vignettes tied to your research papers.
-4. Include a **By the Numbers** callout: memorable statistics from the research.
-5. Add a **Frequently Asked Questions** (FAQ) section: 3 Q&A entries.
-6. Provide a "**What This Means for You**" section: 3 practical suggestions.
-7. End with a **## References** list: numbered 1..n referencing the 'references' array.
-8. Conclude with a one-sentence Call-to-Action.
+{structure}
 
 CITATIONS:
 - Use inline numeric citations [1]..[n] that map to items in "references".
 - Do not invent sources; leave claims un-cited if no reference exists.
 
 LENGTH:
-- Target 900–1100 words total in the body_md."""
+- Target {low}–{high} words total in the body_md."""
+
+
+RESEARCH_PROMPT = build_research_prompt(DEFAULT_OPTIONS["paper_count"])
+BLOG_PROMPT = build_blog_prompt()
 
 # ============================================================================
 # HELPER FUNCTIONS - Your validation functions
@@ -164,11 +326,16 @@ def validate_doi_format(doi: str) -> bool:
     return bool(re.match(r"^10\.\d{4,9}/\S+$", doi.strip()))
 
 
+def normalize_text(text: str) -> str:
+    """Lowercase, trim and collapse whitespace."""
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
 def dedupe_by_title(items: List[Dict]) -> List[Dict]:
     """Return unique items by normalized title."""
     seen, out = set(), []
     for it in items:
-        key = re.sub(r"\s+", " ", it["title"].strip().lower())
+        key = normalize_text(it["title"])
         if key not in seen:
             seen.add(key)
             out.append(it)
@@ -176,114 +343,886 @@ def dedupe_by_title(items: List[Dict]) -> List[Dict]:
 
 
 # ============================================================================
-# MAIN FUNCTIONS - Core OpenAI API calls
+# RESEARCH CACHE - SQLite-backed, TTL + LRU eviction
 # ============================================================================
 
 
-def get_research_papers(topic: str) -> Dict[str, Any]:
+def research_cache_key(topic: str, request: Dict[str, Any]) -> str:
     """
-    Step 1: Get research papers using OpenAI
+    Content address for a research request: normalized topic, model,
+    prompt/schema hash and paper count
     """
-    print(f"📚 Researching: {topic}")
+    json_schema = request["response_format"]["json_schema"]
+    prompt_hash = hashlib.sha256(
+        (request["messages"][0]["content"] + json.dumps(json_schema, sort_keys=True)).encode("utf-8")
+    ).hexdigest()
+    paper_count = json_schema["schema"]["properties"]["papers"]["maxItems"]
+    raw = json.dumps([normalize_text(topic), request["model"], prompt_hash, paper_count])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": RESEARCH_PROMPT},
-                {"role": "user", "content": topic},
-            ],
-            response_format={"type": "json_schema", "json_schema": RESEARCH_SCHEMA},
-            max_completion_tokens=2000,
-            temperature=0.7,
+
+class ResearchCache:
+    """
+    Persistent research cache with TTL expiry, LRU size eviction and hit/miss
+    counters. Lookups are read-only: expired rows are removed by put, and
+    access times for the LRU are written in batches.
+    """
+
+    def __init__(self, path: str, ttl: int = RESEARCH_CACHE_TTL, max_entries: int = RESEARCH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}  # key -> last hit not yet written
+        self._last_flush = time.monotonic()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # Shared by every worker process: WAL so readers never wait on a writer
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS research_cache (
+                key TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
         )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_research_cache_access ON research_cache(last_access)"
+        )
+        self._conn.commit()
 
-        content = response.choices[0].message.content
-        print(f"  🔍 Raw response length: {len(content)} characters")
-        
-        try:
-            research_data = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"  ❌ JSON Parse Error: {e}")
-            print(f"  📄 Raw content (first 500 chars): {content[:500]}")
-            raise Exception(f"Invalid JSON response from OpenAI: {e}")
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached research for key, or None on a miss/expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = now
+            if (len(self._touched) >= RESEARCH_CACHE_TOUCH_BATCH
+                    or time.monotonic() - self._last_flush >= RESEARCH_CACHE_TOUCH_SECONDS):
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def _flush_touched(self) -> None:
+        """Write batched access times (lock held; the caller commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE research_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def contains(self, key: str) -> bool:
+        """Whether key holds unexpired research, without counting a hit or touching it"""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM research_cache WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key: str, topic: str, research_data: Dict[str, Any]) -> None:
+        """Store research for key, evicting expired and least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._flush_touched()  # eviction below needs current access times
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research_cache (key, topic, payload, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, topic, json.dumps(research_data), now, now),
+            )
+            self._conn.execute("DELETE FROM research_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM research_cache WHERE key IN ("
+                "SELECT key FROM research_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._conn.execute("DELETE FROM research_cache")
+            self._conn.commit()
+            self._touched.clear()
+            self.hits = self.misses = 0
 
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM research_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+research_cache: Optional[ResearchCache] = (
+    ResearchCache(RESEARCH_CACHE_PATH) if RESEARCH_CACHE_ENABLED else None
+)
+
+
+def research_cache_stats() -> Dict[str, Any]:
+    """Research cache statistics, or a disabled marker"""
+    if research_cache is None:
+        return {"enabled": False}
+    return research_cache.stats()
+
+
+# ============================================================================
+# RESEARCH CONTEXT - compact research payload for the blog prompt
+# ============================================================================
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep whole sentences within roughly max_tokens; cut at a word if the first one is longer"""
+    text = re.sub(r"\s+", " ", text).strip()
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    kept = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if len(kept) + len(sentence) + 1 > budget:
+            break
+        kept = f"{kept} {sentence}".strip()
+    if not kept:
+        kept = text[:budget].rsplit(" ", 1)[0] + "…"
+    return kept
+
+
+def compact_research(research_data: Dict[str, Any], abstract_tokens: int = CONTEXT_ABSTRACT_TOKENS) -> str:
+    """
+    Writer-facing view of the research: one numbered block per paper with
+    only the fields the blog and its references use, abstracts truncated
+    """
+    blocks = []
+    for index, paper in enumerate(research_data["papers"], start=1):
+        authors = ", ".join(paper["authors"][:CONTEXT_MAX_AUTHORS])
+        if len(paper["authors"]) > CONTEXT_MAX_AUTHORS:
+            authors += " et al."
+        header = " | ".join([
+            f"[{index}] {paper['title']}",
+            authors,
+            paper["journal"],
+            paper["evidence_type"],
+            f"doi:{paper['doi']}",
+            f"cited {paper['citations']}",
+        ])
+        blocks.append(f"{header}\n{truncate_to_tokens(paper['abstract'], abstract_tokens)}")
+    return "\n\n".join(blocks)
+
+
+def context_report(research_data: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Blog prompt size with the full research JSON vs the compact context"""
+    compact = estimate_prompt_tokens(_blog_request(research_data, options))
+    full = estimate_prompt_tokens(_blog_request(research_data, options, compact=False))
+    return {
+        "papers": len(research_data["papers"]),
+        "abstract_tokens": CONTEXT_ABSTRACT_TOKENS,
+        "full_prompt_tokens": full,
+        "compact_prompt_tokens": compact,
+        "saved_tokens": full - compact,
+        "saved_pct": round(100.0 * (full - compact) / full, 1) if full else 0.0,
+    }
+
+
+def _log_context_report(research_data: Dict[str, Any], options: Optional[Dict[str, Any]]) -> None:
+    report = context_report(research_data, options)
+    log.info(
+        "🗜️ Research context: %d → %d prompt tokens (-%s%%)",
+        report["full_prompt_tokens"], report["compact_prompt_tokens"], report["saved_pct"],
+    )
+
+
+# ============================================================================
+# MAIN FUNCTIONS - Core OpenAI API calls
+# ============================================================================
+
+
+def _research_request(topic: str, paper_count: int = DEFAULT_OPTIONS["paper_count"]) -> Dict[str, Any]:
+    """Build the chat completion arguments for the research step"""
+    return dict(
+        model=RESEARCH_MODEL,
+        messages=[
+            {"role": "system", "content": build_research_prompt(paper_count)},
+            {"role": "user", "content": topic},
+        ],
+        response_format={"type": "json_schema", "json_schema": build_research_schema(paper_count)},
+        max_completion_tokens=research_max_tokens(paper_count),
+        temperature=0.7,
+    )
+
+
+def _parse_research(content: str, research_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Parse (unless already parsed while streaming), dedupe and DOI-check the research step response"""
+    log.debug("🔍 Raw response length: %d characters", len(content))
+
+    if research_data is None:
+        with span("parse.research", chars=len(content)):
+            try:
+                research_data = json.loads(content)
+            except json.JSONDecodeError as e:
+                log.error("❌ JSON Parse Error: %s", e)
+                log.debug("📄 Raw content (first 500 chars): %s", content[:500])
+                raise Exception(f"Invalid JSON response from OpenAI: {e}")
+
+    with span("research.validate", papers=len(research_data["papers"])) as current:
         # Validate and deduplicate
         research_data["papers"] = dedupe_by_title(research_data["papers"])
 
         # Validate DOIs
+        invalid = 0
         for paper in research_data["papers"]:
             paper["doi_valid"] = validate_doi_format(paper["doi"])
             if not paper["doi_valid"]:
-                print(f"  ⚠️ Invalid DOI: {paper['doi']}")
+                invalid += 1
+                log.warning("⚠️ Invalid DOI: %s", paper["doi"])
+        current.set_attribute("unique_papers", len(research_data["papers"]))
+        current.set_attribute("invalid_dois", invalid)
+
+    log.info("✓ Found %d papers", len(research_data["papers"]))
+    return research_data
+
+
+def _blog_request(
+    research_data: Dict[str, Any], options: Optional[Dict[str, Any]] = None, compact: bool = True
+) -> Dict[str, Any]:
+    """Build the chat completion arguments for the blog step (compact=False: raw research JSON)"""
+    opts = resolve_options(options)
+    # Deduplication can leave fewer papers than requested; cite only what exists
+    reference_count = len(research_data["papers"])
+    if compact:
+        research_context = f"Research papers (cite as [n]):\n{compact_research(research_data)}"
+    else:
+        research_context = f"Research JSON:\n{json.dumps(research_data)}"
+    return dict(
+        model=BLOG_MODEL,
+        messages=[
+            {"role": "system", "content": build_blog_prompt(opts, reference_count)},
+            {"role": "user", "content": f"Topic: {research_data['topic']}\n{research_context}"},
+        ],
+        response_format={"type": "json_schema", "json_schema": build_blog_schema(reference_count)},
+        max_completion_tokens=blog_max_tokens(opts["word_count"], reference_count),
+        temperature=0.7,
+    )
+
+
+def _parse_blog(content: str, blog_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Parse the blog step response (unless already parsed while streaming)"""
+    log.debug("🔍 Blog response length: %d characters", len(content))
+
+    if blog_data is None:
+        with span("parse.blog", chars=len(content)):
+            try:
+                blog_data = json.loads(content)
+            except json.JSONDecodeError as e:
+                log.error("❌ Blog JSON Parse Error: %s", e)
+                log.debug("📄 Raw content (first 500 chars): %s", content[:500])
+                raise Exception(f"Invalid JSON response from OpenAI during blog generation: {e}")
+    log.info("✓ Generated %d words", blog_data["word_count"])
+    return blog_data
+
+
+def _chat_span(request: Dict[str, Any], stage: str, stream: bool):
+    """Span for one OpenAI call, named and tagged per the GenAI semantic conventions"""
+    return span(
+        f"chat {request['model']}",
+        kind=SpanKind.CLIENT,
+        stage=stage,
+        **{
+            "gen_ai.system": "openai",
+            "gen_ai.operation.name": "chat",
+            "gen_ai.request.model": request["model"],
+            "gen_ai.request.max_tokens": request["max_completion_tokens"],
+            "gen_ai.request.stream": stream,
+        },
+    )
+
+
+def _record_usage_attributes(current, record: Dict[str, Any]) -> None:
+    current.set_attribute("gen_ai.usage.input_tokens", record["prompt_tokens"])
+    current.set_attribute("gen_ai.usage.output_tokens", record["completion_tokens"])
+    current.set_attribute("gen_ai.usage.cached_tokens", record["cached_tokens"])
+    current.set_attribute("cost_usd", record["cost_usd"])
+
+
+def _complete(request: Dict[str, Any], stage: str) -> str:
+    """Rate-limited blocking chat completion; returns the message content"""
+    model = request["model"]
+    estimated = estimate_tokens(request)
+    with span("rate_limiter.acquire", model=model, tokens=estimated):
+        rate_limiter.acquire_sync(model, estimated)
+
+    with _chat_span(request, stage, stream=False) as current:
+        started = time.monotonic()
+        try:
+            raw = client.chat.completions.with_raw_response.create(**request)
+        except openai.APIStatusError as e:
+            rate_limiter.update_from_headers(model, e.response.headers)
+            raise
+        rate_limiter.update_from_headers(model, raw.headers)
+        response = raw.parse()
+        if response.usage is not None:
+            rate_limiter.reconcile(model, estimated, response.usage.total_tokens)
+            record = usage_record(model, response.usage, time.monotonic() - started)
+            usage_ledger.record(stage, record)
+            _record_usage_attributes(current, record)
+        return response.choices[0].message.content
+
+
+def research_scope(request: Dict[str, Any]) -> str:
+    """Cache key without the topic: research is only shared between topics within one scope"""
+    return research_cache_key("", request)
+
+
+def _index_research(topic: str, cache_key: str, request: Dict[str, Any]) -> None:
+    if topic_index is not None:
+        topic_index.add("research", cache_key, topic, research_scope(request))
 
-        print(f"  ✓ Found {len(research_data['papers'])} papers")
+
+def _cached_research(topic: str, cache_key: str, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Research cache lookup (None when disabled or missed)"""
+    if research_cache is None:
+        return None
+    with span("research_cache.get") as current:
+        cached = research_cache.get(cache_key)
+        current.set_attribute("hit", cached is not None)
+    if cached is not None:
+        log.info("⚡ Research cache hit (%d papers)", len(cached["papers"]))
+        _index_research(topic, cache_key, request)  # entries cached before the topic index existed
+    return cached
+
+
+def similar_research(
+    topics: List[str], paper_count: int = DEFAULT_OPTIONS["paper_count"], threshold: float = TOPIC_SIMILARITY_THRESHOLD
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Closest cached research of a near-duplicate topic (see topic_index.py)
+    per topic, or None: {"ref", "topic", "score"}. Matches whose research
+    has expired are dropped from the index.
+    """
+    if research_cache is None or topic_index is None:
+        return [None] * len(topics)
+    with span("topic_index.similar", topics=len(topics)) as current:
+        matches = topic_index.similar_many(topics, "research", research_scope(_research_request("", paper_count)),
+                                           threshold=threshold)
+        current.set_attribute("matches", sum(1 for found in matches if found))
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for found in matches:
+        best = None
+        for match in found:
+            if research_cache.contains(match["ref"]):
+                best = match
+                break
+            topic_index.discard("research", match["ref"])  # expired or evicted
+        results.append(best)
+    return results
+
+
+def _reuse_similar_research(topics: List[str], paper_count: int = DEFAULT_OPTIONS["paper_count"]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Cached research of a near-duplicate topic for each topic, or None. The
+    research keeps its own topic and notes the match under "similar_to", so
+    the substitution shows in the session, the result and the sidecar.
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    for topic, match in zip(topics, similar_research(topics, paper_count, TOPIC_REUSE_THRESHOLD)):
+        cached = research_cache.get(match["ref"]) if match is not None else None
+        if cached is None:
+            results.append(None)
+            continue
+        log.info("⚡ Reusing research of similar topic %r for %r (similarity %.2f)", match["topic"], topic, match["score"])
+        results.append({**cached, "similar_to": {"topic": match["topic"], "similarity": match["score"]}})
+    return results
+
+
+def research_metadata(research_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Sidecar fields describing the research a blog was written from"""
+    return {"similar_to": research_data["similar_to"]} if research_data.get("similar_to") else {}
+
+
+@traced("stage.research")
+def get_research_papers(
+    topic: str, paper_count: int = DEFAULT_OPTIONS["paper_count"], reuse_similar: bool = TOPIC_REUSE_RESEARCH
+) -> Dict[str, Any]:
+    """
+    Step 1: Get research papers using OpenAI; reuse_similar allows cached
+    research of a near-duplicate topic
+    """
+    log.info("📚 Researching: %s", topic)
+
+    request = _research_request(topic, paper_count)
+    cache_key = research_cache_key(topic, request)
+    cached = _cached_research(topic, cache_key, request)
+    if cached is None and reuse_similar:
+        cached = _reuse_similar_research([topic], paper_count)[0]
+    if cached is not None:
+        return cached
+
+    try:
+        research_data = _parse_research(retry_sync(lambda: _complete(request, "research")))
+        if research_cache is not None:
+            research_cache.put(cache_key, topic, research_data)
+            _index_research(topic, cache_key, request)
         return research_data
 
     except Exception as e:
-        print(f"  ❌ Error: {e}")
+        log.error("❌ Error: %s", e)
         raise
 
 
-def generate_blog(research_data: Dict[str, Any]) -> Dict[str, Any]:
+@traced("stage.generation")
+def generate_blog(research_data: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Step 2: Generate blog from research papers
+    Step 2: Generate blog from research papers; options as in DEFAULT_OPTIONS
     """
-    print(f"✍️  Generating blog...")
+    log.info("✍️ Generating blog...")
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": BLOG_PROMPT},
-                {
-                    "role": "user",
-                    "content": f"Topic: {research_data['topic']}\n"
-                    f"Research JSON:\n{json.dumps(research_data)}",
-                },
-            ],
-            response_format={"type": "json_schema", "json_schema": BLOG_SCHEMA},
-            max_completion_tokens=3200,
-            temperature=0.7,
-        )
+        _log_context_report(research_data, options)
+        request = _blog_request(research_data, options)
+        return _parse_blog(retry_sync(lambda: _complete(request, "generation")))
+
+    except Exception as e:
+        log.error("❌ Error: %s", e)
+        raise
+
+
+# Pipeline event callback: on_event(event_name, payload)
+#   "sent"        - request handed to OpenAI      {"stage", "max_tokens"}
+#   "first_token" - first content chunk arrived   {"stage"}
+#   "delta"       - content chunk                 {"stage", "text", "chars"}
+#   "body_delta"  - decoded body_md text so far   {"stage", "text"}
+#   "field"       - top-level scalar closed       {"stage", "field", "value"}  (title, topic, ...)
+#   "item"        - array element closed          {"stage", "field", "index", "value"}  (papers, references)
+#   "parsed"      - stage output parsed           {"stage", ...stage summary}
+#   "retry"       - attempt failed, retrying      {"stage", "attempt", "delay", "error"}
+#   "usage"       - tokens/latency/cost of a call {"stage", **usage.usage_record()}
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+def _emit(on_event: Optional[EventCallback], event: str, **payload: Any) -> None:
+    """Forward a pipeline event to the callback, if any"""
+    if on_event is not None:
+        on_event(event, payload)
+
 
-        content = response.choices[0].message.content
-        print(f"  🔍 Blog response length: {len(content)} characters")
-        
+def _emit_parsed(
+    on_event: Optional[EventCallback], stage: str, events: List[Tuple[str, Tuple, Any]], text_field: Optional[str]
+) -> None:
+    """Forward what the streaming parser completed as body_delta / field / item events"""
+    for kind, path, value in events:
+        if kind == "text":
+            _emit(on_event, "body_delta", stage=stage, text=value)
+        elif len(path) == 2:
+            _emit(on_event, "item", stage=stage, field=path[0], index=path[1], value=value)
+        elif path[0] != text_field and not isinstance(value, (dict, list)):
+            _emit(on_event, "field", stage=stage, field=path[0], value=value)
+
+
+async def _stream_completion(
+    request: Dict[str, Any],
+    stage: str,
+    on_event: Optional[EventCallback],
+    text_field: Optional[str] = None,
+) -> Tuple[str, Any]:
+    """
+    Run a rate-limited streamed chat completion, emitting events, and return
+    the full content with its parsed document. The content is parsed as it
+    arrives, so malformed output aborts the stream at the first bad character.
+    """
+    model = request["model"]
+    estimated = estimate_tokens(request)
+    with span("rate_limiter.acquire", model=model, tokens=estimated):
+        await rate_limiter.acquire(model, estimated)
+
+    parser = StreamingJSONParser(
+        request["response_format"]["json_schema"]["schema"],
+        text_paths=[(text_field,)] if text_field else (),
+    )
+    with _chat_span(request, stage, stream=True) as current:
+        started = time.monotonic()
+        first_token: Optional[float] = None
+        usage = None
+        try:
+            raw = await async_client.chat.completions.with_raw_response.create(
+                **request, stream=True, stream_options={"include_usage": True}
+            )
+        except openai.APIStatusError as e:
+            rate_limiter.update_from_headers(model, e.response.headers)
+            raise
+        rate_limiter.update_from_headers(model, raw.headers)
+        stream = await raw.parse()
+        _emit(on_event, "sent", stage=stage, max_tokens=request["max_completion_tokens"])
+
+        parts: List[str] = []
+        chars = 0
         try:
-            blog_data = json.loads(content)
-        except json.JSONDecodeError as e:
-            print(f"  ❌ Blog JSON Parse Error: {e}")
-            print(f"  📄 Raw content (first 500 chars): {content[:500]}")
-            raise Exception(f"Invalid JSON response from OpenAI during blog generation: {e}")
-        print(f"  ✓ Generated {blog_data['word_count']} words")
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                    rate_limiter.reconcile(model, estimated, usage.total_tokens)
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                if not parts:
+                    first_token = time.monotonic() - started
+                    current.add_event("first_token")
+                    _emit(on_event, "first_token", stage=stage)
+                parts.append(text)
+                chars += len(text)
+                _emit(on_event, "delta", stage=stage, text=text, chars=chars)
+                _emit_parsed(on_event, stage, parser.feed(text), text_field)
+        except StreamingJSONError as e:
+            current.add_event("malformed_output", {"position": e.position})
+            log.warning("⚠️ Malformed %s output, stream aborted: %s", stage, e)
+            await stream.close()
+            raise
+
+        if usage is not None:
+            record = usage_record(model, usage, time.monotonic() - started, first_token)
+            usage_ledger.record(stage, record)
+            _record_usage_attributes(current, record)
+            _emit(on_event, "usage", stage=stage, **record)
+        return "".join(parts), parser.close()
+
+
+async def _stream_with_retries(
+    request: Dict[str, Any],
+    stage: str,
+    on_event: Optional[EventCallback],
+    deadline: Optional[float],
+    field: Optional[str] = None,
+) -> Tuple[str, Any]:
+    """Streamed completion with retries; each attempt restarts the stream from scratch"""
+    def on_retry(attempt: int, delay: float, exc: Exception) -> None:
+        _emit(on_event, "retry", stage=stage, attempt=attempt, delay=round(delay, 2), error=str(exc))
+
+    return await retry_async(
+        lambda: _stream_completion(request, stage, on_event, field),
+        deadline=deadline,
+        on_retry=on_retry,
+    )
+
+
+@traced("stage.research")
+async def get_research_papers_async(
+    topic: str,
+    on_event: Optional[EventCallback] = None,
+    deadline: Optional[float] = None,
+    paper_count: int = DEFAULT_OPTIONS["paper_count"],
+    reuse_similar: bool = TOPIC_REUSE_RESEARCH,
+) -> Dict[str, Any]:
+    """
+    Step 1 (async): Same as get_research_papers, without blocking the event loop
+    """
+    log.info("📚 Researching: %s", topic)
+
+    request = _research_request(topic, paper_count)
+    cache_key = research_cache_key(topic, request)
+    # SQLite lookups (and the topic-index backfill on a hit) stay off the event loop
+    cached = await asyncio.to_thread(_cached_research, topic, cache_key, request)
+    if cached is None and reuse_similar:
+        # A matrix scan over the whole index: kept off the event loop
+        cached = (await asyncio.to_thread(_reuse_similar_research, [topic], paper_count))[0]
+    if cached is not None:
+        _emit(on_event, "parsed", stage="research", papers=len(cached["papers"]), cached=True,
+              similar_to=cached.get("similar_to"))
+        return cached
+
+    try:
+        content, document = await _stream_with_retries(request, "research", on_event, deadline)
+        research_data = _parse_research(content, document)
+        if research_cache is not None:
+            research_cache.put(cache_key, topic, research_data)
+            _index_research(topic, cache_key, request)
+        _emit(on_event, "parsed", stage="research", papers=len(research_data["papers"]))
+        return research_data
+
+    except Exception as e:
+        log.error("❌ Error: %s", e)
+        raise
+
+
+@traced("stage.generation")
+async def generate_blog_async(
+    research_data: Dict[str, Any],
+    on_event: Optional[EventCallback] = None,
+    deadline: Optional[float] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Step 2 (async): Same as generate_blog, without blocking the event loop
+    """
+    log.info("✍️ Generating blog...")
+
+    try:
+        _log_context_report(research_data, options)
+        content, document = await _stream_with_retries(
+            _blog_request(research_data, options), "generation", on_event, deadline, field="body_md"
+        )
+        blog_data = _parse_blog(content, document)
+        _emit(on_event, "parsed", stage="generation", word_count=blog_data["word_count"])
         return blog_data
 
     except Exception as e:
-        print(f"  ❌ Error: {e}")
+        log.error("❌ Error: %s", e)
         raise
 
 
-def save_blog(blog_data: Dict[str, Any], topic: str) -> Path:
+@traced("stage.verification")
+async def verify_references_async(blogs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
     """
-    Step 3: Save blog to markdown file
+    Step 2b (async): Check the DOIs of every blog's references in one pass
+    (see reference_verifier.py). Each reference gets a "verification" record
+    and each blog a "reference_check" summary; None when verification is off.
     """
-    # Create outputs directory
-    output_dir = Path("outputs")
-    output_dir.mkdir(exist_ok=True)
+    if reference_verifier is None:
+        return [None] * len(blogs)
+    summaries = await reference_verifier.verify_many([blog["references"] for blog in blogs])
+    for blog_data, summary in zip(blogs, summaries):
+        blog_data["reference_check"] = summary
+        # A DOI of another work or a malformed one is a likely hallucination; unresolved
+        # may just be missing from the metadata store
+        if summary["mismatch"] or summary["invalid"]:
+            log.warning("⚠️ Suspect references: %d mismatched, %d invalid DOIs", summary["mismatch"], summary["invalid"])
+        log.info("🔎 References: %d verified of %d (%d unresolved)", summary["verified"],
+                 len(blog_data["references"]), summary["unresolved"])
+    return summaries
 
-    # Generate filename
-    filename = f"{topic.replace(' ', '-').lower()}.md"
-    filepath = output_dir / filename
 
-    # Save markdown content
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(blog_data["body_md"])
+def verify_references(blogs: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Step 2b: Same as verify_references_async, for callers without an event loop
+    """
+    return asyncio.run(verify_references_async(blogs))
 
-    print(f"💾 Saved to: {filepath}")
+
+def _store_blog(blog_data: Dict[str, Any], topic: str, metadata: Optional[Dict[str, Any]]) -> Path:
+    """Write the blog and its sidecar, then add it to the library index"""
+    filepath = output_store.save(blog_data, topic, metadata)
+    if blog_index is not None:
+        blog_index.add(filepath, blog_data, topic, metadata)
+    if topic_index is not None:
+        topic_index.add("blog", filepath.stem, topic)
+    log.info("💾 Saved to: %s", filepath)
     return filepath
 
 
+@traced("save_blog")
+def save_blog(blog_data: Dict[str, Any], topic: str, metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Step 3: Save blog markdown and its metadata sidecar (see output_store.py)
+    """
+    return _store_blog(blog_data, topic, metadata)
+
+
+@traced("save_blog")
+async def save_blog_async(
+    blog_data: Dict[str, Any], topic: str, metadata: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    Step 3 (async): Same as save_blog, with the disk writes in a worker thread
+    """
+    return await asyncio.to_thread(_store_blog, blog_data, topic, metadata)
+
+
+# ============================================================================
+# BULK MODE - OpenAI Batch API for offline backfills
+# ============================================================================
+
+# Batch states after which the output files will not change
+BATCH_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+
+def write_batch_file(requests: Dict[str, Dict[str, Any]], path: Path) -> Path:
+    """Write {custom_id: chat completion arguments} as a Batch API input JSONL file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests.items():
+            line = {"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": body}
+            f.write(json.dumps(line) + "\n")
+    return path
+
+
+def submit_batch(path: Path, description: str) -> str:
+    """Upload an input file and start a batch; returns the batch id"""
+    with open(path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window=BULK_COMPLETION_WINDOW,
+        metadata={"description": description},
+    )
+    log.info("📤 Submitted batch %s (%s)", batch.id, description)
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, poll_interval: float = BULK_POLL_INTERVAL):
+    """Poll a batch until it reaches a final state"""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        if counts is not None:
+            log.info(
+                "⏳ Batch %s: %s (%d/%d done, %d failed)",
+                batch_id, batch.status, counts.completed, counts.total, counts.failed,
+            )
+        if batch.status in BATCH_FINAL_STATES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def read_batch_output(batch, path: Path) -> Dict[str, Any]:
+    """
+    Download a finished batch's output and error files (kept next to the
+    input for auditing) and map custom_id to message content, or to an
+    Exception for requests that failed
+    """
+    results: Dict[str, Any] = {}
+    lines = []
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if file_id:
+            lines.extend(client.files.content(file_id).text.splitlines())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") == 200:
+            results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        else:
+            error = item.get("error") or response.get("body", {}).get("error") or {}
+            results[item["custom_id"]] = Exception(error.get("message", f"Batch request failed: {line[:200]}"))
+    return results
+
+
+def run_batch_stage(
+    requests: Dict[str, Dict[str, Any]],
+    parse: Callable[[str], Dict[str, Any]],
+    run_dir: Path,
+    stage: str,
+    poll_interval: float = BULK_POLL_INTERVAL,
+) -> Dict[str, Any]:
+    """Run one pipeline stage as a batch; returns custom_id -> parsed output or Exception"""
+    if not requests:
+        return {}
+    input_path = write_batch_file(requests, run_dir / f"{stage}_input.jsonl")
+    batch = wait_for_batch(submit_batch(input_path, f"{stage} x{len(requests)}"), poll_interval)
+    if batch.status != "completed":
+        log.warning("⚠️ Batch %s ended as %s", batch.id, batch.status)
+    contents = read_batch_output(batch, run_dir / f"{stage}_output.jsonl")
+
+    results: Dict[str, Any] = {}
+    for custom_id in requests:
+        content = contents.get(custom_id, Exception(f"No output for {custom_id} (batch {batch.status})"))
+        if isinstance(content, Exception):
+            results[custom_id] = content
+            continue
+        try:
+            results[custom_id] = parse(content)
+        except Exception as e:
+            results[custom_id] = e
+    return results
+
+
+def create_blogs_bulk(
+    topics: List[str], poll_interval: float = BULK_POLL_INTERVAL, reuse_similar: bool = TOPIC_REUSE_RESEARCH
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Offline pipeline for large backfills: research for every distinct topic
+    runs as one batch, then every blog as a second batch. Cached research is
+    reused (with reuse_similar, also that of near-duplicate topics) and fresh
+    research is cached. Returns one blog (or None) per topic.
+    """
+    topics = [t.strip() for t in topics if t.strip()]
+    run_dir = Path(BULK_DIR) / time.strftime("%Y%m%d-%H%M%S")
+    print("\n" + "=" * 50)
+    print(f"🚀 AI RESEARCH BLOG GENERATOR - BULK OF {len(topics)}")
+    print(f"📁 Batch files: {run_dir}")
+    print("=" * 50 + "\n")
+
+    # Stage 1: research, one request per distinct topic
+    groups: Dict[str, str] = {}  # normalized topic -> first spelling seen
+    for topic in topics:
+        groups.setdefault(normalize_text(topic), topic)
+    research: Dict[str, Any] = {}
+    research_requests: Dict[str, Dict[str, Any]] = {}
+    research_ids = {f"research-{index}": key for index, key in enumerate(groups)}
+    for custom_id, key in research_ids.items():
+        request = _research_request(groups[key])
+        cached = research_cache.get(research_cache_key(groups[key], request)) if research_cache is not None else None
+        if cached is not None:
+            research[key] = cached
+        else:
+            research_requests[custom_id] = request
+    # Near-duplicates of cached topics reuse that research, looked up in one batch
+    missing = list(research_requests) if reuse_similar else []
+    similar = _reuse_similar_research([groups[research_ids[custom_id]] for custom_id in missing])
+    for custom_id, research_data in zip(missing, similar):
+        if research_data is not None:
+            research[research_ids[custom_id]] = research_data
+            del research_requests[custom_id]
+    log.info("📚 Research: %d to run, %d cached", len(research_requests), len(research))
+
+    for custom_id, output in run_batch_stage(research_requests, _parse_research, run_dir, "research", poll_interval).items():
+        key = research_ids[custom_id]
+        research[key] = output
+        if not isinstance(output, Exception) and research_cache is not None:
+            topic = groups[key]
+            request = _research_request(topic)
+            cache_key = research_cache_key(topic, request)
+            research_cache.put(cache_key, topic, output)
+            _index_research(topic, cache_key, request)
+
+    # Stage 2: one blog per input topic whose research succeeded
+    blog_requests: Dict[str, Dict[str, Any]] = {}
+    for index, topic in enumerate(topics):
+        research_data = research[normalize_text(topic)]
+        if not isinstance(research_data, Exception):
+            blog_requests[f"blog-{index}"] = _blog_request(research_data)
+    log.info("✍️ Blogs: %d to generate", len(blog_requests))
+    blog_outputs = run_batch_stage(blog_requests, _parse_blog, run_dir, "blog", poll_interval)
+    # One verification pass over every reference of the run
+    verify_references([output for output in blog_outputs.values() if not isinstance(output, Exception)])
+
+    blogs: List[Optional[Dict[str, Any]]] = []
+    for index, topic in enumerate(topics):
+        output = blog_outputs.get(f"blog-{index}", research[normalize_text(topic)])
+        if isinstance(output, Exception):
+            print(f"❌ {topic}: {output}")
+            blogs.append(None)
+            continue
+        filepath = save_blog(output, topic, research_metadata(research[normalize_text(topic)]))
+        print(f"✅ {topic}: {output['title']} ({output['word_count']} words) -> {filepath}")
+        blogs.append(output)
+
+    done = sum(1 for blog in blogs if blog is not None)
+    print(f"\n📊 Bulk run complete: {done}/{len(blogs)} blogs generated")
+    return blogs
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -303,9 +1242,10 @@ def create_blog(topic: str) -> Dict[str, Any]:
 
         # Step 2: Generate
         blog = generate_blog(research)
+        verify_references([blog])
 
         # Step 3: Save
-        filepath = save_blog(blog, topic)
+        filepath = save_blog(blog, topic, research_metadata(research))
 
         print("\n✅ Blog generation complete!")
         print(f"📄 Title: {blog['title']}")
@@ -319,7 +1259,63 @@ def create_blog(topic: str) -> Dict[str, Any]:
         return None
 
 
+async def _create_blogs_async(topics: List[str], max_parallel: int) -> List[Optional[Dict[str, Any]]]:
+    """Run many topics concurrently; duplicate topics share one research call"""
+    slots = asyncio.Semaphore(max_parallel)
+    research_tasks: Dict[str, asyncio.Task] = {}
+
+    async def research(topic: str) -> Dict[str, Any]:
+        async with slots:
+            return await get_research_papers_async(topic)
+
+    async def run(topic: str) -> Optional[Dict[str, Any]]:
+        key = normalize_text(topic)
+        if key not in research_tasks:
+            research_tasks[key] = asyncio.ensure_future(research(topic))
+        try:
+            research_data = await research_tasks[key]
+            async with slots:
+                blog = await generate_blog_async(research_data)
+            await verify_references_async([blog])
+            filepath = await save_blog_async(blog, topic, research_metadata(research_data))
+            print(f"✅ {topic}: {blog['title']} ({blog['word_count']} words) -> {filepath}")
+            return blog
+        except Exception as e:
+            print(f"❌ {topic}: {e}")
+            return None
+
+    return await asyncio.gather(*(run(topic) for topic in topics))
+
+
+def create_blogs(topics: List[str], max_parallel: int = 4) -> List[Optional[Dict[str, Any]]]:
+    """
+    Blog creation pipeline for many topics at once, at most max_parallel
+    OpenAI calls in flight. Returns one blog (or None on failure) per topic.
+    """
+    topics = [t.strip() for t in topics if t.strip()]
+    print("\n" + "=" * 50)
+    print(f"🚀 AI RESEARCH BLOG GENERATOR - BATCH OF {len(topics)}")
+    print("=" * 50 + "\n")
+
+    blogs = asyncio.run(_create_blogs_async(topics, max_parallel))
+
+    done = sum(1 for blog in blogs if blog is not None)
+    print(f"\n📊 Batch complete: {done}/{len(blogs)} blogs generated")
+    return blogs
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # python blog_generator.py [--bulk] topics.txt  (one topic per line)
+        bulk = sys.argv[1] == "--bulk"
+        with open(sys.argv[-1], encoding="utf-8") as f:
+            topics = f.read().splitlines()
+        if bulk:
+            create_blogs_bulk(topics)
+        else:
+            create_blogs(topics)
+        sys.exit(0)
+
     # Run the generator
     topic = input("Enter blog topic: ").strip()
 
@@ -0,0 +1,292 @@
+"""
+Blog Library Index
+SQLite index over the generated posts in the output directory: one row per
+post (title, topic, word count, references, DOIs, created_at) plus an FTS5
+full-text index of title, topic, body and references. save_blog adds each
+post as it is written; sync_directory picks up files written without it.
+Listings use keyset (cursor) pagination, so every page is an index seek.
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BLOG_INDEX_ENABLED = os.getenv("BLOG_INDEX_ENABLED", "true").lower() == "true"
+BLOG_INDEX_PATH = os.getenv("BLOG_INDEX_PATH", "cache/blog_index.sqlite3")
+
+BLOG_PAGE_SIZE = 20
+BLOG_MAX_PAGE_SIZE = 100
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS blogs (
+        id INTEGER PRIMARY KEY,
+        blog_id TEXT NOT NULL UNIQUE,
+        file TEXT NOT NULL,
+        title TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        topic_key TEXT NOT NULL,
+        request_key TEXT,
+        session_id TEXT,
+        word_count INTEGER NOT NULL,
+        reference_count INTEGER NOT NULL,
+        dois TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_blogs_topic ON blogs(topic_key, id)",
+    "CREATE INDEX IF NOT EXISTS idx_blogs_request ON blogs(request_key, id)",
+    "CREATE INDEX IF NOT EXISTS idx_blogs_created ON blogs(created_at)",
+    """CREATE TABLE IF NOT EXISTS blog_dois (
+        doi TEXT NOT NULL,
+        id INTEGER NOT NULL,
+        PRIMARY KEY (doi, id)
+    ) WITHOUT ROWID""",
+    # Contentless: the text lives in the markdown files, only the index is kept
+    """CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5(
+        title, topic, body, refs, content='', tokenize='unicode61 remove_diacritics 2'
+    )""",
+)
+
+
+def topic_key(topic: str) -> str:
+    """Lowercase, trim and collapse whitespace (as blog_generator.normalize_text)"""
+    return re.sub(r"\s+", " ", topic.strip().lower())
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Free text as an FTS5 query matching every word; "word*" keeps a prefix
+    search (much slower on common prefixes). None if there are no words.
+    """
+    terms = re.findall(r"(\w+)(\*?)", text)
+    return " ".join(f'"{word}"{star}' for word, star in terms) or None
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid cursor")
+    return values
+
+# ============================================================================
+# BLOG INDEX
+# ============================================================================
+
+
+class BlogIndex:
+    """Metadata table + FTS5 index of every saved blog, keyed by file stem"""
+
+    def __init__(self, path: str = BLOG_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def add(
+        self,
+        filepath: Path,
+        blog_data: Dict[str, Any],
+        topic: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        created_at: Optional[float] = None,
+    ) -> bool:
+        """Index a saved blog; False if that file is already indexed"""
+        metadata = metadata or {}
+        references = blog_data.get("references", [])
+        dois = sorted({ref["doi"].strip().lower() for ref in references if ref.get("doi")})
+        refs_text = " ".join(
+            " ".join([ref.get("title", ""), " ".join(ref.get("authors", [])), ref.get("journal", "")])
+            for ref in references
+        )
+        title = blog_data.get("title") or Path(filepath).stem
+        with self._lock:
+            cursor = self._conn.execute(
+                """INSERT OR IGNORE INTO blogs (blog_id, file, title, topic, topic_key, request_key,
+                    session_id, word_count, reference_count, dois, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    Path(filepath).stem, Path(filepath).name, title, topic, topic_key(topic),
+                    metadata.get("request_key"), metadata.get("session_id"),
+                    int(blog_data.get("word_count") or len(blog_data["body_md"].split())),
+                    len(references), json.dumps(dois), created_at or time.time(),
+                ),
+            )
+            if cursor.rowcount == 0:
+                return False
+            row_id = cursor.lastrowid
+            self._conn.execute(
+                "INSERT INTO blogs_fts (rowid, title, topic, body, refs) VALUES (?, ?, ?, ?, ?)",
+                (row_id, title, topic, blog_data["body_md"], refs_text),
+            )
+            self._conn.executemany("INSERT OR IGNORE INTO blog_dois VALUES (?, ?)", [(d, row_id) for d in dois])
+            self._conn.commit()
+            return True
+
+    def sync_directory(self, directory: Path) -> int:
+        """Index markdown files not yet in the index (e.g. written before it existed)"""
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT file FROM blogs")}
+        added = 0
+        for markdown in sorted(Path(directory).glob("*.md"), key=lambda p: p.stat().st_mtime):
+            if markdown.name in known:
+                continue
+            body = markdown.read_text(encoding="utf-8")
+            try:
+                metadata = json.loads(markdown.with_suffix(".json").read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                metadata = {}
+            heading = re.search(r"^#\s+(.+)$", body, re.MULTILINE)
+            blog_data = {
+                "title": metadata.get("title") or (heading.group(1).strip() if heading else markdown.stem),
+                "word_count": metadata.get("word_count"),
+                "body_md": body,
+                "references": metadata.get("references", []),
+            }
+            topic = metadata.get("topic") or markdown.stem.replace("-", " ")
+            if self.add(markdown, blog_data, topic, metadata, created_at=markdown.stat().st_mtime):
+                added += 1
+        return added
+
+    def _summary(self, row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["blog_id"],
+            "title": row["title"],
+            "topic": row["topic"],
+            "word_count": row["word_count"],
+            "reference_count": row["reference_count"],
+            "dois": json.loads(row["dois"]),
+            "session_id": row["session_id"],
+            "file": row["file"],
+            "created_at": datetime.fromtimestamp(row["created_at"]).isoformat(),
+        }
+
+    def get(self, blog_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM blogs WHERE blog_id = ?", (blog_id,)).fetchone()
+        return self._summary(row) if row is not None else None
+
+    def find_by_request(self, request_key: str) -> Optional[Dict[str, Any]]:
+        """Newest blog generated from an identical request, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM blogs WHERE request_key = ? ORDER BY id DESC LIMIT 1", (request_key,)
+            ).fetchone()
+        return self._summary(row) if row is not None else None
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        topic: Optional[str] = None,
+        doi: Optional[str] = None,
+        min_words: Optional[int] = None,
+        max_words: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = BLOG_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        sort: str = "relevance",
+    ) -> Dict[str, Any]:
+        """
+        One page of blogs, newest first - or best match first when q is given
+        and sort is "relevance". Ranking has to score every match, so broad
+        queries over a large library are much cheaper with sort="newest".
+        Pass the returned next_cursor to get the following page.
+        """
+        if sort not in ("relevance", "newest"):
+            raise ValueError("sort must be relevance or newest")
+        limit = max(1, min(limit, BLOG_MAX_PAGE_SIZE))
+        match = fts_query(q) if q else None
+        ranked = match is not None and sort == "relevance"
+        where: List[str] = []
+        params: List[Any] = []
+        if match is not None:
+            score = "f.rank" if ranked else "0.0"
+            select = f"SELECT b.*, {score} AS score FROM blogs_fts f JOIN blogs b ON b.id = f.rowid"
+            where.append("blogs_fts MATCH ?")
+            params.append(match)
+            order = "f.rank, b.id DESC" if ranked else "f.rowid DESC"
+        else:
+            select = "SELECT b.*, 0.0 AS score FROM blogs b"
+            order = "b.id DESC"
+
+        if topic:
+            where.append("b.topic_key = ?")
+            params.append(topic_key(topic))
+        for value, clause in (
+            (min_words, "b.word_count >= ?"),
+            (max_words, "b.word_count <= ?"),
+            (since, "b.created_at >= ?"),
+            (until, "b.created_at < ?"),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        if doi:
+            where.append("b.id IN (SELECT id FROM blog_dois WHERE doi = ?)")
+            params.append(doi.strip().lower())
+
+        if cursor:
+            position = decode_cursor(cursor)
+            if ranked:
+                where.append("(f.rank > ? OR (f.rank = ? AND b.id < ?))")
+                params += [position[0], position[0], position[-1]]
+            elif match is not None:
+                where.append("f.rowid < ?")
+                params.append(position[-1])
+            else:
+                where.append("b.id < ?")
+                params.append(position[-1])
+
+        sql = select
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor([last["score"], last["id"]] if ranked else [last["id"]])
+        return {"items": [self._summary(row) for row in page], "next_cursor": next_cursor}
+
+    def topics(self) -> List[Tuple[str, str]]:
+        """(blog id, topic) of every indexed blog, oldest first"""
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute("SELECT blog_id, topic FROM blogs ORDER BY id")]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM blogs").fetchone()[0]
+        return {"blogs": count, "path": self.path}
+
+
+# Process-wide index, updated by save_blog (None when BLOG_INDEX_ENABLED=false)
+blog_index = BlogIndex() if BLOG_INDEX_ENABLED else None
@@ -0,0 +1,107 @@
+"""
+Stage Checkpoints for the Blog Generator
+Each session's completed stage outputs (research JSON, blog JSON, saved path)
+are written to a durable per-session file, so a failed job can resume from
+the last completed stage instead of paying for research again.
+"""
+
+import os
+import json
+import time
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", str(3 * 24 * 3600)))  # seconds
+
+# Temp files older than this belong to a writer that died (writes take milliseconds)
+STALE_TMP_SECONDS = 3600
+
+# Pipeline stages in execution order
+STAGES = ("research", "generation", "save")
+
+# ============================================================================
+# CHECKPOINT STORE
+# ============================================================================
+
+
+class CheckpointStore:
+    """One JSON file per session, replaced atomically on every stage completion"""
+
+    def __init__(self, directory: str = CHECKPOINT_DIR, ttl: int = CHECKPOINT_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id: str) -> Path:
+        return self.directory / f"{session_id}.json"
+
+    def _write(self, session_id: str, checkpoint: Dict[str, Any]) -> None:
+        checkpoint["updated_at"] = time.time()
+        path = self._path(session_id)
+        # Unique temp name: two writers for one session never rename each other's half-written file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def create(self, session_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a checkpoint holding the original generation request"""
+        checkpoint = {"session_id": session_id, "request": request, "stages": {}}
+        self._write(session_id, checkpoint)
+        return checkpoint
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session's checkpoint, or None if there is none"""
+        try:
+            with open(self._path(session_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def complete_stage(self, checkpoint: Dict[str, Any], stage: str, output: Any) -> None:
+        """Record a stage's output and persist the checkpoint"""
+        checkpoint["stages"][stage] = output
+        self._write(checkpoint["session_id"], checkpoint)
+
+    def delete(self, session_id: str) -> None:
+        self._path(session_id).unlink(missing_ok=True)
+
+    def prune(self) -> int:
+        """
+        Delete checkpoints older than the TTL, and temp files left by writers
+        that died mid-write; returns how many checkpoints were removed
+        """
+        now = time.time()
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < now - self.ttl:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+            except FileNotFoundError:
+                pass  # deleted meanwhile
+        for path in self.directory.glob("*.tmp"):
+            try:
+                if path.stat().st_mtime < now - STALE_TMP_SECONDS:
+                    path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+def last_completed_stage(checkpoint: Dict[str, Any]) -> Optional[str]:
+    """Latest stage with a recorded output, or None if nothing completed yet"""
+    done = [stage for stage in STAGES if stage in checkpoint["stages"]]
+    return done[-1] if done else None
@@ -0,0 +1,427 @@
+"""
+Job Queue for the Blog Generator API
+Bounded asyncio queue + fixed worker pool + per-model concurrency caps,
+so bursts of /generate calls level off at the provider limit.
+Backends (JOB_QUEUE_BACKEND):
+  - memory: per-process asyncio queue
+  - sqlite: one queue shared by every worker process on the host
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from telemetry import get_logger
+
+log = get_logger("jobs")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "cache/jobs.sqlite3")
+JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "100"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+
+# Concurrent OpenAI calls allowed per model, e.g. "gpt-4o-2024-08-06=4,gpt-4o-mini=8"
+MODEL_CONCURRENCY = os.getenv("MODEL_CONCURRENCY", "gpt-4o-2024-08-06=4,gpt-4o-mini=8")
+
+# Assumed job duration (seconds) until real timings are available
+DEFAULT_JOB_SECONDS = 30.0
+
+# Idle poll interval of sqlite-backed workers (seconds)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.25"))
+
+# A claimed job whose worker died is handed out again after this many seconds
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+# How long a sqlite queue operation waits for another process's write lock (seconds)
+JOB_DB_TIMEOUT = float(os.getenv("JOB_DB_TIMEOUT", "2"))
+
+# Handler signature: handler(job_id, payload)
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+def parse_model_limits(spec: str) -> Dict[str, int]:
+    """Parse "model=limit,model=limit" into a dict"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        model, limit = item.split("=", 1)
+        limits[model.strip()] = max(1, int(limit))
+    return limits
+
+# ============================================================================
+# JOB QUEUE
+# ============================================================================
+
+
+class QueueFullError(Exception):
+    """Raised when a job cannot be admitted; carries a Retry-After hint"""
+
+    def __init__(self, message: str, retry_after: int, status_code: int = 429):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class JobQueue:
+    """
+    Bounded FIFO of jobs drained by a fixed pool of asyncio workers.
+    Each job is a (job_id, payload) pair handed to the shared handler coroutine;
+    payloads must be JSON-able so the sqlite backend can share them.
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        max_size: int = JOB_QUEUE_MAX_SIZE,
+        workers: int = JOB_WORKERS,
+        model_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.handler = handler
+        self.max_size = max_size
+        self.workers = workers
+        self.model_limits = model_limits if model_limits is not None else parse_model_limits(MODEL_CONCURRENCY)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: "OrderedDict[str, None]" = OrderedDict()  # queued job ids in order
+        self._running: Dict[str, float] = {}  # job id -> start time
+        self._tasks: List[asyncio.Task] = []
+        self._finishing: Set[asyncio.Future] = set()  # _finish_job calls in worker threads
+        self._model_slots: Dict[str, asyncio.Semaphore] = {}
+        self._avg_job_seconds = DEFAULT_JOB_SECONDS
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Create the queue and spawn the worker pool (call from the running loop)"""
+        if self.started:
+            return
+        # Unbounded: cancelled jobs stay in it until a worker skips them, so
+        # admission is decided by _pending (live queued jobs) instead
+        self._queue = asyncio.Queue()
+        self._model_slots = {model: asyncio.Semaphore(limit) for model, limit in self.model_limits.items()}
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel all workers; queued jobs are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await asyncio.gather(*self._finishing, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+        self._running.clear()
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def submit(self, job_id: str, payload: Dict[str, Any]) -> int:
+        """Admit a job; returns its 1-based queue position or raises QueueFullError"""
+        if not self.started:
+            raise QueueFullError("Job scheduler is not running", self.retry_after(), status_code=503)
+        if len(self._pending) >= self.max_size:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Generation queue is full ({self.max_size} jobs waiting)", self.retry_after()
+            )
+        self._queue.put_nowait((job_id, payload))
+        self._pending[job_id] = None
+        return len(self._pending)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position of a queued job, or None once it has started/finished"""
+        for index, pending_id in enumerate(self._pending):
+            if pending_id == job_id:
+                return index + 1
+        return None
+
+    def discard(self, job_id: str) -> None:
+        """Forget a queued job (e.g. cancelled); its worker turn is skipped"""
+        self._pending.pop(job_id, None)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up"""
+        waves = (len(self._pending) + len(self._running)) / max(1, self.workers)
+        return max(1, int(round(max(1.0, waves) * self._avg_job_seconds)))
+
+    # Coroutine forms for request handlers; backends doing I/O run it in a worker thread
+
+    async def submit_async(self, job_id: str, payload: Dict[str, Any]) -> int:
+        return self.submit(job_id, payload)
+
+    async def position_async(self, job_id: str) -> Optional[int]:
+        return self.position(job_id)
+
+    async def discard_async(self, job_id: str) -> None:
+        self.discard(job_id)
+
+    async def stats_async(self) -> Dict[str, Any]:
+        return self.stats()
+
+    # ------------------------------------------------------------------
+    # Per-model concurrency
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def model_slot(self, model: str):
+        """Hold one of the model's concurrency slots for the duration of a call"""
+        slot = self._model_slots.get(model)
+        if slot is None:
+            yield
+            return
+        async with slot:
+            yield
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _next_job(self) -> Tuple[str, Dict[str, Any]]:
+        """Wait for the next job that has not been cancelled"""
+        while True:
+            job_id, payload = await self._queue.get()
+            self._queue.task_done()
+            if job_id in self._pending:
+                del self._pending[job_id]
+                return job_id, payload
+
+    def _finish_job(self, job_id: str) -> None:
+        """Hook for backends that track jobs outside this process"""
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, payload = await self._next_job()
+            started = time.monotonic()
+            self._running[job_id] = started
+            try:
+                await self.handler(job_id, payload)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                log.exception("❌ Job %s failed in worker %d: %s", job_id, index, e)
+            finally:
+                self._running.pop(job_id, None)
+                elapsed = time.monotonic() - started
+                self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+            # Not reached on shutdown (CancelledError), so claimed jobs can be re-queued.
+            # Once started, the bookkeeping finishes even if the worker is cancelled.
+            finish = asyncio.ensure_future(asyncio.to_thread(self._finish_job, job_id))
+            self._finishing.add(finish)
+            finish.add_done_callback(self._finishing.discard)
+            await asyncio.shield(finish)
+
+    def is_local(self, job_id: str) -> bool:
+        """True if this process is currently running the job"""
+        return job_id in self._running
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, worker utilisation and outcome counters"""
+        return {
+            "backend": "memory",
+            "queued": len(self._pending),
+            "running": len(self._running),
+            "max_queue_size": self.max_size,
+            "workers": self.workers,
+            "model_limits": dict(self.model_limits),
+            "avg_job_seconds": round(self._avg_job_seconds, 2),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+# ============================================================================
+# SQLITE BACKEND - shared by all worker processes
+# ============================================================================
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    Same scheduler, but the FIFO lives in a SQLite table so any process can
+    admit a job and any process's workers can claim it. Claims are leases:
+    a job whose worker died is re-claimed after JOB_LEASE_SECONDS (and then
+    resumes from its checkpoint). Database calls block, so the workers and
+    the *_async methods run them in worker threads, one at a time per process.
+    """
+
+    def __init__(self, handler: JobHandler, path: str = JOB_DB_PATH, **kwargs: Any):
+        super().__init__(handler, **kwargs)
+        self.path = path
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()  # one transaction at a time on the shared connection
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=JOB_DB_TIMEOUT, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                enqueued_at REAL NOT NULL,
+                claimed_at REAL,
+                worker TEXT
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, enqueued_at)")
+
+    def start(self) -> None:
+        if self.started:
+            return
+        self._wakeup = asyncio.Event()
+        self._model_slots = {model: asyncio.Semaphore(limit) for model, limit in self.model_limits.items()}
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    def submit(self, job_id: str, payload: Dict[str, Any]) -> int:
+        if not self.started:
+            raise QueueFullError("Job scheduler is not running", self.retry_after(), status_code=503)
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                # Another process held the write lock for JOB_DB_TIMEOUT
+                raise QueueFullError("Job queue is busy", 1, status_code=503)
+            try:
+                queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if queued < self.max_size:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO jobs (id, payload, status, enqueued_at) VALUES (?, ?, 'queued', ?)",
+                        (job_id, json.dumps(payload), time.time()),
+                    )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        if queued >= self.max_size:
+            self.rejected += 1
+            raise QueueFullError(
+                f"Generation queue is full ({self.max_size} jobs waiting)", self.retry_after()
+            )
+        self._wakeup.set()
+        return queued + 1
+
+    def position(self, job_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND enqueued_at <= "
+                "(SELECT enqueued_at FROM jobs WHERE id = ? AND status = 'queued')",
+                (job_id,),
+            ).fetchone()
+        return row[0] or None
+
+    def discard(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ? AND status = 'queued'", (job_id,))
+
+    async def submit_async(self, job_id: str, payload: Dict[str, Any]) -> int:
+        if not self.started:
+            raise QueueFullError("Job scheduler is not running", self.retry_after(), status_code=503)
+        return await asyncio.to_thread(self.submit, job_id, payload)
+
+    async def position_async(self, job_id: str) -> Optional[int]:
+        return await asyncio.to_thread(self.position, job_id)
+
+    async def discard_async(self, job_id: str) -> None:
+        await asyncio.to_thread(self.discard, job_id)
+
+    async def stats_async(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.stats)
+
+    def _claim(self) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Atomically take the oldest queued (or lease-expired) job; None if none or the db is busy"""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                return None  # write lock held elsewhere; try again next poll
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND claimed_at < ?) ORDER BY enqueued_at LIMIT 1",
+                    (now - JOB_LEASE_SECONDS,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', claimed_at = ?, worker = ? WHERE id = ?",
+                        (now, str(os.getpid()), row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return (row[0], json.loads(row[1])) if row is not None else None
+
+    async def _next_job(self) -> Tuple[str, Dict[str, Any]]:
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is not None:
+                return job
+            # Woken immediately by local submits, otherwise poll for other processes' jobs
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _finish_job(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE id = ? AND status = 'running'", (job_id,))
+
+    def retry_after(self) -> int:
+        queued, running = self._counts()
+        waves = (queued + running) / max(1, self.workers)
+        return max(1, int(round(max(1.0, waves) * self._avg_job_seconds)))
+
+    def _counts(self) -> Tuple[int, int]:
+        with self._lock:
+            rows = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return rows.get("queued", 0), rows.get("running", 0)
+
+    async def stop(self) -> None:
+        await super().stop()
+        # Jobs this process had claimed go back to the queue for other workers
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', claimed_at = NULL, worker = NULL "
+                "WHERE status = 'running' AND worker = ?",
+                (str(os.getpid()),),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        queued, running = self._counts()
+        stats = super().stats()
+        stats.update(backend="sqlite", path=self.path, queued=queued, running=running,
+                     running_here=len(self._running))
+        return stats
+
+
+def create_job_queue(handler: JobHandler, backend: str = JOB_QUEUE_BACKEND) -> JobQueue:
+    """Build the configured job queue backend"""
+    if backend == "sqlite":
+        return SqliteJobQueue(handler)
+    if backend == "memory":
+        return JobQueue(handler)
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND: {backend}")
@@ -0,0 +1,185 @@
+"""
+Load Test Harness for the API Gateway
+N concurrent clients each submit /generate and poll /status until the job
+finishes, then the run is summarized: throughput, p50/p95/p99 latency per
+job and per HTTP call, and failure rate by cause. Run it against a gateway
+on the mock backend to measure the service rather than OpenAI:
+
+    LLM_BACKEND=mock MOCK_LLM_LATENCY=0.5 RESEARCH_CACHE_ENABLED=false \
+        OPENAI_RATE_LIMITS="gpt-4o-2024-08-06=100000:100000000,gpt-4o-mini=100000:100000000" \
+        python api_gateway.py
+    python load_test.py --clients 20 --jobs 200 --output results.json
+"""
+
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Session states after which /status will not change
+FINAL_STATES = {"completed", "error", "cancelled"}
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for no samples)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100.0 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.jobs: List[Dict[str, Any]] = []
+        self.calls: Dict[str, List[float]] = {"generate": [], "status": []}
+        self.errors: Counter = Counter()
+        self._next = 0
+
+    def next_job(self) -> Optional[int]:
+        if self._next >= self.args.jobs:
+            return None
+        self._next += 1
+        return self._next
+
+    def payload(self, number: int) -> Dict[str, Any]:
+        # Unique topics defeat the research cache and request coalescing
+        topic = self.args.topic if self.args.same_topic else f"{self.args.topic} #{number}"
+        return {"topic": topic, "paper_count": self.args.paper_count, "word_count": self.args.word_count}
+
+    async def call(self, http: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            return await http.request(method, url, **kwargs)
+        finally:
+            self.calls[name].append(time.perf_counter() - started)
+
+    async def run_job(self, http: httpx.AsyncClient, number: int) -> None:
+        started = time.perf_counter()
+        job = {"number": number, "status": "failed"}
+        self.jobs.append(job)
+        try:
+            response = await self.call(http, "generate", "POST", "/generate", json=self.payload(number))
+            if response.status_code != 200:
+                job["error"] = f"generate_{response.status_code}"
+                return
+            session_id = response.json()["session_id"]
+            deadline = started + self.args.job_timeout
+            while True:
+                await asyncio.sleep(self.args.poll_interval)
+                response = await self.call(http, "status", "GET", f"/status/{session_id}")
+                if response.status_code != 200:
+                    job["error"] = f"status_{response.status_code}"
+                    return
+                status = response.json()["status"]
+                if status in FINAL_STATES:
+                    job["status"] = status
+                    if status != "completed":
+                        job["error"] = f"job_{status}"
+                    return
+                if time.perf_counter() >= deadline:
+                    job["error"] = "timeout"
+                    return
+        except httpx.HTTPError as e:
+            job["error"] = type(e).__name__
+        finally:
+            job["latency"] = time.perf_counter() - started
+            if "error" in job:
+                self.errors[job["error"]] += 1
+
+    async def client(self, http: httpx.AsyncClient) -> None:
+        while True:
+            number = self.next_job()
+            if number is None:
+                return
+            await self.run_job(http, number)
+
+    async def run(self) -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=self.args.clients, max_keepalive_connections=self.args.clients)
+        async with httpx.AsyncClient(base_url=self.args.url, timeout=30, limits=limits) as http:
+            started = time.perf_counter()
+            await asyncio.gather(*(self.client(http) for _ in range(self.args.clients)))
+            elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        completed = [job["latency"] for job in self.jobs if job["status"] == "completed"]
+
+        def summary(values: List[float]) -> Dict[str, Any]:
+            return {
+                "count": len(values),
+                **{f"p{p}_ms": round(percentile(values, p) * 1000, 1) if values else None for p in (50, 95, 99)},
+                "max_ms": round(max(values) * 1000, 1) if values else None,
+            }
+
+        return {
+            "url": self.args.url,
+            "clients": self.args.clients,
+            "jobs": len(self.jobs),
+            "completed": len(completed),
+            "failed": len(self.jobs) - len(completed),
+            "failure_rate": round((len(self.jobs) - len(completed)) / max(1, len(self.jobs)), 4),
+            "errors": dict(self.errors),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_jobs_per_s": round(len(completed) / elapsed, 3) if elapsed else 0.0,
+            "job_latency": summary(completed),
+            "http_latency": {name: summary(values) for name, values in self.calls.items()},
+        }
+
+# ============================================================================
+# MAIN EXECUTION
+# ============================================================================
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n" + "=" * 50)
+    print(f"📈 LOAD TEST - {report['clients']} clients, {report['jobs']} jobs")
+    print("=" * 50)
+    print(f"✅ Completed: {report['completed']}  ❌ Failed: {report['failed']} "
+          f"({report['failure_rate']:.1%})")
+    for cause, count in sorted(report["errors"].items()):
+        print(f"   {cause}: {count}")
+    print(f"⏱️  {report['elapsed_s']}s → {report['throughput_jobs_per_s']} jobs/s")
+    rows = [("job", report["job_latency"])] + list(report["http_latency"].items())
+    print(f"\n{'latency':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in rows:
+        cells = [stats[key] if stats[key] is not None else "-" for key in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        print(f"{name:<10}{stats['count']:>8}" + "".join(f"{cell:>10}" for cell in cells))
+    print("=" * 50 + "\n")
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Drive /generate + /status at N concurrent clients")
+    parser.add_argument("--url", default="http://localhost:8000", help="gateway base URL")
+    parser.add_argument("--clients", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--jobs", type=int, default=100, help="total jobs across all clients")
+    parser.add_argument("--topic", default="AI in healthcare", help="topic (numbered unless --same-topic)")
+    parser.add_argument("--same-topic", action="store_true", help="repeat one topic (cache/coalescing path)")
+    parser.add_argument("--paper-count", type=int, default=5)
+    parser.add_argument("--word-count", type=int, default=1000)
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between /status polls")
+    parser.add_argument("--job-timeout", type=float, default=600, help="give up on a job after this long")
+    parser.add_argument("--output", help="also write the report to this JSON file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    report = asyncio.run(LoadTest(args).run())
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved to: {args.output}")
+    sys.exit(1 if report["completed"] == 0 else 0)
@@ -0,0 +1,226 @@
+"""
+Prometheus Metrics for the Blog Generator
+Latency histograms per pipeline stage and per OpenAI call, queue wait and
+job outcomes, plus queue/session gauges sampled at scrape time. The hooks
+wrap existing functions, so the pipeline code itself is unchanged.
+
+With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty
+directory (wiped before the server starts) so /metrics merges every worker.
+Cache hit ratio in PromQL:
+    rate(blog_research_cache_lookups_total{result="hit"}[5m])
+      / rate(blog_research_cache_lookups_total[5m])
+"""
+
+import os
+import time
+import asyncio
+import functools
+from typing import Any, Callable, Dict, Tuple
+
+import openai
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from stream_json import StreamingJSONError
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Pipeline stages take seconds to minutes; OpenAI calls dominate
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 300)
+JOB_BUCKETS = (1, 5, 10, 20, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600)
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+STAGE_SECONDS = Histogram(
+    "blog_stage_duration_seconds", "Pipeline stage latency", ["stage"], buckets=STAGE_BUCKETS
+)
+OPENAI_SECONDS = Histogram(
+    "blog_openai_request_duration_seconds",
+    "OpenAI chat completion latency, including the full stream",
+    ["model", "status"],
+    buckets=STAGE_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "blog_job_queue_wait_seconds", "Time from session creation to a worker starting it", buckets=JOB_BUCKETS
+)
+JOB_SECONDS = Histogram(
+    "blog_job_duration_seconds", "Worker time per job by outcome", ["outcome"], buckets=JOB_BUCKETS
+)
+JOBS = Counter("blog_jobs", "Finished jobs by outcome", ["outcome"])
+RETRIES = Counter("blog_openai_retries", "OpenAI call retries by stage", ["stage"])
+CACHE_LOOKUPS = Counter("blog_research_cache_lookups", "Research cache lookups", ["result"])
+
+# Sampled from shared state when scraped; the scraping worker's value wins
+QUEUE_DEPTH = Gauge("blog_job_queue_depth", "Jobs waiting for a worker", multiprocess_mode="livemostrecent")
+JOBS_RUNNING = Gauge("blog_jobs_running", "Jobs being processed", multiprocess_mode="livemostrecent")
+SESSIONS = Gauge("blog_sessions", "Stored sessions by status", ["status"], multiprocess_mode="livemostrecent")
+
+# ============================================================================
+# INSTRUMENTATION HOOKS
+# ============================================================================
+
+
+def timed_stage(stage: str) -> Callable:
+    """Decorator recording an (async or sync) pipeline step in STAGE_SECONDS"""
+    def decorator(func: Callable) -> Callable:
+        histogram = STAGE_SECONDS.labels(stage)
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def call_status(exc: BaseException) -> str:
+    """Low-cardinality status label for a failed OpenAI call"""
+    if isinstance(exc, openai.APIStatusError):
+        return str(exc.status_code)
+    if isinstance(exc, openai.APITimeoutError):
+        return "timeout"
+    if isinstance(exc, openai.APIConnectionError):
+        return "connection_error"
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    if isinstance(exc, StreamingJSONError):
+        return "truncated_output" if exc.truncated else "malformed_output"
+    return "error"
+
+
+def timed_openai_call(func: Callable) -> Callable:
+    """Wrap _stream_completion / _complete: latency by model and outcome"""
+    def model_of(args: Tuple, kwargs: Dict[str, Any]) -> str:
+        request = kwargs.get("request", args[0] if args else {})
+        return request.get("model", "unknown")
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                return await func(*args, **kwargs)
+            except BaseException as e:
+                status = call_status(e)
+                raise
+            finally:
+                OPENAI_SECONDS.labels(model_of(args, kwargs), status).observe(time.perf_counter() - started)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            status = call_status(e)
+            raise
+        finally:
+            OPENAI_SECONDS.labels(model_of(args, kwargs), status).observe(time.perf_counter() - started)
+    return wrapper
+
+
+def counted_cache_get(get: Callable) -> Callable:
+    """Wrap ResearchCache.get to count hits and misses"""
+    @functools.wraps(get)
+    def wrapper(self, key: str):
+        result = get(self, key)
+        CACHE_LOOKUPS.labels("miss" if result is None else "hit").inc()
+        return result
+    return wrapper
+
+
+def counted_retries(make_handler: Callable) -> Callable:
+    """Wrap a progress-handler factory so its "retry" events are counted"""
+    @functools.wraps(make_handler)
+    def factory(*args, **kwargs):
+        on_event = make_handler(*args, **kwargs)
+
+        def counting_on_event(event: str, payload: Dict[str, Any]) -> None:
+            if event == "retry":
+                RETRIES.labels(payload["stage"]).inc()
+            on_event(event, payload)
+        return counting_on_event
+    return factory
+
+
+def timed_job(handler: Callable, session_store) -> Callable:
+    """Wrap the queue's job handler: queue wait, job duration and outcome"""
+    @functools.wraps(handler)
+    async def wrapper(job_id: str, payload: Dict[str, Any]) -> None:
+        session = session_store.get(job_id)
+        if session is not None and "created_at" in session:
+            QUEUE_WAIT_SECONDS.observe(max(0.0, time.time() - session["created_at"]))
+        started = time.perf_counter()
+        outcome = "failed"
+        try:
+            await handler(job_id, payload)
+            session = session_store.get(job_id)
+            outcome = session["status"] if session is not None else "cancelled"
+        finally:
+            JOB_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+            JOBS.labels(outcome).inc()
+    return wrapper
+
+
+def instrument_pipeline(blog_generator) -> None:
+    """Patch blog_generator's OpenAI calls and research cache in place (idempotent)"""
+    if getattr(blog_generator, "_metrics_instrumented", False):
+        return
+    blog_generator._stream_completion = timed_openai_call(blog_generator._stream_completion)
+    blog_generator._complete = timed_openai_call(blog_generator._complete)
+    blog_generator.ResearchCache.get = counted_cache_get(blog_generator.ResearchCache.get)
+    blog_generator._metrics_instrumented = True
+
+# ============================================================================
+# EXPOSITION
+# ============================================================================
+
+
+def render_metrics(queue_stats: Dict[str, Any], session_counts: Dict[str, int]) -> Tuple[bytes, str]:
+    """Sample the gauges and return the text exposition and its content type"""
+    QUEUE_DEPTH.set(queue_stats.get("queued", 0))
+    JOBS_RUNNING.set(queue_stats.get("running", 0))
+    for status, count in session_counts.items():
+        SESSIONS.labels(status).set(count)
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the multiprocess directory"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
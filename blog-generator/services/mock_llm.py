@@ -0,0 +1,326 @@
+"""
+Deterministic Local LLM Backend
+Stand-in for the OpenAI client (LLM_BACKEND=mock) so the pipeline and the
+gateway can be exercised and load-tested without a key or network. Chat
+completions return research/blog JSON that satisfies the request's schema,
+streamed or not, after a configurable latency, with optional 5xx and 429
+injection. The same request always produces the same content.
+
+Only the chat completion calls the pipeline makes are provided; bulk mode
+needs the Batch API, see batch_stub.py.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+MOCK_LLM_LATENCY = float(os.getenv("MOCK_LLM_LATENCY", "0.5"))  # seconds to first token
+MOCK_LLM_TOKENS_PER_SECOND = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", "0"))  # 0 = no decode delay
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))  # share of calls failing with 500
+MOCK_LLM_RATE_LIMIT_RATE = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0"))  # share failing with 429
+MOCK_LLM_RETRY_AFTER = float(os.getenv("MOCK_LLM_RETRY_AFTER", "1.0"))  # seconds, sent with 429s
+MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED", "0"))
+
+# Tokens per streamed chunk; OpenAI sends roughly one or two
+CHUNK_TOKENS = 2
+CHARS_PER_TOKEN = 4
+
+_WORDS = (
+    "patients clinical model outcomes accuracy evidence trial cohort screening diagnosis "
+    "workflow hospital data learning risk sensitivity specificity care treatment results "
+    "analysis study adoption costs errors imaging monitoring decision support reduced "
+    "improved significant population settings performance validation deployment safety"
+).split()
+_NAMES = ("Smith J", "Garcia M", "Chen L", "Okafor N", "Müller K", "Tanaka H", "Singh P", "Rossi A")
+_JOURNALS = ("The Lancet Digital Health", "JAMA Network Open", "Nature Medicine", "BMJ", "NEJM AI")
+
+# ============================================================================
+# FAKE CONTENT
+# ============================================================================
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(8, 16))
+        sentences.append(_sentence(rng, length))
+        words -= length
+    return " ".join(sentences)
+
+
+def _items_count(schema: Dict[str, Any], field: str) -> int:
+    return schema["schema"]["properties"][field].get("minItems", 1)
+
+
+def fake_research(rng: random.Random, topic: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """research_papers payload: distinct titles, well-formed DOIs"""
+    paper = schema["schema"]["properties"]["papers"]["items"]["properties"]
+    papers = []
+    for i in range(_items_count(schema, "papers")):
+        papers.append({
+            "title": f"{_sentence(rng, 5)[:-1]}: {topic} study {i + 1}",
+            "authors": rng.sample(_NAMES, rng.randint(1, 5)),
+            "abstract": _paragraph(rng, rng.randint(90, 160)),
+            "evidence_type": rng.choice(paper["evidence_type"]["enum"]),
+            "journal": rng.choice(_JOURNALS),
+            "doi": f"10.{rng.randint(1000, 9999)}/mock.{rng.getrandbits(32):08x}",
+            "citations": rng.randint(0, 2500),
+        })
+    return {"topic": topic, "papers": papers}
+
+
+def fake_blog(rng: random.Random, system_prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """blog_post_v1 payload whose body_md hits the prompt's word target"""
+    target = re.search(r"Target (\d+)\D+(\d+) words", system_prompt)
+    word_count = (int(target.group(1)) + int(target.group(2))) // 2 if target else 1000
+    references = _items_count(schema, "references")
+
+    sections, words = [], 0
+    while words < word_count:
+        length = min(word_count - words, rng.randint(60, 140))
+        cite = f" [{rng.randint(1, references)}]" if references else ""
+        sections.append(f"## {_sentence(rng, 4)[:-1]}\n\n{_paragraph(rng, length)}{cite}")
+        words += length
+    return {
+        "title": _sentence(rng, 7)[:-1],
+        "word_count": words,
+        "body_md": "\n\n".join(sections),
+        "references": [
+            {
+                "index": i + 1,
+                "title": _sentence(rng, 8)[:-1],
+                "authors": rng.sample(_NAMES, rng.randint(1, 3)),
+                "journal": rng.choice(_JOURNALS),
+                "year": rng.randint(2015, 2025),
+                "doi": f"10.{rng.randint(1000, 9999)}/mock.{rng.getrandbits(32):08x}",
+            }
+            for i in range(references)
+        ],
+    }
+
+
+def fake_content(request: Dict[str, Any], seed: int = MOCK_LLM_SEED) -> str:
+    """JSON completion for a pipeline request, seeded by the request itself"""
+    digest = hashlib.sha256(json.dumps([seed, request["messages"]], sort_keys=True).encode("utf-8")).digest()
+    rng = random.Random(digest)
+    schema = request["response_format"]["json_schema"]
+    system, user = request["messages"][0]["content"], request["messages"][-1]["content"]
+    if schema["name"] == "research_papers":
+        return json.dumps(fake_research(rng, user, schema))
+    if schema["name"].startswith("blog_post"):
+        return json.dumps(fake_blog(rng, system, schema))
+    raise ValueError(f"Mock backend has no generator for schema {schema['name']!r}")
+
+# ============================================================================
+# BACKEND
+# ============================================================================
+
+
+def _status_error(status_code: int, message: str, headers: Dict[str, str]) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://mock-llm/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    error = openai.RateLimitError if status_code == 429 else openai.InternalServerError
+    return error(message, response=response, body=None)
+
+
+class MockBackend:
+    """Latency, fault injection and response shaping shared by both clients"""
+
+    def __init__(
+        self,
+        latency: float = MOCK_LLM_LATENCY,
+        tokens_per_second: float = MOCK_LLM_TOKENS_PER_SECOND,
+        error_rate: float = MOCK_LLM_ERROR_RATE,
+        rate_limit_rate: float = MOCK_LLM_RATE_LIMIT_RATE,
+        retry_after: float = MOCK_LLM_RETRY_AFTER,
+        seed: int = MOCK_LLM_SEED,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fault(self) -> Optional[openai.APIStatusError]:
+        """Injected failure for this call, if any (drawn from the seeded sequence)"""
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            headers = {"retry-after-ms": str(int(self.retry_after * 1000))}
+            return _status_error(429, "Rate limit reached (mock)", headers)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return _status_error(500, "The server had an error (mock)", {})
+        return None
+
+    def usage(self, request: Dict[str, Any], content: str) -> Dict[str, Any]:
+        prompt = sum(len(m["content"]) for m in request["messages"]) // CHARS_PER_TOKEN
+        completion = len(content) // CHARS_PER_TOKEN
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": prompt + completion,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+
+    def decode_time(self, chars: int) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return chars / CHARS_PER_TOKEN / self.tokens_per_second
+
+    def completion(self, request: Dict[str, Any], content: str) -> ChatCompletion:
+        return ChatCompletion.model_validate({
+            "id": f"chatcmpl-mock{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": self.usage(request, content),
+        })
+
+    def chunks(self, request: Dict[str, Any], content: str, include_usage: bool) -> List[ChatCompletionChunk]:
+        base = {"id": f"chatcmpl-mock{self.calls}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request["model"]}
+        step = CHUNK_TOKENS * CHARS_PER_TOKEN
+        chunks = [
+            ChatCompletionChunk.model_validate(dict(base, choices=[{
+                "index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}]))
+            for i in range(0, len(content), step)
+        ]
+        if include_usage:
+            chunks.append(ChatCompletionChunk.model_validate(
+                dict(base, choices=[], usage=self.usage(request, content))))
+        return chunks
+
+
+class _RawResponse:
+    """with_raw_response result: headers now, body via parse()"""
+
+    def __init__(self, parsed: Any):
+        self.headers = httpx.Headers()
+        self._parsed = parsed
+
+    def parse(self) -> Any:
+        return self._parsed
+
+
+class _AsyncRawResponse(_RawResponse):
+    async def parse(self) -> Any:
+        return self._parsed
+
+
+class _Completions:
+    def __init__(self, backend: MockBackend):
+        self._backend = backend
+        self.with_raw_response = self
+
+    def create(self, stream: bool = False, stream_options: Optional[Dict] = None, **request: Any):
+        backend = self._backend
+        error = backend.fault()
+        if error is not None and error.status_code == 429:
+            raise error  # rejected before any work, like the real limiter
+        time.sleep(backend.latency)
+        if error is not None:
+            raise error
+        content = fake_content(request, backend.seed)
+        if not stream:
+            time.sleep(backend.decode_time(len(content)))
+            return _RawResponse(backend.completion(request, content))
+        include_usage = bool(stream_options and stream_options.get("include_usage"))
+        return _RawResponse(self._stream(backend.chunks(request, content, include_usage)))
+
+    def _stream(self, chunks: List[ChatCompletionChunk]) -> Iterator[ChatCompletionChunk]:
+        delay = self._backend.decode_time(CHUNK_TOKENS * CHARS_PER_TOKEN)
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay)
+            yield chunk
+
+
+class _AsyncCompletions:
+    def __init__(self, backend: MockBackend):
+        self._backend = backend
+        self.with_raw_response = self
+
+    async def create(self, stream: bool = False, stream_options: Optional[Dict] = None, **request: Any):
+        backend = self._backend
+        error = backend.fault()
+        if error is not None and error.status_code == 429:
+            raise error  # rejected before any work, like the real limiter
+        await asyncio.sleep(backend.latency)
+        if error is not None:
+            raise error
+        content = fake_content(request, backend.seed)
+        if not stream:
+            await asyncio.sleep(backend.decode_time(len(content)))
+            return _AsyncRawResponse(backend.completion(request, content))
+        include_usage = bool(stream_options and stream_options.get("include_usage"))
+        return _AsyncRawResponse(_AsyncStream(self._stream(backend.chunks(request, content, include_usage))))
+
+    async def _stream(self, chunks: List[ChatCompletionChunk]) -> AsyncIterator[ChatCompletionChunk]:
+        delay = self._backend.decode_time(CHUNK_TOKENS * CHARS_PER_TOKEN)
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+class _AsyncStream:
+    """openai.AsyncStream stand-in: async iteration plus close()"""
+
+    def __init__(self, chunks: AsyncIterator[ChatCompletionChunk]):
+        self._chunks = chunks
+
+    def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        return self._chunks
+
+    async def close(self) -> None:
+        await self._chunks.aclose()
+
+
+class _Chat:
+    def __init__(self, completions):
+        self.completions = completions
+
+
+class MockOpenAI:
+    """Blocking client: client.chat.completions.with_raw_response.create(...)"""
+
+    def __init__(self, backend: Optional[MockBackend] = None):
+        self.backend = backend or MockBackend()
+        self.chat = _Chat(_Completions(self.backend))
+
+
+class AsyncMockOpenAI:
+    """Async client with the same surface as AsyncOpenAI's chat completions"""
+
+    def __init__(self, backend: Optional[MockBackend] = None):
+        self.backend = backend or MockBackend()
+        self.chat = _Chat(_AsyncCompletions(self.backend))
@@ -0,0 +1,107 @@
+"""
+Output Store for Generated Blogs
+Each blog is written as {slug}-{content hash}-{random id}.md next to a
+{same}.json sidecar holding its references, usage and timings. The random
+id keeps every save distinct, even for identical bodies, so concurrent
+jobs never overwrite each other. Writes go to a temp file that is fsynced
+and renamed into place, so readers never see a partial file.
+"""
+
+import os
+import re
+import json
+import uuid
+import hashlib
+import tempfile
+import unicodedata
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
+
+SLUG_MAX_LENGTH = 80
+HASH_LENGTH = 12
+SAVE_ID_LENGTH = 8
+
+# ============================================================================
+# NAMING
+# ============================================================================
+
+
+def slugify(text: str, max_length: int = SLUG_MAX_LENGTH) -> str:
+    """Filesystem- and URL-safe slug: ASCII letters, digits and single hyphens"""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    slug = re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")
+    return slug[:max_length].rstrip("-") or "blog"
+
+
+def content_hash(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def atomic_write(path: Path, data: str) -> None:
+    """Write via a unique temp file in the same directory, fsync, then rename"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+# ============================================================================
+# OUTPUT STORE
+# ============================================================================
+
+
+class OutputStore:
+    """Markdown files plus JSON sidecars under one directory"""
+
+    def __init__(self, directory: str = OUTPUT_DIR):
+        self.directory = Path(directory)
+
+    def paths(self, topic: str, body: str) -> Tuple[Path, Path]:
+        """New (markdown, sidecar) paths; unique per call, even for identical content"""
+        stem = f"{slugify(topic)}-{content_hash(body)[:HASH_LENGTH]}-{uuid.uuid4().hex[:SAVE_ID_LENGTH]}"
+        return self.directory / f"{stem}.md", self.directory / f"{stem}.json"
+
+    def save(self, blog_data: Dict[str, Any], topic: str, metadata: Optional[Dict[str, Any]] = None) -> Path:
+        """Write the blog and its sidecar; returns the markdown path"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body = blog_data["body_md"]
+        markdown, sidecar = self.paths(topic, body)
+        record = {
+            "file": markdown.name,
+            "topic": topic,
+            "title": blog_data.get("title"),
+            "word_count": blog_data.get("word_count"),
+            "content_sha256": content_hash(body),
+            "created_at": datetime.now().isoformat(),
+            "references": blog_data.get("references", []),
+            "reference_check": blog_data.get("reference_check"),
+            **(metadata or {}),
+        }
+        # Sidecar first: a visible .md always has its metadata
+        atomic_write(sidecar, json.dumps(record, ensure_ascii=False, indent=2))
+        atomic_write(markdown, body)
+        return markdown
+
+    def load_metadata(self, markdown: Path) -> Optional[Dict[str, Any]]:
+        """Sidecar of a saved blog, or None (e.g. files written before sidecars existed)"""
+        try:
+            with open(Path(markdown).with_suffix(".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+# Process-wide store used by save_blog / save_blog_async (in a worker thread)
+output_store = OutputStore()
@@ -0,0 +1,198 @@
+"""
+OpenAI Rate Limiter for the Blog Generator
+Per-model token buckets for requests-per-minute and tokens-per-minute,
+refined from the x-ratelimit-* response headers. Callers wait for capacity
+instead of failing with 429s.
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Account limits per model as "model=rpm:tpm,..."; headers refine them at runtime
+OPENAI_RATE_LIMITS = os.getenv(
+    "OPENAI_RATE_LIMITS", "gpt-4o-2024-08-06=500:30000,gpt-4o-mini=500:200000"
+)
+
+# Rough characters-per-token ratio used to estimate prompt size
+CHARS_PER_TOKEN = 4
+
+# With N server processes each one gets 1/N of the account budget
+RATE_LIMIT_SHARE = 1.0 / max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Dict[str, int]]:
+    """Parse "model=rpm:tpm,..." into {model: {"rpm": .., "tpm": ..}}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item or ":" not in item:
+            continue
+        model, values = item.split("=", 1)
+        rpm, tpm = values.split(":", 1)
+        limits[model.strip()] = {"rpm": int(rpm), "tpm": int(tpm)}
+    return limits
+
+
+def estimate_prompt_tokens(request: Dict[str, Any]) -> int:
+    """Rough prompt size of a chat completion: messages plus response schema"""
+    prompt_chars = sum(len(m.get("content") or "") for m in request.get("messages", []))
+    schema = request.get("response_format")
+    if schema:
+        prompt_chars += len(str(schema))
+    return prompt_chars // CHARS_PER_TOKEN
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Worst-case tokens for a chat completion: prompt estimate + max completion"""
+    return estimate_prompt_tokens(request) + int(request.get("max_completion_tokens", 0))
+
+
+# ============================================================================
+# TOKEN BUCKETS
+# ============================================================================
+
+
+class TokenBucket:
+    """Classic token bucket refilling `capacity` units per minute"""
+
+    def __init__(self, capacity: float):
+        self.capacity = float(capacity)
+        self.available = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.available = min(self.capacity, self.available + elapsed * self.capacity / 60.0)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) * 60.0 / self.capacity
+
+
+class ModelRateLimiter:
+    """Shared RPM/TPM limiter keyed by model name"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None, share: float = RATE_LIMIT_SHARE):
+        limits = limits if limits is not None else parse_rate_limits(OPENAI_RATE_LIMITS)
+        self.share = share
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, TokenBucket]] = {
+            model: {"rpm": TokenBucket(v["rpm"] * share), "tpm": TokenBucket(v["tpm"] * share)}
+            for model, v in limits.items()
+        }
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def try_acquire(self, model: str, tokens: int) -> float:
+        """Take one request and `tokens` tokens if possible; else return seconds to wait"""
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            return 0.0  # unknown model: not limited
+        with self._lock:
+            now = time.monotonic()
+            rpm, tpm = buckets["rpm"], buckets["tpm"]
+            rpm.refill(now)
+            tpm.refill(now)
+            wait = max(rpm.wait_time(1), tpm.wait_time(tokens))
+            if wait > 0:
+                return wait
+            rpm.available -= 1
+            tpm.available -= min(tokens, tpm.capacity)
+            return 0.0
+
+    async def acquire(self, model: str, tokens: int) -> None:
+        """Wait (without blocking the loop) until the model has capacity"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(model, tokens)
+            if wait <= 0:
+                break
+            waited += wait
+            await asyncio.sleep(wait)
+        self._record_wait(waited)
+
+    def acquire_sync(self, model: str, tokens: int) -> None:
+        """Blocking variant of acquire for the synchronous pipeline"""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(model, tokens)
+            if wait <= 0:
+                break
+            waited += wait
+            time.sleep(wait)
+        self._record_wait(waited)
+
+    def _record_wait(self, waited: float) -> None:
+        if waited > 0:
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += waited
+
+    def reconcile(self, model: str, estimated: int, actual: int) -> None:
+        """Refund over-estimated tokens once the real usage is known"""
+        buckets = self._buckets.get(model)
+        if buckets is None or actual <= 0:
+            return
+        with self._lock:
+            tpm = buckets["tpm"]
+            tpm.available = min(tpm.capacity, tpm.available + (estimated - actual))
+
+    def update_from_headers(self, model: str, headers: Mapping[str, str]) -> None:
+        """Adopt the server's view of limits and remaining budget"""
+        limit_requests = headers.get("x-ratelimit-limit-requests")
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        if limit_requests is None and limit_tokens is None:
+            return
+
+        with self._lock:
+            buckets = self._buckets.get(model)
+            if buckets is None:
+                buckets = self._buckets[model] = {
+                    "rpm": TokenBucket(int(limit_requests or 1) * self.share),
+                    "tpm": TokenBucket(int(limit_tokens or 1) * self.share),
+                }
+            now = time.monotonic()
+            for key, limit, remaining in (
+                ("rpm", limit_requests, headers.get("x-ratelimit-remaining-requests")),
+                ("tpm", limit_tokens, headers.get("x-ratelimit-remaining-tokens")),
+            ):
+                bucket = buckets[key]
+                bucket.refill(now)
+                # Headers describe the whole account; keep this process's share
+                if limit is not None:
+                    bucket.capacity = float(limit) * self.share
+                if remaining is not None:
+                    bucket.available = min(bucket.available, float(remaining) * self.share)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current capacity and availability per model"""
+        with self._lock:
+            now = time.monotonic()
+            models = {}
+            for model, buckets in self._buckets.items():
+                for bucket in buckets.values():
+                    bucket.refill(now)
+                models[model] = {
+                    key: {"capacity": int(b.capacity), "available": int(b.available)}
+                    for key, b in buckets.items()
+                }
+            return {
+                "models": models,
+                "share": round(self.share, 4),
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 2),
+            }
+
+
+# Process-wide limiter shared by every pipeline call
+rate_limiter = ModelRateLimiter()
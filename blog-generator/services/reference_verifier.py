@@ -0,0 +1,421 @@
+"""
+Reference Verification
+Checks that the DOIs a blog cites exist and belong to the cited work. All
+DOIs of a job - or of a whole bulk run - are checked in one pass: fresh
+cache entries first, then a single concurrent resolver call for the rest.
+Each references entry gets a "verification" record (verified, mismatch,
+unresolved, invalid or error). Resolvers are pluggable: the default is
+an offline SQLite metadata store filled from JSONL (e.g. a Crossref dump),
+
+    python reference_verifier.py --import works.jsonl
+
+and REFERENCE_RESOLVER=crossref queries the Crossref REST API instead.
+Found and not-found answers are cached with separate TTLs.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from collections import Counter
+from urllib.parse import quote
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from telemetry import get_logger, span
+
+log = get_logger("reference_verifier")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+REFERENCE_VERIFICATION_ENABLED = os.getenv("REFERENCE_VERIFICATION_ENABLED", "true").lower() == "true"
+REFERENCE_RESOLVER = os.getenv("REFERENCE_RESOLVER", "local")  # local, crossref or none
+REFERENCE_STORE_PATH = os.getenv("REFERENCE_STORE_PATH", "cache/doi_metadata.sqlite3")
+REFERENCE_CACHE_PATH = os.getenv("REFERENCE_CACHE_PATH", "cache/reference_cache.sqlite3")
+REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", str(30 * 24 * 3600)))  # seconds, DOI found
+REFERENCE_NEGATIVE_TTL = int(os.getenv("REFERENCE_NEGATIVE_TTL", str(24 * 3600)))  # seconds, not found
+REFERENCE_CONCURRENCY = int(os.getenv("REFERENCE_CONCURRENCY", "8"))
+REFERENCE_TIMEOUT = float(os.getenv("REFERENCE_TIMEOUT", "5"))  # seconds per resolver request
+CROSSREF_URL = os.getenv("CROSSREF_URL", "https://api.crossref.org/works/")
+CROSSREF_MAILTO = os.getenv("CROSSREF_MAILTO", "")  # identifies us for Crossref's polite pool
+
+# Cited and resolved titles sharing at least this share of their words count as the same work
+TITLE_MATCH_THRESHOLD = 0.5
+
+STATUSES = ("verified", "mismatch", "unresolved", "invalid", "error")
+
+_DOI_PREFIX = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+_DOI_PATTERN = re.compile(r"^10\.\d{4,9}/\S+$")
+_SQL_CHUNK = 500  # bound parameters per IN (...) query
+
+# ============================================================================
+# NORMALIZATION
+# ============================================================================
+
+
+def normalize_doi(doi: str) -> Optional[str]:
+    """Bare lowercase DOI (URL and "doi:" prefixes removed), or None if malformed"""
+    doi = _DOI_PREFIX.sub("", (doi or "").strip()).strip().rstrip(".").lower()
+    return doi if _DOI_PATTERN.match(doi) else None
+
+
+def title_words(title: str) -> set:
+    ascii_text = unicodedata.normalize("NFKD", title or "").encode("ascii", "ignore").decode("ascii")
+    return {word for word in re.findall(r"[a-z0-9]+", ascii_text.lower()) if len(word) > 2}
+
+
+def title_similarity(cited: str, resolved: str) -> float:
+    """Jaccard similarity of the two titles' words (ignoring case, accents and short words)"""
+    a, b = title_words(cited), title_words(resolved)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def metadata_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {"title", "authors", "journal", "year"} from either a flat record or a
+    Crossref work (list-valued title/container-title, author objects, issued)
+    """
+    def first(value: Any) -> str:
+        if isinstance(value, list):
+            return value[0] if value else ""
+        return value or ""
+
+    authors = record.get("authors")
+    if authors is None:
+        authors = [
+            " ".join(part for part in (author.get("given"), author.get("family")) if part) or author.get("name", "")
+            for author in record.get("author", [])
+        ]
+    year = record.get("year")
+    if year is None:
+        for field in ("issued", "published-print", "published-online", "created"):
+            parts = (record.get(field) or {}).get("date-parts") or [[None]]
+            if parts[0] and parts[0][0]:
+                year = parts[0][0]
+                break
+    return {
+        "title": first(record.get("title")),
+        "authors": authors,
+        "journal": first(record.get("journal") or record.get("container-title")),
+        "year": int(year) if year else None,
+    }
+
+# ============================================================================
+# RESOLVERS
+# ============================================================================
+# A resolver maps DOIs to metadata: resolve(dois) returns {doi: metadata} for
+# DOIs it found and {doi: None} for DOIs it knows do not exist. DOIs missing
+# from the result could not be checked (e.g. a timeout) and are not cached.
+
+
+class LocalMetadataStore:
+    """Offline resolver: DOI metadata imported into a SQLite table"""
+
+    name = "local"
+
+    def __init__(self, path: str = REFERENCE_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS works (
+                doi TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                authors TEXT NOT NULL,
+                journal TEXT NOT NULL,
+                year INTEGER
+            ) WITHOUT ROWID"""
+        )
+        self._conn.commit()
+
+    def add_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Insert or replace works ({"doi": ..., plus metadata_from_record fields}); returns the count"""
+        rows = []
+        for record in records:
+            doi = normalize_doi(record.get("doi") or record.get("DOI") or "")
+            if doi is None:
+                continue
+            meta = metadata_from_record(record)
+            rows.append((doi, meta["title"], json.dumps(meta["authors"]), meta["journal"], meta["year"]))
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def import_jsonl(self, path: str, batch_size: int = 10000) -> int:
+        """Load one JSON work per line (flat or Crossref format)"""
+        total, batch = 0, []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    total += self.add_many(batch)
+                    batch = []
+        return total + self.add_many(batch)
+
+    def lookup(self, dois: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        found: Dict[str, Optional[Dict[str, Any]]] = {doi: None for doi in dois}
+        with self._lock:
+            for start in range(0, len(dois), _SQL_CHUNK):
+                chunk = dois[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT doi, title, authors, journal, year FROM works WHERE doi IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for doi, title, authors, journal, year in rows:
+                    found[doi] = {"title": title, "authors": json.loads(authors), "journal": journal, "year": year}
+        return found
+
+    async def resolve(self, dois: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return await asyncio.to_thread(self.lookup, dois)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM works").fetchone()[0]
+
+
+class CrossrefResolver:
+    """Online resolver: Crossref REST API, REFERENCE_CONCURRENCY requests at a time"""
+
+    name = "crossref"
+
+    def __init__(self, url: str = CROSSREF_URL, concurrency: int = REFERENCE_CONCURRENCY,
+                 timeout: float = REFERENCE_TIMEOUT):
+        self.url = url
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    async def resolve(self, dois: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        slots = asyncio.Semaphore(self.concurrency)
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        headers = {"User-Agent": f"blog-generator (mailto:{CROSSREF_MAILTO})" if CROSSREF_MAILTO else "blog-generator"}
+
+        async def fetch(http: httpx.AsyncClient, doi: str) -> None:
+            async with slots:
+                try:
+                    response = await http.get(self.url + quote(doi, safe="/"))
+                except httpx.HTTPError as e:
+                    log.warning("⚠️ Crossref lookup failed for %s: %s", doi, e)
+                    return
+            if response.status_code == 404:
+                results[doi] = None
+            elif response.status_code == 200:
+                # A malformed body leaves this DOI unchecked, like a network error
+                try:
+                    results[doi] = metadata_from_record(response.json()["message"])
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    log.warning("⚠️ Unreadable Crossref record for %s: %r", doi, e)
+            else:
+                log.warning("⚠️ Crossref returned %d for %s", response.status_code, doi)
+
+        async with httpx.AsyncClient(timeout=self.timeout, headers=headers) as http:
+            await asyncio.gather(*(fetch(http, doi) for doi in dois))
+        return results
+
+
+def create_resolver(name: str = REFERENCE_RESOLVER):
+    if name == "local":
+        return LocalMetadataStore()
+    if name == "crossref":
+        return CrossrefResolver()
+    raise ValueError(f"Unknown REFERENCE_RESOLVER: {name} (expected local, crossref or none)")
+
+# ============================================================================
+# CACHE - SQLite-backed, separate TTLs for found and not-found DOIs
+# ============================================================================
+
+
+class ReferenceCache:
+    """Resolver answers per (resolver, DOI); not-found answers expire sooner"""
+
+    def __init__(self, path: str = REFERENCE_CACHE_PATH, ttl: int = REFERENCE_CACHE_TTL,
+                 negative_ttl: int = REFERENCE_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS reference_cache (
+                resolver TEXT NOT NULL,
+                doi TEXT NOT NULL,
+                metadata TEXT,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (resolver, doi)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.commit()
+
+    def get_many(self, resolver: str, dois: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Fresh cached answers among dois (None = known not to exist)"""
+        now = time.time()
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        with self._lock:
+            for start in range(0, len(dois), _SQL_CHUNK):
+                chunk = dois[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT doi, metadata, checked_at FROM reference_cache "
+                    f"WHERE resolver = ? AND doi IN ({','.join('?' * len(chunk))})",
+                    [resolver, *chunk],
+                ).fetchall()
+                for doi, metadata, checked_at in rows:
+                    if now - checked_at <= (self.ttl if metadata is not None else self.negative_ttl):
+                        found[doi] = json.loads(metadata) if metadata is not None else None
+            self.hits += len(found)
+            self.misses += len(dois) - len(found)
+        return found
+
+    def put_many(self, resolver: str, results: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO reference_cache VALUES (?, ?, ?, ?)",
+                [(resolver, doi, json.dumps(meta) if meta is not None else None, now) for doi, meta in results.items()],
+            )
+            self._conn.execute(
+                "DELETE FROM reference_cache WHERE checked_at < ? OR (metadata IS NULL AND checked_at < ?)",
+                (now - self.ttl, now - self.negative_ttl),
+            )
+            self._conn.commit()
+
+    def clear_negative(self, resolver: str) -> None:
+        """Forget not-found answers, e.g. after importing new metadata"""
+        with self._lock:
+            self._conn.execute("DELETE FROM reference_cache WHERE resolver = ? AND metadata IS NULL", (resolver,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM reference_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# ============================================================================
+# VERIFIER
+# ============================================================================
+
+
+_UNCHECKED = object()  # resolver gave no answer for the DOI
+
+
+def check_reference(reference: Dict[str, Any], doi: Optional[str], answer: Any, resolver: str) -> Dict[str, Any]:
+    """Verification record for one reference given its resolver answer"""
+    if doi is None:
+        return {"status": "invalid"}
+    if answer is _UNCHECKED:
+        return {"status": "error", "resolver": resolver}
+    if answer is None:
+        return {"status": "unresolved", "resolver": resolver}
+    similarity = title_similarity(reference.get("title", ""), answer["title"])
+    record = {
+        "status": "verified" if similarity >= TITLE_MATCH_THRESHOLD else "mismatch",
+        "resolver": resolver,
+        "title_similarity": round(similarity, 3),
+        "year_matches": answer["year"] is None or abs(int(reference.get("year") or 0) - answer["year"]) <= 1,
+    }
+    if record["status"] == "mismatch":
+        record["resolved"] = {"title": answer["title"], "journal": answer["journal"], "year": answer["year"]}
+    return record
+
+
+class ReferenceVerifier:
+    """Cache-then-resolver DOI checks over many reference lists at once"""
+
+    def __init__(self, resolver, cache: Optional[ReferenceCache] = None):
+        self.resolver = resolver
+        self.cache = cache
+
+    async def verify_many(self, reference_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Annotate every reference in place with a "verification" record and
+        return per-list counts by status
+        """
+        started = time.perf_counter()
+        name = self.resolver.name
+        dois = [[normalize_doi(ref.get("doi", "")) for ref in refs] for refs in reference_lists]
+        unique = sorted({doi for group in dois for doi in group if doi is not None})
+
+        with span("references.verify", dois=len(unique), resolver=name) as current:
+            answers: Dict[str, Optional[Dict[str, Any]]] = {}
+            if self.cache is not None and unique:
+                answers = await asyncio.to_thread(self.cache.get_many, name, unique)
+            missing = [doi for doi in unique if doi not in answers]
+            if missing:
+                resolved = await self.resolver.resolve(missing)
+                if self.cache is not None and resolved:
+                    await asyncio.to_thread(self.cache.put_many, name, resolved)
+                answers.update(resolved)
+            current.set_attribute("cached", len(unique) - len(missing))
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        summaries = []
+        for refs, group in zip(reference_lists, dois):
+            counts = Counter()
+            for ref, doi in zip(refs, group):
+                ref["verification"] = check_reference(ref, doi, answers.get(doi, _UNCHECKED), name)
+                counts[ref["verification"]["status"]] += 1
+            summaries.append({**{status: counts[status] for status in STATUSES}, "resolver": name,
+                              "elapsed_ms": elapsed_ms})
+        return summaries
+
+    async def verify(self, references: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return (await self.verify_many([references]))[0]
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"enabled": True, "resolver": self.resolver.name}
+        if isinstance(self.resolver, LocalMetadataStore):
+            stats["works"] = self.resolver.count()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
+
+
+# Process-wide verifier used after generation (None when disabled or REFERENCE_RESOLVER=none)
+reference_verifier: Optional[ReferenceVerifier] = (
+    ReferenceVerifier(create_resolver(), ReferenceCache())
+    if REFERENCE_VERIFICATION_ENABLED and REFERENCE_RESOLVER != "none" else None
+)
+
+# ============================================================================
+# MAIN EXECUTION
+# ============================================================================
+
+if __name__ == "__main__":
+    # python reference_verifier.py --import works.jsonl [more.jsonl ...]
+    if len(sys.argv) < 3 or sys.argv[1] != "--import":
+        print("Usage: python reference_verifier.py --import works.jsonl [...]")
+        sys.exit(2)
+    store = LocalMetadataStore()
+    for path in sys.argv[2:]:
+        print(f"📥 {path}: {store.import_jsonl(path)} works")
+    ReferenceCache().clear_negative(store.name)
+    print(f"📚 Metadata store: {store.count()} works ({store.path})")
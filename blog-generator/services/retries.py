@@ -0,0 +1,145 @@
+"""
+Retry Policy for OpenAI Calls
+Exponential backoff with full jitter for transient failures (timeouts,
+connection errors, 429s, 5xx, malformed streamed JSON), honoring
+Retry-After and a per-job deadline.
+"""
+
+import os
+import time
+import random
+import asyncio
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import openai
+
+from stream_json import StreamingJSONError
+from telemetry import get_logger
+
+log = get_logger("retries")
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "1.0"))  # seconds
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30.0"))  # seconds
+JOB_DEADLINE_SECONDS = float(os.getenv("JOB_DEADLINE_SECONDS", "300"))
+
+T = TypeVar("T")
+
+# on_retry(attempt, delay_seconds, exception)
+RetryCallback = Callable[[int, float, Exception], None]
+
+
+class JobDeadlineExceeded(Exception):
+    """The job ran out of time; raised instead of starting another attempt"""
+
+# ============================================================================
+# CLASSIFICATION
+# ============================================================================
+
+
+def is_retryable(exc: Exception) -> bool:
+    """True for transient OpenAI failures worth another attempt"""
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(exc, openai.RateLimitError):
+        # Quota exhaustion is a billing problem, not a transient one
+        return getattr(exc, "code", None) != "insufficient_quota"
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    if isinstance(exc, StreamingJSONError):
+        # A fresh sample is usually well-formed; a truncated one would hit the same token budget
+        return not exc.truncated
+    return False
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Server-requested delay from Retry-After / retry-after-ms, if any"""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        return None  # HTTP-date form; fall back to backoff
+    return None
+
+
+def backoff_delay(attempt: int, exc: Exception) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After"""
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+    requested = retry_after_seconds(exc)
+    if requested is not None:
+        delay = max(delay, requested)
+    return delay
+
+
+def _next_delay(attempt: int, exc: Exception, deadline: Optional[float], max_retries: int) -> float:
+    """Delay before the next attempt; re-raises when retrying is not allowed"""
+    if not is_retryable(exc) or attempt >= max_retries:
+        raise exc
+    delay = backoff_delay(attempt, exc)
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise JobDeadlineExceeded(f"Job deadline exceeded after {attempt + 1} attempts: {exc}") from exc
+    return delay
+
+# ============================================================================
+# RETRY LOOPS
+# ============================================================================
+
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    deadline: Optional[float] = None,
+    on_retry: Optional[RetryCallback] = None,
+    max_retries: int = OPENAI_MAX_RETRIES,
+) -> T:
+    """Await call() with retries; deadline is a time.monotonic() timestamp"""
+    attempt = 0
+    while True:
+        try:
+            if deadline is None:
+                return await call()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JobDeadlineExceeded("Job deadline exceeded before the call started (timeout)")
+            try:
+                return await asyncio.wait_for(call(), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise JobDeadlineExceeded(f"Job deadline exceeded after {attempt + 1} attempts (timeout)")
+        except JobDeadlineExceeded:
+            raise
+        except Exception as exc:
+            delay = _next_delay(attempt, exc, deadline, max_retries)
+            attempt += 1
+            log.warning("🔁 Retry %d/%d in %.1fs: %s", attempt, max_retries, delay, exc)
+            if on_retry is not None:
+                on_retry(attempt, delay, exc)
+            await asyncio.sleep(delay)
+
+
+def retry_sync(
+    call: Callable[[], T],
+    deadline: Optional[float] = None,
+    on_retry: Optional[RetryCallback] = None,
+    max_retries: int = OPENAI_MAX_RETRIES,
+) -> T:
+    """Blocking counterpart of retry_async (the deadline only gates new attempts)"""
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as exc:
+            delay = _next_delay(attempt, exc, deadline, max_retries)
+            attempt += 1
+            log.warning("🔁 Retry %d/%d in %.1fs: %s", attempt, max_retries, delay, exc)
+            if on_retry is not None:
+                on_retry(attempt, delay, exc)
+            time.sleep(delay)
@@ -0,0 +1,297 @@
+"""
+Session Store for the Blog Generator API
+Pluggable storage for generation sessions (plain JSON-able dicts):
+  - memory: per-process, TTL + LRU eviction under a memory cap
+  - sqlite: shared by every worker process on the host, TTL eviction
+Select with SESSION_STORE=memory|sqlite.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "cache/sessions.sqlite3")
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(24 * 3600)))  # seconds since last update
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Sessions in these states are never evicted for size, only deleted explicitly
+ACTIVE_STATUSES = ("queued", "running")
+
+Session = Dict[str, Any]
+
+# ============================================================================
+# MEMORY BACKEND
+# ============================================================================
+
+
+class MemorySessionStore:
+    """In-process store; finished sessions are evicted LRU-first over the caps"""
+
+    def __init__(
+        self,
+        ttl: int = SESSION_TTL,
+        max_entries: int = SESSION_MAX_ENTRIES,
+        max_bytes: int = SESSION_MAX_BYTES,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, Tuple[Session, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.evicted = 0
+
+    def get(self, session_id: str) -> Optional[Session]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        session, updated, _ = entry
+        if time.time() - updated > self.ttl:
+            self.delete(session_id)
+            self.evicted += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def put(self, session_id: str, session: Session) -> None:
+        """Create or replace a session"""
+        self._set(session_id, session)
+        self._evict()
+
+    def add(self, session_id: str, session: Session) -> bool:
+        """Create a session unless one exists; False if it already did"""
+        if self.get(session_id) is not None:
+            return False
+        self.put(session_id, session)
+        return True
+
+    def delete_if_unchanged(self, session_id: str, session: Session) -> bool:
+        """Delete only if the stored session still equals session (as read earlier)"""
+        if self.get(session_id) != session:
+            return False
+        return self.delete(session_id)
+
+    def update(self, session_id: str, session: Session) -> bool:
+        """Persist changes to an existing session; False if it was deleted"""
+        if session_id not in self._sessions:
+            return False
+        self._set(session_id, session)
+        if session["status"] not in ACTIVE_STATUSES:
+            self._evict()
+        return True
+
+    def _set(self, session_id: str, session: Session) -> None:
+        old = self._sessions.pop(session_id, None)
+        if old is not None:
+            self._bytes -= old[2]
+        # Size is only re-measured when a session stops changing rapidly
+        size = old[2] if old is not None and session["status"] in ACTIVE_STATUSES else _size_of(session)
+        self._sessions[session_id] = (session, time.time(), size)
+        self._bytes += size
+
+    def delete(self, session_id: str) -> bool:
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[2]
+        return True
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def items(self) -> Iterator[Tuple[str, Session]]:
+        for session_id in list(self._sessions):
+            session = self.get(session_id)
+            if session is not None:
+                yield session_id, session
+
+    def count_by_status(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for session, _, _ in self._sessions.values():
+            counts[session["status"]] = counts.get(session["status"], 0) + 1
+        return counts
+
+    def _evict(self) -> None:
+        now = time.time()
+        for session_id in list(self._sessions):
+            if now - self._sessions[session_id][1] > self.ttl:
+                self.delete(session_id)
+                self.evicted += 1
+        # Oldest finished sessions go first; in-flight ones are kept
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_entries and self._bytes <= self.max_bytes:
+                break
+            if self._sessions[session_id][0]["status"] not in ACTIVE_STATUSES:
+                self.delete(session_id)
+                self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "approx_bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "evicted": self.evicted,
+        }
+
+
+def _size_of(session: Session) -> int:
+    return len(json.dumps(session, default=str))
+
+# ============================================================================
+# SQLITE BACKEND
+# ============================================================================
+
+
+class SqliteSessionStore:
+    """SQLite (WAL) store visible to every worker process sharing the file"""
+
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: int = SESSION_TTL, table: str = "sessions"):
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated ON {table}(updated_at)")
+        self._conn.commit()
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data, updated_at FROM {self.table} WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        if time.time() - row[1] > self.ttl:
+            self.delete(session_id)
+            self.evicted += 1
+            return None
+        return json.loads(row[0])
+
+    def put(self, session_id: str, session: Session) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (session_id, session["status"], json.dumps(session), time.time()),
+            )
+            self._conn.commit()
+        self._maybe_prune()
+
+    def add(self, session_id: str, session: Session) -> bool:
+        """Atomic across processes: create unless a live row exists; False if one did"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO {self.table} (id, status, data, updated_at) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT(id) DO UPDATE SET status = excluded.status, data = excluded.data, "
+                f"updated_at = excluded.updated_at WHERE {self.table}.updated_at < ?",
+                (session_id, session["status"], json.dumps(session), now, now - self.ttl),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def delete_if_unchanged(self, session_id: str, session: Session) -> bool:
+        """Delete only if the stored session still equals session (as read earlier)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE id = ? AND data = ?", (session_id, json.dumps(session))
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def update(self, session_id: str, session: Session) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE {self.table} SET status = ?, data = ?, updated_at = ? WHERE id = ?",
+                (session["status"], json.dumps(session), time.time(), session_id),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (session_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def items(self) -> Iterator[Tuple[str, Session]]:
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM {self.table} WHERE updated_at >= ? ORDER BY updated_at", (cutoff,)
+            ).fetchall()
+        for session_id, data in rows:
+            yield session_id, json.loads(data)
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) FROM {self.table} WHERE updated_at >= ? GROUP BY status",
+                (time.time() - self.ttl,),
+            ).fetchall()
+        return dict(rows)
+
+    def _maybe_prune(self) -> None:
+        """Expire old sessions at most once a minute"""
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE updated_at < ?", (now - self.ttl,))
+            self._conn.commit()
+        self.evicted += cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM {self.table}"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "table": self.table,
+            "sessions": count,
+            "approx_bytes": size,
+            "ttl_seconds": self.ttl,
+            "evicted": self.evicted,
+        }
+
+
+def create_session_store(backend: str = SESSION_STORE, table: str = "sessions"):
+    """Build the configured session store backend; table separates record kinds"""
+    if backend == "sqlite":
+        return SqliteSessionStore(table=table)
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
@@ -0,0 +1,348 @@
+"""
+Incremental JSON Parser for Streamed Structured Outputs
+Consumes a JSON document chunk by chunk as the model streams it and reports
+what has become usable so far: every value closing at a shallow path (each
+paper of "papers", "title", each entry of "references") and decoded text of
+selected string fields (body_md) while they are still open. The document is
+checked against the response's JSON schema on the fly - wrong types,
+unexpected or missing properties, syntax errors - so a bad response fails
+at the offending character instead of after the last token, and a stream
+that ends mid-document is reported as truncated.
+
+    parser = StreamingJSONParser(schema, text_paths=[("body_md",)])
+    for kind, path, value in parser.feed(chunk):   # ("value"|"text", path, ...)
+        ...
+    document = parser.close()
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Values closing at depth 1..EMIT_DEPTH are reported: ("title",), ("papers", 3)
+EMIT_DEPTH = 2
+
+JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][+-]?[0-9]+)?")
+_NUMBER_CHARS = re.compile(r"[0-9eE.+-]*")
+_STRING_STOP = re.compile(r'["\\\x00-\x1f]')
+_HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+_LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+_WHITESPACE = " \t\n\r"
+
+# What the parser expects next outside of a string
+VALUE, VALUE_OR_END, KEY, KEY_OR_END, COLON, COMMA_OR_END, DONE = range(7)
+
+Path = Tuple[Any, ...]
+Event = Tuple[str, Path, Any]
+
+
+class StreamingJSONError(ValueError):
+    """Malformed, schema-violating or (truncated=True) incomplete JSON"""
+
+    def __init__(self, message: str, position: int, truncated: bool = False):
+        super().__init__(f"{message} (at char {position})")
+        self.position = position
+        self.truncated = truncated
+
+
+def format_path(path: Path) -> str:
+    """("papers", 2, "doi") -> papers[2].doi"""
+    text = ""
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else part)
+    return text or "document"
+
+
+def _types(schema: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    if not schema or "type" not in schema:
+        return None
+    return [schema["type"]] if isinstance(schema["type"], str) else list(schema["type"])
+
+
+class _Frame:
+    """An open object or array"""
+
+    __slots__ = ("value", "schema", "path", "key")
+
+    def __init__(self, value: Any, schema: Optional[Dict[str, Any]], path: Path):
+        self.value = value
+        self.schema = schema
+        self.path = path
+        self.key: Optional[str] = None
+
+# ============================================================================
+# PARSER
+# ============================================================================
+
+
+class StreamingJSONParser:
+    """
+    Push parser for one JSON document. feed() returns the events completed
+    by a chunk; close() returns the whole document once the stream ends.
+    Both raise StreamingJSONError as soon as the input cannot be valid.
+    """
+
+    def __init__(
+        self,
+        schema: Optional[Dict[str, Any]] = None,
+        text_paths: Iterable[Path] = (),
+        emit_depth: int = EMIT_DEPTH,
+    ):
+        self.schema = schema
+        self.text_paths = {tuple(path) for path in text_paths}
+        self.emit_depth = emit_depth
+        self.document: Any = None
+        self._buffer = ""
+        self._offset = 0  # input characters consumed before _buffer
+        self._stack: List[_Frame] = []
+        self._expect = VALUE
+        self._events: List[Event] = []
+        # The open string, if any: decoded parts, whether it is a key, its path
+        self._string: Optional[List[str]] = None
+        self._string_is_key = False
+        self._string_path: Path = ()
+
+    @property
+    def done(self) -> bool:
+        return self._expect == DONE
+
+    def feed(self, text: str) -> List[Event]:
+        """Consume a chunk; returns ("value", path, value) and ("text", path, chunk) events"""
+        self._buffer += text
+        self._run(final=False)
+        events, self._events = self._events, []
+        return events
+
+    def close(self) -> Any:
+        """End of input: the parsed document, or StreamingJSONError(truncated=True)"""
+        self._run(final=True)
+        if self._expect != DONE:
+            position = self._offset + len(self._buffer)
+            if self._string is not None:
+                where = "property name" if self._string_is_key else f"string {format_path(self._string_path)}"
+                raise StreamingJSONError(f"Truncated JSON: unterminated {where}", position, truncated=True)
+            if self._stack:
+                frame = self._stack[-1]
+                kind = "object" if isinstance(frame.value, dict) else "array"
+                raise StreamingJSONError(f"Truncated JSON: unclosed {kind} {format_path(frame.path)}",
+                                         position, truncated=True)
+            raise StreamingJSONError("Truncated JSON: empty document", position, truncated=True)
+        return self.document
+
+    # ------------------------------------------------------------------------
+
+    def _error(self, message: str, index: int) -> StreamingJSONError:
+        return StreamingJSONError(message, self._offset + index)
+
+    def _run(self, final: bool) -> None:
+        buf = self._buffer
+        i, n = 0, len(buf)
+        while i < n:
+            if self._string is not None:
+                i = self._scan_string(buf, i)
+                if self._string is not None:
+                    break  # string (or an escape in it) continues in the next chunk
+                continue
+
+            c = buf[i]
+            if c in _WHITESPACE:
+                i += 1
+                continue
+            expect = self._expect
+            if expect == DONE:
+                raise self._error("Unexpected data after the JSON document", i)
+            if expect == COLON:
+                if c != ":":
+                    raise self._error(f"Expected ':' after property {self._stack[-1].key!r}", i)
+                self._expect = VALUE
+                i += 1
+            elif expect == COMMA_OR_END:
+                frame = self._stack[-1]
+                is_object = isinstance(frame.value, dict)
+                closer = "}" if is_object else "]"
+                if c == ",":
+                    self._expect = KEY if is_object else VALUE
+                    i += 1
+                elif c == closer:
+                    self._close_container(i)
+                    i += 1
+                else:
+                    raise self._error(f"Expected ',' or '{closer}' in {format_path(frame.path)}", i)
+            elif expect in (KEY, KEY_OR_END):
+                if c == "}" and expect == KEY_OR_END:
+                    self._close_container(i)
+                    i += 1
+                elif c == '"':
+                    self._string, self._string_is_key = [], True
+                    i += 1
+                else:
+                    raise self._error("Expected a property name", i)
+            elif c == "]" and expect == VALUE_OR_END:
+                self._close_container(i)
+                i += 1
+            else:
+                end = self._start_value(buf, i, final)
+                if end is None:
+                    break  # number or literal continues in the next chunk
+                i = end
+        self._offset += i
+        self._buffer = buf[i:]
+
+    def _value_target(self) -> Tuple[Path, Optional[Dict[str, Any]]]:
+        """Path and schema of the value about to start"""
+        if not self._stack:
+            return (), self.schema
+        frame = self._stack[-1]
+        schema = frame.schema or {}
+        if isinstance(frame.value, dict):
+            return frame.path + (frame.key,), (schema.get("properties") or {}).get(frame.key)
+        return frame.path + (len(frame.value),), schema.get("items")
+
+    def _check_type(self, kind: str, schema: Optional[Dict[str, Any]], path: Path, index: int) -> None:
+        allowed = _types(schema)
+        if allowed is None or kind in allowed or (kind == "integer" and "number" in allowed):
+            return
+        raise self._error(f"Expected {' or '.join(allowed)} for {format_path(path)}, got {kind}", index)
+
+    def _start_value(self, buf: str, i: int, final: bool) -> Optional[int]:
+        """Begin (or, for scalars, read) the value at buf[i]; None if more input is needed"""
+        path, schema = self._value_target()
+        c = buf[i]
+        if c == "{":
+            self._check_type("object", schema, path, i)
+            self._stack.append(_Frame({}, schema, path))
+            self._expect = KEY_OR_END
+            return i + 1
+        if c == "[":
+            self._check_type("array", schema, path, i)
+            self._stack.append(_Frame([], schema, path))
+            self._expect = VALUE_OR_END
+            return i + 1
+        if c == '"':
+            self._check_type("string", schema, path, i)
+            self._string, self._string_is_key, self._string_path = [], False, path
+            return i + 1
+        if c == "-" or c.isdigit():
+            end = _NUMBER_CHARS.match(buf, i).end()
+            if end == len(buf) and not final:
+                return None  # "1.", "2e" ... may continue
+            match = _NUMBER.fullmatch(buf, i, end)
+            if match is None:
+                raise self._error(f"Invalid number for {format_path(path)}", i)
+            is_float = match.group(1) is not None or match.group(2) is not None
+            self._check_type("number" if is_float else "integer", schema, path, i)
+            self._complete(float(match.group()) if is_float else int(match.group()), path)
+            return end
+        if c in _LITERALS:
+            word, value = _LITERALS[c]
+            chunk = buf[i:i + len(word)]
+            if chunk != word:
+                if word.startswith(chunk) and not final:
+                    return None
+                raise self._error(f"Invalid literal for {format_path(path)}", i)
+            self._check_type("null" if value is None else "boolean", schema, path, i)
+            self._complete(value, path)
+            return i + len(word)
+        raise self._error(f"Unexpected character {c!r} for {format_path(path)}", i)
+
+    def _scan_string(self, buf: str, i: int) -> int:
+        """Decode the open string from buf[i]; returns where decoding stopped"""
+        parts = self._string
+        start = len(parts)
+        n = len(buf)
+        while True:
+            match = _STRING_STOP.search(buf, i)
+            if match is None:
+                if i < n:
+                    parts.append(buf[i:])
+                i = n
+                break
+            j = match.start()
+            if j > i:
+                parts.append(buf[i:j])
+            c = buf[j]
+            if c == '"':
+                self._emit_text(parts, start)
+                self._finish_string(j)
+                return j + 1
+            if c != "\\":
+                raise self._error("Unescaped control character in string", j)
+            if j + 1 >= n:
+                i = j
+                break  # escape split across chunks
+            escape = buf[j + 1]
+            if escape in JSON_ESCAPES:
+                parts.append(JSON_ESCAPES[escape])
+                i = j + 2
+                continue
+            if escape != "u":
+                raise self._error(f"Invalid escape \\{escape}", j)
+            if j + 6 > n:
+                i = j
+                break
+            if not _HEX4.fullmatch(buf, j + 2, j + 6):
+                raise self._error("Invalid \\u escape", j)
+            code = int(buf[j + 2:j + 6], 16)
+            if 0xD800 <= code < 0xDC00:
+                follow = buf[j + 6:j + 12]
+                if len(follow) < 6 and "\\u".startswith(follow[:2]):
+                    i = j
+                    break  # wait for the low surrogate
+                if follow.startswith("\\u") and _HEX4.fullmatch(follow, 2):
+                    low = int(follow[2:], 16)
+                    if 0xDC00 <= low < 0xE000:
+                        parts.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                        i = j + 12
+                        continue
+            parts.append(chr(code))  # lone surrogates pass through, as with json.loads
+            i = j + 6
+        self._emit_text(parts, start)
+        return i
+
+    def _emit_text(self, parts: List[str], start: int) -> None:
+        if not self._string_is_key and self._string_path in self.text_paths and len(parts) > start:
+            self._events.append(("text", self._string_path, "".join(parts[start:])))
+
+    def _finish_string(self, index: int) -> None:
+        value = "".join(self._string)
+        self._string = None
+        if not self._string_is_key:
+            self._complete(value, self._string_path)
+            return
+        frame = self._stack[-1]
+        schema = frame.schema or {}
+        if value in frame.value:
+            raise self._error(f"Duplicate property {value!r} in {format_path(frame.path)}", index)
+        if schema.get("additionalProperties") is False and value not in (schema.get("properties") or {}):
+            raise self._error(f"Unexpected property {value!r} in {format_path(frame.path)}", index)
+        frame.key = value
+        self._expect = COLON
+
+    def _close_container(self, index: int) -> None:
+        frame = self._stack.pop()
+        if isinstance(frame.value, dict):
+            missing = [key for key in (frame.schema or {}).get("required", []) if key not in frame.value]
+            if missing:
+                raise self._error(f"Missing {', '.join(map(repr, missing))} in {format_path(frame.path)}", index)
+        self._complete(frame.value, frame.path)
+
+    def _complete(self, value: Any, path: Path) -> None:
+        """Attach a finished value to its parent and report it"""
+        if self._stack:
+            frame = self._stack[-1]
+            if isinstance(frame.value, dict):
+                frame.value[frame.key] = value
+                frame.key = None
+            else:
+                frame.value.append(value)
+            self._expect = COMMA_OR_END
+        else:
+            self.document = value
+            self._expect = DONE
+        if 1 <= len(path) <= self.emit_depth:
+            self._events.append(("value", path, value))
@@ -0,0 +1,251 @@
+"""
+Tracing and Logging for the Blog Generator
+OpenTelemetry spans (console, JSON-lines file or OTLP exporter) and a
+leveled logger whose records are handed to a background thread, so the
+pipeline never blocks on stdout. Spans and log lines carry the session_id
+bound to the current job.
+"""
+
+import os
+import sys
+import time
+import queue
+import atexit
+import asyncio
+import logging
+import functools
+import contextvars
+import logging.handlers
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from opentelemetry import trace
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE")  # optional, in addition to stderr
+LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s %(levelname)-7s %(name)s%(session)s %(message)s")
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")  # none|console|file|otlp
+TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "blog-generator")
+
+# Session the current job (asyncio task) is working on
+session_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("session_id", default=None)
+
+# Server span of the HTTP request being handled
+request_span_var: contextvars.ContextVar[Optional[trace.Span]] = contextvars.ContextVar("request_span", default=None)
+
+# ============================================================================
+# LOGGING
+# ============================================================================
+
+
+class SessionFilter(logging.Filter):
+    """Stamp records with the bound session_id; runs in the calling thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        session_id = session_id_var.get()
+        record.session_id = session_id
+        record.session = f" [{session_id}]" if session_id else ""
+        return True
+
+
+def _setup_logging() -> logging.Logger:
+    root = logging.getLogger("blog")
+    root.setLevel(LOG_LEVEL)
+    root.propagate = False
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if LOG_FILE:
+        Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+        handlers.append(logging.FileHandler(LOG_FILE, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Callers only enqueue; a listener thread formats and writes
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(SessionFilter())
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return root
+
+
+_root_logger = _setup_logging()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the non-blocking "blog" hierarchy, e.g. get_logger("generator")"""
+    return _root_logger.getChild(name)
+
+
+log = get_logger("telemetry")
+
+# ============================================================================
+# TRACING
+# ============================================================================
+
+_provider = None  # SDK TracerProvider when an exporter is configured
+
+
+def _file_exporter(path: str):
+    """JSON-lines span exporter that owns its file and closes it on shutdown"""
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    class FileSpanExporter(ConsoleSpanExporter):
+        def shutdown(self) -> None:
+            if not self.out.closed:
+                self.out.flush()
+                self.out.close()
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    out = open(path, "a", encoding="utf-8")
+    return FileSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + "\n")
+
+
+def _setup_tracing() -> None:
+    global _provider
+    if TRACE_EXPORTER == "none":
+        return
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        log.warning("TRACE_EXPORTER=%s needs opentelemetry-sdk; tracing disabled", TRACE_EXPORTER)
+        return
+
+    if TRACE_EXPORTER == "console":
+        exporter = ConsoleSpanExporter()
+    elif TRACE_EXPORTER == "file":
+        exporter = _file_exporter(TRACE_FILE)
+    elif TRACE_EXPORTER == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            log.warning("TRACE_EXPORTER=otlp needs opentelemetry-exporter-otlp; tracing disabled")
+            return
+        exporter = OTLPSpanExporter()  # honours OTEL_EXPORTER_OTLP_* variables
+    else:
+        log.warning("Unknown TRACE_EXPORTER %r; tracing disabled", TRACE_EXPORTER)
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    # Spans are exported in batches from a background thread
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    atexit.register(shutdown_tracing)
+
+
+def shutdown_tracing() -> None:
+    """Export pending spans and close the exporter (idempotent)"""
+    global _provider
+    provider, _provider = _provider, None
+    if provider is not None:
+        provider.shutdown()
+
+
+_setup_tracing()
+tracer = trace.get_tracer("blog-generator")
+
+
+def _attributes(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    session_id = session_id_var.get()
+    if session_id is not None:
+        attributes.setdefault("session_id", session_id)
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+@contextmanager
+def span(name: str, kind: trace.SpanKind = trace.SpanKind.INTERNAL, **attributes: Any) -> Iterator[trace.Span]:
+    """Child span of the current one, tagged with the bound session_id"""
+    with tracer.start_as_current_span(name, kind=kind, attributes=_attributes(attributes)) as current:
+        yield current
+
+
+@contextmanager
+def server_span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Span for an HTTP request; reuses the server span if the framework opened one"""
+    current = trace.get_current_span()
+    if getattr(current, "kind", None) == trace.SpanKind.SERVER and current.is_recording():
+        opened = nullcontext(current)
+    else:
+        opened = span(name, kind=trace.SpanKind.SERVER, **attributes)
+    with opened as current:
+        token = request_span_var.set(current)
+        try:
+            yield current
+        finally:
+            request_span_var.reset(token)
+
+
+def record_span(name: str, start: float, end: Optional[float] = None, **attributes: Any) -> None:
+    """Span for an interval that already happened (wall-clock seconds), e.g. queue wait"""
+    end = end if end is not None else time.time()
+    current = tracer.start_span(name, start_time=int(start * 1e9), attributes=_attributes(attributes))
+    current.end(end_time=int(end * 1e9))
+
+
+def mark_error(exc: BaseException) -> None:
+    """Record a handled exception on the active span and flag it as failed"""
+    current = trace.get_current_span()
+    current.record_exception(exc)
+    current.set_status(trace.Status(trace.StatusCode.ERROR, str(exc)))
+
+
+def tag_session(session_id: str) -> None:
+    """Attach a session_id to the active span and the request that created it"""
+    trace.get_current_span().set_attribute("session_id", session_id)
+    request_span = request_span_var.get()
+    if request_span is not None:
+        request_span.set_attribute("session_id", session_id)
+
+
+@contextmanager
+def bind_session(session_id: str) -> Iterator[None]:
+    """Tag every span and log line in this context with session_id"""
+    token = session_id_var.set(session_id)
+    try:
+        yield
+    finally:
+        session_id_var.reset(token)
+
+
+def traced(name: str) -> Callable:
+    """Decorator running an (async or sync) function inside a span"""
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_job(handler: Callable, session_store) -> Callable:
+    """Wrap the queue's job handler: bind the session, record queue wait, span the job"""
+    @functools.wraps(handler)
+    async def wrapper(job_id: str, payload: Dict[str, Any]) -> None:
+        with bind_session(job_id):
+            session = session_store.get(job_id)
+            if session is not None and "created_at" in session:
+                record_span("job.queue_wait", session["created_at"])
+            with span("job", topic=payload.get("topic")):
+                await handler(job_id, payload)
+    return wrapper
@@ -0,0 +1,290 @@
+"""
+Topic Similarity Index
+Offline near-duplicate detection for topics ("AI in healthcare" vs
+"artificial intelligence in health care"). Each topic becomes a hashed,
+signed vector of character trigrams and words (common abbreviations
+expanded), L2-normalized and stored as one row of a float32 NumPy matrix.
+Lookups are a single matrix product plus argpartition top-k, batched over
+many topics at once. Rows are appended in place (the matrix grows by
+doubling) and persisted in SQLite, so other workers pick them up with a
+cheap incremental refresh.
+"""
+
+import os
+import re
+import zlib
+import math
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+TOPIC_INDEX_ENABLED = os.getenv("TOPIC_INDEX_ENABLED", "true").lower() == "true"
+TOPIC_INDEX_PATH = os.getenv("TOPIC_INDEX_PATH", "cache/topic_index.sqlite3")
+# Vector width: memory is rows * dim * 4 bytes (256 -> ~100MB per 100k topics)
+TOPIC_INDEX_DIM = int(os.getenv("TOPIC_INDEX_DIM", "256"))
+# Cosine similarity at or above which a topic counts as a near-duplicate
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0.88"))
+# Reusing another topic's cached research is opt-in (per request or here) and needs a
+# closer match: "type 1" vs "type 2 diabetes" already scores ~0.89
+TOPIC_REUSE_RESEARCH = os.getenv("TOPIC_REUSE_RESEARCH", "false").lower() == "true"
+TOPIC_REUSE_THRESHOLD = float(os.getenv("TOPIC_REUSE_THRESHOLD", "0.95"))
+
+# Entry kinds: research cache entries (ref = cache key) and saved blogs (ref = blog id)
+KINDS = ("research", "blog")
+
+INITIAL_CAPACITY = 1024
+QUERY_CHUNK = 64  # queries per matrix product; bounds the score matrix to 64 x rows
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "how", "in", "into", "is", "of",
+    "on", "or", "the", "to", "vs", "versus", "what", "why", "with",
+}
+
+ABBREVIATIONS = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "llm": "large language model",
+    "llms": "large language models",
+    "cv": "computer vision",
+    "rl": "reinforcement learning",
+    "iot": "internet of things",
+    "vr": "virtual reality",
+    "ar": "augmented reality",
+    "ev": "electric vehicle",
+    "evs": "electric vehicles",
+    "crispr": "crispr gene editing",
+    "covid": "covid 19",
+}
+
+# ============================================================================
+# VECTORIZATION
+# ============================================================================
+
+
+def topic_terms(topic: str) -> List[str]:
+    """ASCII-folded lowercase words, abbreviations expanded, stopwords dropped"""
+    ascii_text = unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode("ascii")
+    words: List[str] = []
+    for word in re.findall(r"[a-z0-9]+", ascii_text.lower()):
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    return [word for word in words if word not in STOPWORDS]
+
+
+def topic_features(topic: str) -> Counter:
+    """
+    Trigrams of the terms run together (so "health care" and "healthcare"
+    share nearly all of them) plus whole words
+    """
+    terms = topic_terms(topic)
+    compact = "".join(terms)
+    features: Counter = Counter(compact[i:i + 3] for i in range(len(compact) - 2))
+    features.update(f"w:{term}" for term in terms)
+    if not features and compact:
+        features[compact] += 1
+    return features
+
+
+def vectorize(topic: str, dim: int = TOPIC_INDEX_DIM) -> np.ndarray:
+    """
+    Signed feature hashing (crc32, stable across processes) with sublinear
+    term frequency, L2-normalized; all zeros for a topic without words
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in topic_features(topic).items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += (1.0 + math.log(count)) * (1.0 if h & 0x80000000 else -1.0)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+# ============================================================================
+# TOPIC INDEX
+# ============================================================================
+
+
+class TopicIndex:
+    """
+    In-memory matrix of topic vectors backed by a SQLite table. Rows carry a
+    kind, a ref (what to reuse) and a scope: matches are only returned within
+    the same kind and scope, e.g. research made with the same prompt and
+    paper count.
+    """
+
+    def __init__(self, path: str = TOPIC_INDEX_PATH, dim: int = TOPIC_INDEX_DIM):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((INITIAL_CAPACITY, dim), dtype=np.float32)
+        self._kinds = np.zeros(INITIAL_CAPACITY, dtype=np.int8)
+        self._scopes = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._active = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._rows: List[Tuple[int, str, str]] = []  # (db id, ref, topic) per matrix row
+        self._positions: Dict[Tuple[str, str], int] = {}  # (kind, ref) -> matrix row
+        self._scope_codes: Dict[str, int] = {}
+        self._last_id = 0
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS topics (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                ref TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                UNIQUE (kind, ref)
+            )"""
+        )
+        self._conn.commit()
+        with self._lock:
+            self._refresh()
+
+    def __len__(self) -> int:
+        return int(self._active[:len(self._rows)].sum())
+
+    def _append(self, row_id: int, kind: str, ref: str, scope: str, topic: str, vector: np.ndarray) -> None:
+        """Add one row to the matrix, doubling its capacity when full (lock held)"""
+        position = len(self._rows)
+        if position == len(self._matrix):
+            capacity = 2 * len(self._matrix)
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:position] = self._matrix
+            self._matrix = matrix
+            self._kinds = np.resize(self._kinds, capacity)
+            self._scopes = np.resize(self._scopes, capacity)
+            self._active = np.resize(self._active, capacity)
+        self._matrix[position] = vector
+        self._kinds[position] = KINDS.index(kind)
+        self._scopes[position] = self._scope_codes.setdefault(scope, len(self._scope_codes))
+        self._active[position] = True
+        self._rows.append((row_id, ref, topic))
+        self._positions[(kind, ref)] = position
+
+    def _refresh(self) -> None:
+        """Load rows written since the last refresh, e.g. by other workers (lock held)"""
+        rows = self._conn.execute(
+            "SELECT id, kind, ref, scope, topic, dim, vector FROM topics WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ).fetchall()
+        for row_id, kind, ref, scope, topic, dim, blob in rows:
+            self._last_id = row_id
+            if (kind, ref) in self._positions:
+                continue
+            # Rows stored at another width are re-vectorized from their text
+            vector = np.frombuffer(blob, dtype=np.float32) if dim == self.dim else vectorize(topic, self.dim)
+            self._append(row_id, kind, ref, scope, topic, vector)
+
+    def add_many(self, kind: str, entries: Iterable[Tuple[str, str]], scope: str = "") -> int:
+        """Index (ref, topic) pairs not yet known; returns how many were added"""
+        with self._lock:
+            self._refresh()
+            fresh = [(ref, topic) for ref, topic in entries if (kind, ref) not in self._positions]
+            if not fresh:
+                return 0
+            vectors = [vectorize(topic, self.dim) for _, topic in fresh]
+            for (ref, topic), vector in zip(fresh, vectors):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO topics (kind, ref, scope, topic, dim, vector) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, ref, scope, topic, self.dim, vector.tobytes()),
+                )
+                if cursor.rowcount:
+                    self._append(cursor.lastrowid, kind, ref, scope, topic, vector)
+            self._conn.commit()
+            # Rows another worker inserted first (ignored above) come in here
+            self._refresh()
+            return len(fresh)
+
+    def add(self, kind: str, ref: str, topic: str, scope: str = "") -> bool:
+        return self.add_many(kind, [(ref, topic)], scope) > 0
+
+    def discard(self, kind: str, ref: str) -> None:
+        """Drop an entry whose target is gone (e.g. evicted research)"""
+        with self._lock:
+            position = self._positions.pop((kind, ref), None)
+            if position is not None:
+                self._active[position] = False
+            self._conn.execute("DELETE FROM topics WHERE kind = ? AND ref = ?", (kind, ref))
+            self._conn.commit()
+
+    def similar_many(
+        self,
+        topics: List[str],
+        kind: str,
+        scope: str = "",
+        k: int = 3,
+        threshold: float = TOPIC_SIMILARITY_THRESHOLD,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        For each topic, up to k entries of that kind and scope with cosine
+        similarity >= threshold, best first: {"ref", "topic", "score"}
+        """
+        with self._lock:
+            self._refresh()
+            count = len(self._rows)
+            code = self._scope_codes.get(scope)
+            if not topics or count == 0 or code is None:
+                return [[] for _ in topics]
+            matrix = self._matrix[:count]
+            mask = (self._kinds[:count] == KINDS.index(kind)) & (self._scopes[:count] == code) & self._active[:count]
+            rows = list(self._rows)
+
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0:
+            return [[] for _ in topics]
+        if candidates.size < count:
+            matrix = matrix[candidates]
+        queries = np.stack([vectorize(topic, self.dim) for topic in topics])
+        top = min(k, candidates.size)
+
+        results: List[List[Dict[str, Any]]] = []
+        for start in range(0, len(queries), QUERY_CHUNK):
+            scores = queries[start:start + QUERY_CHUNK] @ matrix.T
+            best = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            for row_scores, row_best in zip(scores, best):
+                matches = []
+                for column in sorted(row_best, key=lambda c: -row_scores[c]):
+                    score = float(row_scores[column])
+                    if score < threshold:
+                        break
+                    _, ref, topic = rows[candidates[column]]
+                    matches.append({"ref": ref, "topic": topic, "score": round(score, 4)})
+                results.append(matches)
+        return results
+
+    def similar(self, topic: str, kind: str, scope: str = "", k: int = 3,
+                threshold: float = TOPIC_SIMILARITY_THRESHOLD) -> List[Dict[str, Any]]:
+        return self.similar_many([topic], kind, scope, k, threshold)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = len(self._rows)
+            active = self._active[:count]
+            by_kind = {kind: int((active & (self._kinds[:count] == i)).sum()) for i, kind in enumerate(KINDS)}
+        return {
+            "topics": int(active.sum()),
+            **by_kind,
+            "dim": self.dim,
+            "threshold": TOPIC_SIMILARITY_THRESHOLD,
+            "reuse_research": TOPIC_REUSE_RESEARCH,
+            "reuse_threshold": TOPIC_REUSE_THRESHOLD,
+            "matrix_mb": round(self._matrix.nbytes / 2**20, 1),
+            "path": self.path,
+        }
+
+
+# Process-wide index used by get_research_papers and /generate (None when TOPIC_INDEX_ENABLED=false)
+topic_index = TopicIndex() if TOPIC_INDEX_ENABLED else None
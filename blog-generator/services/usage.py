@@ -0,0 +1,187 @@
+"""
+Token and Cost Accounting for OpenAI Calls
+Per-call usage records (prompt/completion/cached tokens, latency, estimated
+cost) and a SQLite ledger aggregating them per day and model, shared by
+every process that writes to the same file.
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# USD per 1M tokens as "model=input:cached_input:output,..."
+OPENAI_PRICING = os.getenv(
+    "OPENAI_PRICING", "gpt-4o-2024-08-06=2.50:1.25:10.00,gpt-4o-mini=0.15:0.075:0.60"
+)
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", "cache/usage.sqlite3")
+
+# Token counters summed per stage and per ledger row
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens")
+
+
+def parse_pricing(spec: str) -> Dict[str, Dict[str, float]]:
+    """Parse "model=input:cached:output,..." into {model: {"input", "cached_input", "output"}}"""
+    pricing = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        model, values = item.split("=", 1)
+        prices = [float(v) for v in values.split(":")]
+        if len(prices) != 3:
+            continue
+        pricing[model.strip()] = dict(zip(("input", "cached_input", "output"), prices))
+    return pricing
+
+
+PRICING = parse_pricing(OPENAI_PRICING)
+
+# ============================================================================
+# USAGE RECORDS
+# ============================================================================
+
+
+def estimate_cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost; cached prompt tokens are billed at the cached-input rate"""
+    prices = PRICING.get(model)
+    if prices is None:
+        return 0.0
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (
+        uncached * prices["input"] + cached_tokens * prices["cached_input"] + completion_tokens * prices["output"]
+    ) / 1_000_000
+
+
+def usage_record(model: str, usage: Any, latency: float, first_token: Optional[float] = None) -> Dict[str, Any]:
+    """Flatten an OpenAI CompletionUsage into a JSON-able per-call record"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+    record = {
+        "model": model,
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": cached,
+        "total_tokens": usage.total_tokens,
+        "latency_ms": int(latency * 1000),
+        "cost_usd": round(estimate_cost(model, usage.prompt_tokens, cached, usage.completion_tokens), 6),
+    }
+    if first_token is not None:
+        record["first_token_ms"] = int(first_token * 1000)
+    return record
+
+
+def add_usage(total: Optional[Dict[str, Any]], record: Dict[str, Any]) -> Dict[str, Any]:
+    """Accumulate a call record into a stage/job total (retries add up)"""
+    if total is None:
+        return dict(record, calls=1)
+    total = dict(total)
+    for field in TOKEN_FIELDS + ("latency_ms",):
+        total[field] = total.get(field, 0) + record.get(field, 0)
+    total["cost_usd"] = round(total.get("cost_usd", 0.0) + record["cost_usd"], 6)
+    total["calls"] = total.get("calls", 0) + 1
+    return total
+
+
+def summarize_usage(stages: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Job-level totals across stages"""
+    total = {field: 0 for field in TOKEN_FIELDS}
+    total.update(latency_ms=0, cost_usd=0.0, calls=0)
+    for record in stages.values():
+        for field in TOKEN_FIELDS + ("latency_ms", "calls"):
+            total[field] += record.get(field, 0)
+        total["cost_usd"] += record.get("cost_usd", 0.0)
+    total["cost_usd"] = round(total["cost_usd"], 6)
+    return total
+
+# ============================================================================
+# LEDGER
+# ============================================================================
+
+
+class UsageLedger:
+    """Per (UTC day, model) aggregates of every recorded call"""
+
+    def __init__(self, path: str = USAGE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS usage_daily (
+                day TEXT NOT NULL,
+                model TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                prompt_tokens INTEGER NOT NULL,
+                completion_tokens INTEGER NOT NULL,
+                cached_tokens INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                latency_ms INTEGER NOT NULL,
+                cost_usd REAL NOT NULL,
+                PRIMARY KEY (day, model, stage)
+            )"""
+        )
+        self._conn.commit()
+
+    def record(self, stage: str, record: Dict[str, Any]) -> None:
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO usage_daily VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(day, model, stage) DO UPDATE SET
+                    calls = calls + 1,
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    completion_tokens = completion_tokens + excluded.completion_tokens,
+                    cached_tokens = cached_tokens + excluded.cached_tokens,
+                    total_tokens = total_tokens + excluded.total_tokens,
+                    latency_ms = latency_ms + excluded.latency_ms,
+                    cost_usd = cost_usd + excluded.cost_usd""",
+                (
+                    day, record["model"], stage,
+                    record["prompt_tokens"], record["completion_tokens"], record["cached_tokens"],
+                    record["total_tokens"], record["latency_ms"], record["cost_usd"],
+                ),
+            )
+            self._conn.commit()
+
+    def summary(self, days: int = 7) -> Dict[str, Any]:
+        """Rows per day/model/stage for the last `days` days, plus per-model totals"""
+        since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT * FROM usage_daily WHERE day >= ? ORDER BY day DESC, model, stage", (since,)
+            )
+            columns = [c[0] for c in cursor.description]
+            rows: List[Dict[str, Any]] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        models: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            total = models.setdefault(row["model"], {"calls": 0, "cost_usd": 0.0, **{f: 0 for f in TOKEN_FIELDS}})
+            for field in TOKEN_FIELDS + ("calls",):
+                total[field] += row[field]
+            total["cost_usd"] += row["cost_usd"]
+        for row in rows:
+            row["cost_usd"] = round(row["cost_usd"], 6)
+            row["avg_latency_ms"] = row.pop("latency_ms") // max(1, row["calls"])
+        for total in models.values():
+            total["cost_usd"] = round(total["cost_usd"], 6)
+
+        return {
+            "since": since,
+            "days": rows,
+            "models": models,
+            "cost_usd": round(sum(t["cost_usd"] for t in models.values()), 6),
+        }
+
+
+# Process-wide ledger; the sqlite file is shared by every worker and the CLI
+usage_ledger = UsageLedger()